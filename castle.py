@@ -3,7 +3,13 @@
 import pygame
 import os
 
+# Loaded castle images shared by every Castle with the same team and scale
+_castle_images = {}
+
 class Castle:
+    __slots__ = ('x', 'y', 'team', 'hp', 'max_hp', 'render', 'scale', 'full_hp_threshold',
+                 'destroyed_threshold', 'images', 'current_image', 'width', 'height')
+
     def __init__(self, x, y, team, hp=1000, render=True, scale=1.2):
         self.x = x
         self.y = y
@@ -17,15 +23,8 @@ class Castle:
         self.full_hp_threshold = 0.5  # 50%
         self.destroyed_threshold = 0   # 0%
 
-        # Map HP thresholds to corresponding image filenames
-        self.hp_to_image = {
-            'full': f"castle_{self.team}_0.png",
-            'half': f"castle_{self.team}_50.png",
-            'destroyed': f"castle_{self.team}_100.png"
-        }
-
-        # Load images
-        self.images = self.load_images()
+        # Load images (once per team and scale)
+        self.images = self.get_images()
 
         # Set current image based on initial HP
         self.current_image = self.get_current_image()
@@ -38,6 +37,30 @@ class Castle:
             self.width = int(100 * self.scale)  # Default width scaled
             self.height = int(100 * self.scale)  # Default height scaled
 
+    @property
+    def hp_to_image(self):
+        """
+        Map HP thresholds to corresponding image filenames.
+        """
+        return {
+            'full': f"castle_{self.team}_0.png",
+            'half': f"castle_{self.team}_50.png",
+            'destroyed': f"castle_{self.team}_100.png"
+        }
+
+    def get_images(self):
+        """
+        Shared images for this team and scale; a set with missing images is not kept,
+        so it is retried once the display is ready.
+        """
+        key = (self.team, self.scale)
+        images = _castle_images.get(key)
+        if images is None:
+            images = self.load_images()
+            if all(images.values()):
+                _castle_images[key] = images
+        return images
+
     def load_images(self):
         """
         Load images for each HP state.
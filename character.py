@@ -1,10 +1,20 @@
 
 import pygame
 import logging
-import random 
-import json
 import os
-from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, FrozenSet, Mapping, Tuple
+from character_registry import CharacterStats, get_registry
+from simulation.animation import (ACTION_SLOTS, ATTACK_SLOT_OFFSET, DEFAULT_HITBOX, AnimationTable,
+                                  get_animation_table)
+from simulation.battlefield import (ACTION_ATTACK, ACTION_DEAD, ACTION_IDLE, ACTION_RUN, ACTION_SKILL,
+                                    ACTION_WALK, ACTIONS, ATTACK_TYPES, NO_ATTACK)
+from simulation.collision import box_overlaps, boxes_overlap, make_box
+from simulation.engine import AOE_SKILLS
+from simulation.lane import LaneIndex
+from simulation.rng import RandomStream
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,132 +25,206 @@ GRAY = (128, 128, 128)
 # Define maximum time_scale to prevent game instability
 MAX_TIME_SCALE = 10
 
+ACTION_IDS = {name: i for i, name in enumerate(ACTIONS)}
+ATTACK_ACTIONS = (ACTION_ATTACK, ACTION_SKILL)
+FIRST_SKILL = ATTACK_TYPES.index('skill1')
+
+# Used by characters created without a stream of their own, e.g. deserialized ones
+_default_rng = RandomStream()
+
 def load_character_info():
-    """Load character information from JSON file"""
-    try:
-        with open('character_info.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logging.error("character_info.json not found!")
-        raise
-    except json.JSONDecodeError:
-        logging.error("Invalid JSON in character_info.json!")
-        raise
+    """Return character information, re-reading the JSON file only if it changed"""
+    registry = get_registry()
+    registry.refresh()
+    return registry.as_dict()
+
+@dataclass(frozen=True, eq=False)
+class CharacterType:
+    """
+    Immutable data shared by every character of one type and team: stats,
+    skills, AoE flags, sprites and the animation table. Characters only hold
+    their own mutable state and a reference to one of these.
+    """
+    stats: CharacterStats
+    team: str
+    sprites: Any
+    animation: AnimationTable
+    slot_sprites: Tuple[list, ...]         # Sprite list of every animation slot, Walk fallback applied
+    skills: Mapping[str, Mapping[str, Any]]
+    attack_damage_frames: Tuple[int, ...]  # Indexed by attack type id
+    aoe_skills: FrozenSet[str]
+    initial_action: int
+
+    @property
+    def name(self) -> str:
+        return self.stats.name
+
+def build_character_type(stats: CharacterStats, team: str, sprites) -> CharacterType:
+    animation = get_animation_table(stats.name, team)
+
+    # Skills dictionary with timing information
+    skills = {
+        skill_name: MappingProxyType({
+            "damage": damage,
+            "sprites": sprites.get(skill_name, []) if sprites else [],
+            "damage_frame": len(sprites.get(skill_name, [])) // 2 if sprites else 0
+        })
+        for skill_name, damage in stats.skills.items()
+    }
+
+    return CharacterType(
+        stats=stats,
+        team=team,
+        sprites=sprites,
+        animation=animation,
+        slot_sprites=tuple(sprites.get(key, []) if (sprites and key) else [] for key in animation.sprite_keys),
+        skills=MappingProxyType(skills),
+        # Middle of the attack animation; skills this character lacks use frame 0
+        attack_damage_frames=tuple(
+            frame if (sprites and (attack_type.startswith('Attack') or attack_type in stats.skills)) else 0
+            for attack_type, frame in zip(ATTACK_TYPES, animation.damage_frames)
+        ),
+        aoe_skills=AOE_SKILLS.get(stats.name, frozenset()),
+        initial_action=ACTION_IDLE if (sprites and 'Idle' in sprites) else ACTION_WALK,
+    )
+
+_character_types: Dict[Tuple[str, str], CharacterType] = {}
+
+def get_character_type(stats: CharacterStats, team: str, sprites) -> CharacterType:
+    """Shared CharacterType for these stats, team and loaded sprites"""
+    key = (stats.name, team)
+    kind = _character_types.get(key)
+    if kind is None or kind.stats is not stats or kind.sprites is not sprites:
+        kind = build_character_type(stats, team, sprites)
+        _character_types[key] = kind
+    return kind
 
 class Character:
-    def __init__(self, sprites, x: float, y: float, team: str, character_type: str, time_scale: float = 1):
-        self.sprites = sprites
+    __slots__ = ('kind', 'x', 'y', 'team', 'original_y', 'time_scale', 'hp', 'max_hp', 'damage',
+                 'vel_x', 'vel_y', 'last_attack_time', 'damage_cooldown', 'attack_cooldown_timer',
+                 'time_since_last_frame', 'action_id', 'attack_id', 'sprite_slot', 'sprite_index',
+                 'previous_index', 'current_sprites', 'previous_sprites', 'action_in_progress',
+                 'is_dead', 'dead_animation_completed', 'target', 'damage_already_applied', 'rng')
+
+    # Movement attributes
+    walk_speed = 100
+    run_speed = 200
+    attack_speed = 1.0
+    valid_actions = ('Idle', 'Walk', 'Run', 'Attack', 'Skill')
+
+    def __init__(self, sprites, x: float, y: float, team: str, character_type: str, time_scale: float = 1,
+                 stats: Optional[CharacterStats] = None, rng: Optional[RandomStream] = None):
+        self.rng = rng or _default_rng
         self.x = x
         self.y = y
         self.team = team
         self.original_y = y
-        self.character_type = character_type
         self.time_scale = min(max(time_scale, 1), MAX_TIME_SCALE)
 
-        # Load character info
+        # Look up the shared type data (no file I/O after the first character of a type)
         try:
-            character_info = load_character_info()
-            if character_type not in character_info:
-                raise ValueError(f"Invalid character type: {character_type}")
-                
-            char_info = character_info[character_type]
-            self.max_hp = char_info['hp']
-            self.hp = char_info['hp']
-            self.attack_range = char_info["attack_range"]
-            self.base_damage = char_info["attack_damage"]
-
-            # Skills dictionary with timing information
-            self.skills = {
-                skill_name: {
-                    "damage": damage,
-                    "sprites": self.sprites.get(skill_name, []) if self.sprites else [],
-                    "damage_frame": len(self.sprites.get(skill_name, [])) // 2 if self.sprites else 0
-                }
-                for skill_name, damage in char_info["skills"].items()
-            }
+            if stats is None:
+                stats = get_registry().get(character_type)
+            elif stats.name != character_type:
+                raise ValueError(f"Stats for {stats.name} given to {character_type}")
+
+            self.kind = get_character_type(stats, team, sprites)
+            self.max_hp = stats.hp
+            self.hp = stats.hp
         except Exception as e:
             logging.error(f"Error loading character info: {e}")
             raise
 
-        # Movement attributes
-        self.walk_speed = 100
-        self.run_speed = 200
         self.vel_x = 0
         self.vel_y = 0
 
         # Combat attributes
-        self.damage = self.base_damage
+        self.damage = stats.attack_damage
         self.last_attack_time = 0
-        self.attack_frame_index = 0
-        self.damage_cooldown = 0.5 / self.time_scale
+        self.damage_cooldown = 0.5 / self.time_scale  # Time between attacks
 
         # Animation timing
-        self.animation_speed = 0.15 
-        self.attack_speed = 1.0 
         self.attack_cooldown_timer = 0.0
         self.time_since_last_frame = 0.0
 
         # State management
-        self.valid_actions = ['Idle', 'Walk', 'Run', 'Attack', 'Skill']
-        self.current_action = 'Idle' if (self.sprites and 'Idle' in self.sprites) else 'Walk'
-        self.current_sprites = []
+        self.action_id = self.kind.initial_action
+        self.attack_id = NO_ATTACK
         self.sprite_index = 0
-        self.previous_sprites = []
         self.previous_index = 0
-        
-        # Initialize current sprites
-        if self.sprites:
-            if self.current_action == "Attack":
-                attack_key = f"{self.current_action}_{0}"
-                self.current_sprites = self.sprites.get(attack_key, [])
-            else:
-                self.current_sprites = self.sprites.get(self.current_action, [])
-            
-            if not self.current_sprites:
-                fallback_action = 'Idle' if 'Idle' in self.sprites else 'Walk'
-                self.current_sprites = self.sprites.get(fallback_action, [])
-            
-            self.previous_sprites = self.current_sprites.copy()
+        self.sprite_slot = self.kind.animation.initial_slot
+        self.current_sprites = self.kind.slot_sprites[self.sprite_slot]
+        self.previous_sprites = self.current_sprites
 
         # Initialize as not in progress so first update will trigger action selection
         self.action_in_progress = False
-        self.damage_applied = False
         self.is_dead = False
         self.dead_animation_completed = False
         self.target = None
-        
-        # Add explicit damage application tracking
-        self.current_attack_type = None
         self.damage_already_applied = False
-        self.last_attack_time = 0
-        self.damage_cooldown = 0.5 / self.time_scale  # Time between attacks
-        
-        # Initialize attack frames more explicitly
-        self.attack_damage_frames = {}
-        if self.sprites:
-            # For regular attacks
-            for i in range(2):  # Assuming Attack_0 and Attack_1
-                attack_key = f'Attack_{i}'
-                if attack_key in self.sprites:
-                    # Set damage frame to middle of animation
-                    self.attack_damage_frames[attack_key] = len(self.sprites[attack_key]) // 2
-            
-            # For skills
-            for skill_name in self.skills:
-                if skill_name in self.sprites:
-                    self.attack_damage_frames[skill_name] = len(self.sprites[skill_name]) // 2
 
-        self.aoe_skills = {}
-        if character_type == "Fire_vizard":
-            self.aoe_skills["skill2"] = True  # Mark Fire_vizard's skill2 as AoE
+    # Shared per-type data
+    @property
+    def character_type(self) -> str:
+        return self.kind.name
+
+    @property
+    def sprites(self):
+        return self.kind.sprites
+
+    @property
+    def animation(self) -> AnimationTable:
+        return self.kind.animation
+
+    @property
+    def skills(self) -> Mapping[str, Mapping[str, Any]]:
+        return self.kind.skills
+
+    @property
+    def aoe_skills(self) -> FrozenSet[str]:
+        return self.kind.aoe_skills
+
+    @property
+    def attack_damage_frames(self) -> Tuple[int, ...]:
+        return self.kind.attack_damage_frames
+
+    @property
+    def attack_range(self) -> float:
+        return self.kind.stats.attack_range
+
+    @property
+    def base_damage(self) -> float:
+        return self.kind.stats.attack_damage
+
+    @property
+    def current_action(self) -> str:
+        return ACTIONS[self.action_id]
+
+    @current_action.setter
+    def current_action(self, action_name: str) -> None:
+        # Network states carry the action by name
+        self.action_id = ACTION_IDS.get(action_name, ACTION_WALK)
+
+    @property
+    def current_attack_type(self) -> Optional[str]:
+        return ATTACK_TYPES[self.attack_id] if self.attack_id != NO_ATTACK else None
+
+    def get_frame_size(self) -> Tuple[int, int]:
+        """Size of the current frame, read from the animation table"""
+        if not self.current_sprites:
+            return DEFAULT_HITBOX
+        return self.kind.animation.hitbox_size(self.sprite_slot, self.sprite_index)
 
     def get_hitbox(self):
         """Get character's hitbox for collision detection"""
-        if not self.current_sprites:
-            return pygame.Rect(self.x, self.y, 40, 40)
-        
-        sprite = self.current_sprites[self.sprite_index]
-        return pygame.Rect(self.x, self.y, sprite.get_width(), sprite.get_height())
+        width, height = self.get_frame_size()
+        return pygame.Rect(self.x, self.y, width, height)
+
+    def get_box(self):
+        """Hitbox as an integer (x, y, width, height) tuple, without allocating a Rect"""
+        width, height = self.get_frame_size()
+        return make_box(self.x, self.y, width, height)
+
     # Add these helper functions at the start of the Character class
 
     def get_center_position(self):
@@ -178,22 +262,24 @@ class Character:
 
     def check_collision(self, x, y, others):
         """Check if position would cause collision"""
-        test_rect = pygame.Rect(x, y, self.get_hitbox().width, self.get_hitbox().height)
+        _, _, width, height = self.get_box()
+        test_box = make_box(x, y, width, height)
         
         for other in others:
             if other == self or not self.is_valid_target(other):
                 continue
                 
-            other_rect = (pygame.Rect(other.x, other.y, other.width, other.height) 
-                        if hasattr(other, 'width') else other.get_hitbox())
+            other_box = (make_box(other.x, other.y, other.width, other.height) 
+                        if hasattr(other, 'width') else other.get_box())
                         
-            if test_rect.colliderect(other_rect):
+            if boxes_overlap(test_box, other_box):
                 return True
                 
         return False
 
-    def update(self, enemies, enemy_castle, delta_time, current_time):
-        """Main update loop with simplified logic and immediate attack handling"""
+    def update(self, enemies: LaneIndex, enemy_castle, delta_time, current_time):
+        """Main update loop with simplified logic and immediate attack handling.
+        enemies is a LaneIndex of the opposing team's characters."""
         if self.hp <= 0:
             if not self.is_dead:
                 self.is_dead = True
@@ -207,21 +293,18 @@ class Character:
         
         # Only process actions if not dead and animation complete
         if not self.action_in_progress:
-            # Find closest valid target
-            valid_targets = [e for e in enemies if self.is_valid_target(e)]
+            # Find closest valid target ahead, then see if the castle is closer
+            closest_target, closest_dist = enemies.nearest_ahead(
+                self.x, self.team == 'left',
+                lambda e: self.get_distance_to(e) if self.is_valid_target(e) else float('inf'))
+
             if enemy_castle and not enemy_castle.is_destroyed():
-                valid_targets.append(enemy_castle)
-                
-            closest_target = None
-            closest_dist = float('inf')
-            
-            for target in valid_targets:
-                dist = self.get_distance_to(target)
-                if ((self.team == 'left' and target.x > self.x) or 
-                    (self.team == 'right' and target.x < self.x)):
+                if ((self.team == 'left' and enemy_castle.x > self.x) or 
+                    (self.team == 'right' and enemy_castle.x < self.x)):
+                    dist = self.get_distance_to(enemy_castle)
                     if dist < closest_dist:
                         closest_dist = dist
-                        closest_target = target
+                        closest_target = enemy_castle
 
             # Set action based on distance
             if closest_target:
@@ -229,36 +312,37 @@ class Character:
                 if closest_dist <= self.attack_range:
                     # Target in range - stop moving and attack
                     if current_time - self.last_attack_time >= self.damage_cooldown:
-                        self.set_action('Skill' if random.random() < 0.3 else 'Attack')
+                        self.set_action('Skill' if self.rng.random() < 0.3 else 'Attack')
                         self.last_attack_time = current_time
                     self.vel_x = 0  # Stop movement
                 else:
                     # Move towards target
-                    self.set_action('Walk' if random.random() < 0.8 else 'Run')
+                    self.set_action('Walk' if self.rng.random() < 0.8 else 'Run')
             else:
                 # No valid targets - move forward
                 self.set_action('Walk')
 
         # Apply movement only if not attacking
-        if self.current_action in ['Walk', 'Run']:
-            speed = self.run_speed if self.current_action == 'Run' else self.walk_speed
+        if self.action_id in (ACTION_WALK, ACTION_RUN):
+            speed = self.run_speed if self.action_id == ACTION_RUN else self.walk_speed
             new_x = self.x + (speed if self.team == 'left' else -speed) * delta_time
             
             # Check boundaries
-            new_x = max(0, min(new_x, SCREEN_WIDTH - self.get_hitbox().width))
+            new_x = max(0, min(new_x, SCREEN_WIDTH - self.get_box()[2]))
             
             # Only move if no collision
-            if not self.check_collision(new_x, self.y, enemies + [enemy_castle]):
+            width = self.get_box()[2]
+            if not self.check_collision(new_x, self.y, enemies.overlapping(new_x, new_x + width) + [enemy_castle]):
                 self.x = new_x
             else:
                 # Stop and prepare to attack
                 self.set_action('Idle')
                 
         # Handle damage application
-        elif self.is_attack_or_skill_action(self.current_action):
-            if (self.current_attack_type and not self.damage_already_applied and 
+        elif self.action_id in ATTACK_ACTIONS:
+            if (self.attack_id != NO_ATTACK and not self.damage_already_applied and 
                 self.sprite_index == self.get_damage_frame()):
-                self.apply_damage_to_target()
+                self.apply_damage_to_target(enemies)
                 self.damage_already_applied = True
     
     # Replace the existing is_within_attack_range method with this simplified version
@@ -329,7 +413,7 @@ class Character:
         return distance <= self.attack_range and correct_direction
     
     def is_attack_or_skill_action(self, action_name):
-        if action_name in self.skills:
+        if action_name in self.kind.skills:
             return True
         action_lower = action_name.lower()
         return 'attack' in action_lower or 'skill' in action_lower
@@ -372,7 +456,7 @@ class Character:
         else:
             return self.x <= 150  # Adjusted to stop before castle
 
-    def apply_action(self, enemies, enemy_castle, scaled_delta_time):
+    def apply_action(self, enemies: LaneIndex, enemy_castle, scaled_delta_time):
         """Enhanced apply_action with improved combat positioning and AoE mechanics"""
         if self.is_dead:
             return
@@ -403,7 +487,7 @@ class Character:
             max_targets_hit = 0
             
             # Check each potential target for AoE value
-            for potential_target in enemies:
+            for potential_target in enemies.items:
                 if not self.is_valid_target(potential_target):
                     continue
                     
@@ -414,7 +498,7 @@ class Character:
                         else potential_target.get_center_position()[0])
                 
                 # Check other enemies within AoE range
-                for other in enemies:
+                for other in enemies.items:
                     if other == potential_target or not self.is_valid_target(other):
                         continue
                         
@@ -471,21 +555,22 @@ class Character:
             
             # Only stop if collision is with non-target
             collision_with_non_target = False
-            test_rect = pygame.Rect(new_x, self.y, self.get_hitbox().width, self.get_hitbox().height)
+            _, _, width, height = self.get_box()
+            test_box = make_box(new_x, self.y, width, height)
             
-            for other in enemies + [enemy_castle]:
+            for other in enemies.overlapping(new_x, new_x + width) + [enemy_castle]:
                 if other == self.target:
                     continue
                     
-                other_rect = (pygame.Rect(other.x, other.y, other.width, other.height) 
-                            if hasattr(other, 'width') else other.get_hitbox())
+                other_box = (make_box(other.x, other.y, other.width, other.height) 
+                            if hasattr(other, 'width') else other.get_box())
                 
-                if test_rect.colliderect(other_rect):
+                if boxes_overlap(test_box, other_box):
                     collision_with_non_target = True
                     break
             
             if not collision_with_non_target:
-                self.x = max(0, min(new_x, SCREEN_WIDTH - self.get_hitbox().width))
+                self.x = max(0, min(new_x, SCREEN_WIDTH - width))
             else:
                 self.x = old_x
                 if action_lower.startswith(('walk', 'run')):
@@ -501,7 +586,9 @@ class Character:
                 attack_center_x = self.x + (self.attack_range if self.team == 'left' else -self.attack_range)
                 aoe_range = self.attack_range * 1.5
                 
-                for target in enemies + [enemy_castle]:
+                nearby = enemies.within(attack_center_x - aoe_range - enemies.max_width,
+                                        attack_center_x + aoe_range)
+                for target in nearby + [enemy_castle]:
                     if not self.is_valid_target(target):
                         continue
                         
@@ -511,7 +598,7 @@ class Character:
                     
                     if abs(target_x - attack_center_x) <= aoe_range:
                         # Apply AoE damage to all targets in range
-                        damage = self.skills["skill2"]["damage"]
+                        damage = self.kind.skills["skill2"]["damage"]
                         target.take_damage(damage)
                 
                 self.damage_already_applied = True
@@ -519,7 +606,7 @@ class Character:
                 # Normal single-target damage
                 if self.target and self.is_within_attack_range(self.target):
                     if self.current_action.startswith('skill'):
-                        damage = self.skills[self.current_action]["damage"]
+                        damage = self.kind.skills[self.current_action]["damage"]
                     else:
                         damage = self.damage
                     self.target.take_damage(damage)
@@ -528,18 +615,12 @@ class Character:
     def detect_enemy_or_castle(self, enemies, enemy_castle):
         """Detect nearby enemies or castle within attack range."""
         enemy_in_range = None
-        forward_enemies = [e for e in enemies if e.team != self.team and e.hp > 0]
-        
-        # Sort enemies by distance
-        forward_enemies.sort(key=lambda e: abs(self.x - e.x))
-
-        # Check for enemies in attack range
-        for enemy in forward_enemies:
-            if ((self.team == 'left' and enemy.x >= self.x) or
-                (self.team == 'right' and enemy.x <= self.x)):
-                if self.is_within_attack_range(enemy):
-                    enemy_in_range = enemy
-                    break
+
+        # Enemies come out of the lane index nearest first
+        for _, enemy in enemies.ahead(self.x, self.team == 'left', inclusive=True):
+            if enemy.team != self.team and enemy.hp > 0 and self.is_within_attack_range(enemy):
+                enemy_in_range = enemy
+                break
 
         # Check castle only if no enemies are in range
         castle_in_range = None
@@ -555,14 +636,9 @@ class Character:
 
     def get_damage_frame(self) -> int:
         """Get the frame at which damage should be applied for current attack"""
-        if not self.current_attack_type:
+        if self.attack_id == NO_ATTACK:
             return 0
-            
-        if self.current_attack_type.startswith('Attack'):
-            return len(self.sprites.get(self.current_attack_type, [])) // 2
-        elif self.current_attack_type in self.skills:
-            return len(self.sprites.get(self.current_attack_type, [])) // 2
-        return 0
+        return self.kind.attack_damage_frames[self.attack_id]
 
     def update_animation(self, delta_time: float) -> None:
         """Update animation frames"""
@@ -571,17 +647,17 @@ class Character:
             return
             
         self.time_since_last_frame += delta_time
-        if self.time_since_last_frame >= self.animation_speed:
+        if self.time_since_last_frame >= self.kind.animation.frame_durations[self.sprite_slot]:
             self.time_since_last_frame = 0.0
             
             self.previous_index = self.sprite_index
-            next_index = (self.sprite_index + 1) % len(self.current_sprites)
+            next_index = (self.sprite_index + 1) % self.kind.animation.frame_counts[self.sprite_slot]
             
             # If animation completes, reset attack states
             if next_index == 0:
-                if self.is_attack_or_skill_action(self.current_action):
+                if self.action_id in ATTACK_ACTIONS:
                     self.action_in_progress = False
-                    self.current_attack_type = None
+                    self.attack_id = NO_ATTACK
                     self.damage_already_applied = False
                 else:
                     self.action_in_progress = False
@@ -595,24 +671,21 @@ class Character:
 
         self.previous_sprites = self.current_sprites
         self.previous_index = self.sprite_index
-        self.current_action = action_name
+        self.action_id = ACTION_IDS[action_name]
         
-        if self.sprites:
-            if action_name == "Attack":
-                attack_num = random.randint(0, 1)
-                self.current_attack_type = f"Attack_{attack_num}"
-                self.current_sprites = self.sprites.get(self.current_attack_type, [])
-            elif action_name == "Skill":
-                skill_name = f"skill{random.randint(1, 2)}"
-                self.current_attack_type = skill_name
-                self.current_sprites = self.sprites.get(skill_name, [])
+        if self.kind.sprites:
+            if self.action_id == ACTION_ATTACK:
+                self.attack_id = self.rng.randint(0, 1)
+            elif self.action_id == ACTION_SKILL:
+                self.attack_id = FIRST_SKILL + self.rng.randint(0, 1)
             else:
-                self.current_attack_type = None
-                self.current_sprites = self.sprites.get(action_name, [])
-                
-            if not self.current_sprites:
-                self.current_sprites = self.sprites.get('Walk', [])
-            
+                self.attack_id = NO_ATTACK
+
+            if self.attack_id != NO_ATTACK:
+                self.sprite_slot = ATTACK_SLOT_OFFSET + self.attack_id
+            else:
+                self.sprite_slot = ACTION_SLOTS[self.action_id]
+            self.current_sprites = self.kind.slot_sprites[self.sprite_slot]
             self.sprite_index = 0
             self.damage_already_applied = False  # Reset damage tracking for new action
 
@@ -621,44 +694,44 @@ class Character:
 
     def handle_death(self, delta_time):
         if not self.dead_animation_completed:
-            if self.current_action != 'Dead' and self.sprites and 'Dead' in self.sprites:
+            if self.action_id != ACTION_DEAD and self.kind.sprites and 'Dead' in self.kind.sprites:
                 self.set_action('Dead')
             else:
                 self.dead_animation_completed = True
 
             if not self.dead_animation_completed:
                 self.time_since_last_frame += delta_time
-                if self.time_since_last_frame >= self.animation_speed and self.current_sprites:
+                frame_duration = self.kind.animation.frame_durations[self.sprite_slot]
+                if self.time_since_last_frame >= frame_duration and self.current_sprites:
                     self.time_since_last_frame = 0.0
                     self.sprite_index += 1
-                    if self.sprite_index >= len(self.current_sprites):
+                    if self.sprite_index >= self.kind.animation.frame_counts[self.sprite_slot]:
                         self.dead_animation_completed = True
 
-    def apply_damage_to_target(self) -> None:
-        """Apply damage once per attack"""
+    def apply_damage_to_target(self, enemies: Optional[LaneIndex] = None) -> None:
+        """Apply damage once per attack; AoE attacks also splash enemies in the lane index"""
         if not self.current_attack_type or not self.target or self.damage_already_applied:
             return
 
         # Calculate damage amount
         damage_amount = self.damage  # Default to base damage
-        if self.current_attack_type in self.skills:
-            damage_amount = self.skills[self.current_attack_type]['damage']
+        if self.current_attack_type in self.kind.skills:
+            damage_amount = self.kind.skills[self.current_attack_type]['damage']
 
         # Check if current attack/skill is AoE
-        is_aoe = self.current_attack_type in self.aoe_skills
+        is_aoe = self.current_attack_type in self.kind.aoe_skills
         attack_box = self.get_attack_box()
 
         if is_aoe:
-            # Handle AoE damage
-            if hasattr(self, '_all_characters'):
-                for potential_target in self._all_characters:
-                    if (potential_target != self and 
-                        potential_target.team != self.team and 
-                        potential_target.hp > 0):
-                        
-                        target_box = potential_target.get_hitbox()
-                        if attack_box.colliderect(target_box):
-                            potential_target.take_damage(damage_amount)
+            # Handle AoE damage: test every nearby enemy hitbox against the attack box at once
+            if enemies is not None:
+                nearby = [enemy for enemy in enemies.overlapping(attack_box.left, attack_box.right)
+                          if enemy.team != self.team and enemy.hp > 0]
+                if nearby:
+                    boxes = np.array([enemy.get_box() for enemy in nearby]).reshape(-1, 4)
+                    hit = box_overlaps(attack_box, boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3])
+                    for i in np.flatnonzero(hit):
+                        nearby[i].take_damage(damage_amount)
             
             # Check castle for AoE
             if hasattr(self.target, 'width'):  # Castle check
@@ -688,7 +761,7 @@ class Character:
         # print(f"{self.character_type} took {amount} damage. HP: {old_hp} -> {self.hp}")
         
         # When taking damage, interrupt walking animations
-        if self.current_action.lower().startswith('walk'):
+        if self.action_id == ACTION_WALK:
             self.set_action('Idle')
             self.vel_x = 0
         
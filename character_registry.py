@@ -0,0 +1,159 @@
+# character_registry.py
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+CHARACTER_INFO_PATH = 'character_info.json'
+
+# Required fields of every character entry and the types they may take
+CHARACTER_SCHEMA = {
+    'hp': (int, float),
+    'attack_range': (int, float),
+    'attack_damage': (int, float),
+    'skills': (dict,),
+}
+
+
+@dataclass(frozen=True)
+class CharacterStats:
+    """Immutable, precomputed stat record for a single character type."""
+    name: str
+    hp: float
+    attack_range: float
+    attack_damage: float
+    skills: Mapping[str, float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the entry in the same shape as character_info.json"""
+        return {
+            'hp': self.hp,
+            'attack_range': self.attack_range,
+            'attack_damage': self.attack_damage,
+            'skills': dict(self.skills),
+        }
+
+
+def validate_character_info(data: Any) -> None:
+    """Check parsed character_info.json against CHARACTER_SCHEMA"""
+    if not isinstance(data, dict) or not data:
+        raise ValueError("character_info.json must be a non-empty object")
+
+    for character_type, entry in data.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"Entry for {character_type} must be an object")
+        for field, expected in CHARACTER_SCHEMA.items():
+            if field not in entry:
+                raise ValueError(f"{character_type} is missing field '{field}'")
+            value = entry[field]
+            # bool is a subclass of int, reject it explicitly
+            if isinstance(value, bool) or not isinstance(value, expected):
+                raise ValueError(f"{character_type}.{field} has invalid type {type(value).__name__}")
+        for skill_name, damage in entry['skills'].items():
+            if isinstance(damage, bool) or not isinstance(damage, (int, float)):
+                raise ValueError(f"{character_type}.skills.{skill_name} must be a number")
+
+
+class CharacterRegistry:
+    """
+    Process-wide, read-only view of character_info.json.
+
+    The file is parsed and validated once; refresh() re-reads it only when
+    its mtime changed. Lookups never touch the disk.
+    """
+
+    def __init__(self, path: str = CHARACTER_INFO_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._stats: Mapping[str, CharacterStats] = MappingProxyType({})
+        self._types: Tuple[str, ...] = ()
+        self.reload()
+
+    @property
+    def types(self) -> Tuple[str, ...]:
+        """Character type names in file order"""
+        return self._types
+
+    @property
+    def stats(self) -> Mapping[str, CharacterStats]:
+        return self._stats
+
+    def reload(self) -> None:
+        """Parse, validate and publish the character definitions"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                validate_character_info(data)
+            except FileNotFoundError:
+                logging.error(f"{self.path} not found!")
+                raise
+            except json.JSONDecodeError:
+                logging.error(f"Invalid JSON in {self.path}!")
+                raise
+            except ValueError as e:
+                logging.error(f"Invalid character definitions in {self.path}: {e}")
+                raise
+
+            stats = {
+                name: CharacterStats(
+                    name=name,
+                    hp=entry['hp'],
+                    attack_range=entry['attack_range'],
+                    attack_damage=entry['attack_damage'],
+                    skills=MappingProxyType(dict(entry['skills'])),
+                )
+                for name, entry in data.items()
+            }
+            # Swap in whole new mappings so readers never see a partial update
+            self._stats = MappingProxyType(stats)
+            self._types = tuple(stats.keys())
+            self._mtime = mtime
+
+    def refresh(self) -> bool:
+        """Reload if the file changed on disk. Returns True if reloaded."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def get(self, character_type: str) -> CharacterStats:
+        try:
+            return self._stats[character_type]
+        except KeyError:
+            raise ValueError(f"Invalid character type: {character_type}") from None
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Fresh mutable copy in the raw character_info.json layout"""
+        return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def __contains__(self, character_type: str) -> bool:
+        return character_type in self._stats
+
+
+_registry: Optional[CharacterRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> CharacterRegistry:
+    """Return the shared registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = CharacterRegistry()
+    return _registry
+
+
+def get_character_stats(character_type: str) -> CharacterStats:
+    return get_registry().get(character_type)
@@ -0,0 +1,158 @@
+# checkpoint_writer.py
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+import numpy as np
+import torch
+
+from policy import NumpyPolicy
+from rl_agent import BaseDQNAgent
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def atomic_write(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    """Write a file through a temporary sibling renamed over it, so readers never see a partial file"""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def read_manifest(model_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """The checkpoint manifest of a model directory, None if it has none or it is unreadable"""
+    manifest_path = Path(model_dir) / MANIFEST_NAME
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Ignoring unreadable checkpoint manifest {manifest_path}: {e}")
+        return None
+
+
+class CheckpointWriter:
+    """
+    Writes training checkpoints and policy snapshots on a background thread.
+
+    The save calls copy what is to be written into CPU memory and return at
+    once; training only waits when max_pending writes are already queued.
+    Every file is written atomically, so a crash leaves either the old
+    file or the new one. After each write the manifest in model_dir lists
+    the checkpoints and snapshots on disk, newest last, and only the newest
+    keep full checkpoints listed there are retained. Files the writer did
+    not write are never touched.
+    """
+
+    def __init__(self, model_dir: Union[str, Path], keep: int = 3, max_pending: int = 2):
+        if keep < 1:
+            raise ValueError(f"Must keep at least one checkpoint, got {keep}")
+        self.model_dir = Path(model_dir)
+        self.keep = keep
+        self.manifest = read_manifest(self.model_dir) or {'checkpoints': [], 'snapshots': []}
+        self._jobs: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'CheckpointWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def save_checkpoint(self,
+                        agent: BaseDQNAgent,
+                        path: Union[str, Path],
+                        episode: int,
+                        include_memory: bool = False,
+                        encoding: str = 'fp32') -> None:
+        """Queue a full resumable checkpoint of agent as it is now"""
+        state = agent.checkpoint_state(encoding)
+        memory = None
+        if include_memory:
+            with agent.memory_lock:
+                memory = agent.memory.snapshot()
+        self._submit(self._write_checkpoint, Path(path), episode, state, memory)
+
+    def save_snapshot(self, agent: BaseDQNAgent, path: Union[str, Path], episode: int, encoding: str = 'fp32') -> None:
+        """Queue an inference-only policy snapshot of agent as it is now"""
+        self._submit(self._write_snapshot, Path(path), episode, agent.numpy_policy(), encoding)
+
+    def _submit(self, *job) -> None:
+        self.check()
+        self._jobs.put(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            try:
+                if job[0] is None:
+                    return
+                if self._error is None:
+                    job[0](*job[1:])
+            except Exception as e:
+                logging.error(f"Checkpoint write failed: {e}")
+                self._error = e
+            finally:
+                self._jobs.task_done()
+
+    def _write_checkpoint(self, path: Path, episode: int, state: Dict[str, Any],
+                          memory: Optional[Dict[str, np.ndarray]]) -> None:
+        if memory is not None:
+            atomic_write(BaseDQNAgent.replay_path(path), lambda f: np.savez(f, **memory))
+        atomic_write(path, lambda f: torch.save(state, f))
+        self._record('checkpoints', path, episode)
+
+        checkpoints = self.manifest['checkpoints']
+        while len(checkpoints) > self.keep:
+            old_path = self.model_dir / checkpoints.pop(0)['file']
+            old_path.unlink(missing_ok=True)
+            BaseDQNAgent.replay_path(old_path).unlink(missing_ok=True)
+            logging.info(f"Removed old checkpoint {old_path}")
+        self._write_manifest()
+
+    def _write_snapshot(self, path: Path, episode: int, policy: NumpyPolicy, encoding: str) -> None:
+        atomic_write(path, lambda f: policy.save(f, encoding))
+        self._record('snapshots', path, episode)
+        self._write_manifest()
+
+    def _record(self, kind: str, path: Path, episode: int) -> None:
+        entries = [entry for entry in self.manifest[kind] if entry['file'] != path.name]
+        entries.append({'episode': episode, 'file': path.name, 'time': time.time()})
+        self.manifest[kind] = entries
+
+    def _write_manifest(self) -> None:
+        text = json.dumps(self.manifest, indent=2).encode()
+        atomic_write(self.model_dir / MANIFEST_NAME, lambda f: f.write(text))
+
+    def check(self) -> None:
+        """Raise if a background write failed"""
+        if self._error is not None:
+            raise RuntimeError("Checkpoint writer failed") from self._error
+
+    def flush(self) -> None:
+        """Wait until every queued write is on disk"""
+        self._jobs.join()
+        self.check()
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+        self._jobs.put((None,))
+        self._thread.join()
+        self.check()
@@ -18,22 +18,7 @@ class Game:
         # Initialize stage logs
         initialize_stage_logs(total_stages=10)
         
-        # Define required AI models for 10 stages
-        required_models = [
-            (f"models/spawn_agent_episode_{200 * (i+1)}.pth", f"Stage {i+1}") 
-            for i in range(10)
-        ]
-        
-        missing_models = []
-        for model_path, stage_name in required_models:
-            if not os.path.exists(model_path):
-                missing_models.append(f"{stage_name} ({model_path})")
-        
-        if missing_models:
-            print("Warning: The following AI models are missing:")
-            for model in missing_models:
-                print(f"- {model}")
-            print("Please ensure all required model files are present in the models directory.")
+        # Stage models are loaded, and missing ones reported, when a stage starts
         
         self.current_scene = HomeScene(self.screen)
     
@@ -0,0 +1,122 @@
+# inference.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+import torch
+
+_STOP = object()  # Queued by close to end the worker
+
+
+class InferenceServer:
+    """
+    Greedy policy actions for many callers, computed in shared batches.
+
+    Callers on any thread submit one observation at a time and get a Future
+    for its action; act and calling the server block for it, so the server
+    itself can be a SpawnEnv opponent_policy. A worker thread takes the
+    first waiting request, keeps collecting until max_batch are waiting or
+    max_wait seconds have passed, and scores them all with one forward pass
+    under torch.inference_mode.
+
+    The model is used as is, so a learner may keep training it; each batch
+    sees the weights of the moment it runs.
+    """
+
+    def __init__(self, model: torch.nn.Module, max_batch: int = 256, max_wait: float = 0.002):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be positive, got {max_batch}")
+        self.model = model
+        self.device = next(model.parameters()).device
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests_served = 0
+        self.batches_run = 0
+        self._requests: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'InferenceServer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests_served / self.batches_run if self.batches_run else 0.0
+
+    def submit(self, observation) -> Future:
+        """Queue one observation; the Future resolves to its greedy action"""
+        if self._closed:
+            raise RuntimeError("Inference server is closed")
+        future: Future = Future()
+        # Copy now: environments update their observation buffers in place
+        self._requests.put((np.array(observation, dtype=np.float32), future))
+        return future
+
+    def act(self, observation) -> int:
+        return self.submit(observation).result()
+
+    __call__ = act
+
+    def _collect(self, first: Tuple[np.ndarray, Future]) -> Tuple[List[Tuple[np.ndarray, Future]], bool]:
+        """The first request plus whatever arrives within the wait window; also whether close was requested"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                request = self._requests.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            request = self._requests.get()
+            if request is _STOP:
+                break
+            batch, stopping = self._collect(request)
+            self._serve(batch)
+
+        # Fail whatever was submitted after close
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not _STOP:
+                request[1].set_exception(RuntimeError("Inference server is closed"))
+
+    def _serve(self, batch: List[Tuple[np.ndarray, Future]]) -> None:
+        try:
+            observations = torch.from_numpy(np.stack([observation for observation, _ in batch])).to(self.device)
+            with torch.inference_mode():
+                actions = self.model(observations).argmax(1).cpu().tolist()
+        except Exception as e:
+            logging.error(f"Inference batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), action in zip(batch, actions):
+            future.set_result(action)
+        self.requests_served += len(batch)
+        self.batches_run += 1
+
+    def close(self) -> None:
+        """Serve the requests already queued, then stop the worker"""
+        if self._closed:
+            return
+        self._closed = True
+        self._requests.put(_STOP)
+        self._thread.join()
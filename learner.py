@@ -0,0 +1,126 @@
+# learner.py
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from rl_agent import BaseDQNAgent
+
+
+class Learner:
+    """
+    Runs the agent's learning updates on a schedule decoupled from env steps.
+
+    Every train_every transitions collected earn gradient_steps calls to
+    agent.replay(), each on a fresh batch of agent.batch_size samples.
+    Inline, observe runs the updates it earned before returning. With
+    background=True they run on a daemon thread that samples the memory on
+    its own while the caller keeps stepping battles; observe then only
+    blocks while more than max_pending updates are waiting, so the ratio of
+    updates to transitions holds even when learning is the slower side.
+
+    Use paused() around anything that must see the networks between
+    updates, such as saving a checkpoint.
+    """
+
+    def __init__(self,
+                 agent: BaseDQNAgent,
+                 train_every: int = 1,
+                 gradient_steps: int = 1,
+                 background: bool = False,
+                 max_pending: Optional[int] = None):
+        if train_every < 1 or gradient_steps < 1:
+            raise ValueError(f"train_every and gradient_steps must be positive, got {train_every} and {gradient_steps}")
+        self.agent = agent
+        self.train_every = train_every
+        self.gradient_steps = gradient_steps
+        self.max_pending = max_pending if max_pending is not None else 4 * gradient_steps
+        self.updates = 0  # Learning updates run so far
+        self.last_loss: Optional[float] = None
+
+        self._collected = 0  # Transitions not yet credited with updates
+        self._pending = 0    # Updates earned but not yet run
+        self._lock = threading.Lock()  # Held for the whole of each update
+        self._work = threading.Condition()
+        self._stopping = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="learner", daemon=True)
+            self._thread.start()
+
+    @property
+    def background(self) -> bool:
+        return self._thread is not None
+
+    def __enter__(self) -> 'Learner':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def observe(self, transitions: int = 1) -> Optional[float]:
+        """Credit newly stored transitions; returns the latest loss, None before the first update"""
+        self._collected += transitions
+        periods, self._collected = divmod(self._collected, self.train_every)
+        earned = periods * self.gradient_steps
+
+        if not self.background:
+            for _ in range(earned):
+                self._update()
+            return self.last_loss
+
+        with self._work:
+            self._pending += earned
+            self._work.notify()
+            self._work.wait_for(lambda: self._pending <= self.max_pending or self._error is not None)
+        self.check()
+        return self.last_loss
+
+    def _update(self) -> None:
+        with self._lock:
+            loss = self.agent.replay()
+        # replay does nothing until the memory holds a full batch
+        if loss is not None:
+            self.updates += 1
+            self.last_loss = loss
+
+    def _run(self) -> None:
+        while True:
+            with self._work:
+                self._work.wait_for(lambda: self._pending > 0 or self._stopping)
+                if self._stopping:
+                    return
+            try:
+                self._update()
+            except BaseException as e:
+                with self._work:
+                    self._error = e
+                    self._work.notify_all()
+                return
+            with self._work:
+                self._pending -= 1
+                self._work.notify_all()
+
+    def check(self) -> None:
+        """Raise if the background learner failed"""
+        if self._error is not None:
+            logging.error(f"Background learner failed: {self._error}")
+            raise RuntimeError("Background learner failed") from self._error
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Hold off learning updates for the duration of the block"""
+        with self._lock:
+            yield
+
+    def close(self) -> None:
+        """Stop the background thread; updates still pending are dropped"""
+        if self._thread is None:
+            return
+        with self._work:
+            self._stopping = True
+            self._work.notify_all()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,257 @@
+# policy.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+POLICY_SUFFIX = '.policy.npz'
+# How weight matrices are stored: float32, float16, or int8 with a float32 scale per output
+ENCODINGS = ('fp32', 'fp16', 'int8')
+# Array of an export holding the file_identity of the checkpoint it was made from
+SOURCE_KEY = 'source'
+
+
+def policy_path(checkpoint: Union[str, Path]) -> Path:
+    """Where the weights-only export of a checkpoint is kept"""
+    return Path(checkpoint).with_suffix(POLICY_SUFFIX)
+
+
+def file_identity(path: Union[str, Path]) -> Optional[str]:
+    """Size and SHA-256 digest of a file's contents, None if it does not exist"""
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+                size += len(chunk)
+    except FileNotFoundError:
+        return None
+    return f"{size}:{digest.hexdigest()}"
+
+
+def export_source(exported: Union[str, Path]) -> Optional[str]:
+    """file_identity of the checkpoint an export was made from, None if it does not record one"""
+    try:
+        with np.load(exported) as data:
+            return str(data[SOURCE_KEY]) if SOURCE_KEY in data.files else None
+    except FileNotFoundError:
+        return None
+
+
+class NumpyPolicy:
+    """
+    Greedy spawn policy evaluated with NumPy alone.
+
+    Holds the (weight, bias) pairs of a ReLU MLP such as the DQN policy
+    network, with weights stored as (inputs, outputs) so a batch of states
+    multiplies from the left. Games load it from the weights-only files
+    written by rl_agent.export_policy and never import torch.
+    """
+
+    def __init__(self, layers: Sequence[Tuple[np.ndarray, np.ndarray]]):
+        if not layers:
+            raise ValueError("A policy needs at least one layer")
+        # Always copies, so a policy taken from a live network does not change with it
+        self.layers: List[Tuple[np.ndarray, np.ndarray]] = [
+            (np.array(weight, dtype=np.float32, order='C'), np.array(bias, dtype=np.float32))
+            for weight, bias in layers
+        ]
+        for (weight, _), (next_weight, _) in zip(self.layers, self.layers[1:]):
+            if weight.shape[1] != next_weight.shape[0]:
+                raise ValueError(f"Layer of {weight.shape[1]} outputs feeds one of {next_weight.shape[0]} inputs")
+
+    @property
+    def state_size(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    @property
+    def action_size(self) -> int:
+        return self.layers[-1][0].shape[1]
+
+    @classmethod
+    def random(cls, state_size: int, action_size: int, hidden: Sequence[int] = (256, 256),
+               seed: Optional[int] = None) -> 'NumpyPolicy':
+        """Untrained policy, initialised like torch's nn.Linear"""
+        rng = np.random.default_rng(seed)
+        sizes = [state_size, *hidden, action_size]
+        layers = []
+        for inputs, outputs in zip(sizes, sizes[1:]):
+            bound = 1 / np.sqrt(inputs)
+            layers.append((rng.uniform(-bound, bound, (inputs, outputs)), rng.uniform(-bound, bound, outputs)))
+        return cls(layers)
+
+    def q_values(self, states) -> np.ndarray:
+        """Action values for one state or a batch of them"""
+        x = np.asarray(states, dtype=np.float32)
+        for weight, bias in self.layers[:-1]:
+            x = np.maximum(x @ weight + bias, 0.0)
+        weight, bias = self.layers[-1]
+        return x @ weight + bias
+
+    def act(self, state) -> int:
+        return int(np.argmax(self.q_values(state)))
+
+    def save(self, path: Union[str, Path], encoding: str = 'fp32', source: Optional[str] = None) -> None:
+        """
+        Write the weights; fp16 halves the file and int8 quarters it, biases
+        stay float32. source is the file_identity of the checkpoint they
+        were exported from, if any.
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown weight encoding {encoding!r}, expected one of {ENCODINGS}")
+        arrays = {}
+        for i, (weight, bias) in enumerate(self.layers):
+            if encoding == 'int8':
+                # Symmetric per-output scale, so each unit keeps its own range
+                scale = np.abs(weight).max(axis=0) / 127.0
+                scale[scale == 0] = 1.0
+                arrays[f'weight_{i}'] = np.round(weight / scale).astype(np.int8)
+                arrays[f'weight_scale_{i}'] = scale.astype(np.float32)
+            elif encoding == 'fp16':
+                arrays[f'weight_{i}'] = weight.astype(np.float16)
+            else:
+                arrays[f'weight_{i}'] = weight
+            arrays[f'bias_{i}'] = bias
+        if source is not None:
+            arrays[SOURCE_KEY] = np.array(source)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'NumpyPolicy':
+        """Read weights written by save in any encoding, decoded to float32"""
+        with np.load(path) as data:
+            count = sum(1 for name in data.files if name.startswith('weight_') and '_scale_' not in name)
+            layers = []
+            for i in range(count):
+                weight = data[f'weight_{i}'].astype(np.float32)
+                if f'weight_scale_{i}' in data:
+                    weight *= data[f'weight_scale_{i}']
+                layers.append((weight, data[f'bias_{i}']))
+            return cls(layers)
+
+
+def load_policy(checkpoint: Union[str, Path]) -> Optional[NumpyPolicy]:
+    """
+    Policy of a training checkpoint, from its weights-only export.
+
+    The export records the size and digest of the checkpoint it was made
+    from. A checkpoint without an export, or whose contents no longer match
+    that record, is exported first; only then is torch imported. File times
+    are not trusted, as a git checkout does not keep them. Returns None when
+    neither file exists.
+    """
+    checkpoint = Path(checkpoint)
+    exported = policy_path(checkpoint)
+    source = file_identity(checkpoint)
+    if source is not None and export_source(exported) != source:
+        from rl_agent import export_policy  # Converting a checkpoint needs torch
+        export_policy(checkpoint, exported)
+    if not exported.exists():
+        return None
+    return NumpyPolicy.load(exported)
+
+
+class PolicyCache:
+    """
+    Loaded policies kept in memory, least recently used evicted first.
+
+    Entries are keyed by the export's path and the file_identity of the
+    checkpoint and the export, so an overwritten checkpoint or a rewritten
+    export is loaded again rather than served stale.
+    Concurrent requests for the same checkpoint share one load, and
+    prefetch starts a load on a background thread so a later get finds
+    the policy ready.
+    """
+
+    def __init__(self, max_size: int = 4):
+        if max_size < 1:
+            raise ValueError(f"Policy cache size must be positive, got {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._policies: "OrderedDict[Tuple[str, Optional[str], Optional[str]], NumpyPolicy]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._policies)
+
+    @staticmethod
+    def _key(checkpoint: Path) -> Tuple[str, Optional[str], Optional[str]]:
+        exported = policy_path(checkpoint)
+        return str(exported.resolve()), file_identity(checkpoint), file_identity(exported)
+
+    def get(self, checkpoint: Union[str, Path]) -> Optional[NumpyPolicy]:
+        """Policy of a checkpoint as load_policy returns it, loading it on first use"""
+        checkpoint = Path(checkpoint)
+        key = self._key(checkpoint)
+        with self._lock:
+            if key in self._policies:
+                self._policies.move_to_end(key)
+                self.hits += 1
+                return self._policies[key]
+            self.misses += 1
+            loading = self._loading.get(key[0])
+            if loading is None:
+                self._loading[key[0]] = future = Future()
+        if loading is not None:
+            return loading.result()
+
+        try:
+            policy = load_policy(checkpoint)
+            if policy is not None:
+                # The export may have been written by load_policy just now
+                self._store(self._key(checkpoint), policy)
+            future.set_result(policy)
+            return policy
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._loading[key[0]]
+
+    def _store(self, key: Tuple[str, Optional[str], Optional[str]], policy: NumpyPolicy) -> None:
+        with self._lock:
+            for stale in [cached for cached in self._policies if cached[0] == key[0]]:
+                del self._policies[stale]
+            self._policies[key] = policy
+            while len(self._policies) > self.max_size:
+                self._policies.popitem(last=False)
+
+    def prefetch(self, checkpoint: Union[str, Path]) -> threading.Thread:
+        """Load a checkpoint's policy on a background thread"""
+        def load():
+            try:
+                self.get(checkpoint)
+            except Exception as e:
+                logging.error(f"Prefetching policy {checkpoint} failed: {e}")
+
+        thread = threading.Thread(target=load, name=f"prefetch-{Path(checkpoint).stem}", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self._lock:
+            self._policies.clear()
+
+
+_policy_cache: Optional[PolicyCache] = None
+_policy_cache_lock = threading.Lock()
+
+
+def get_policy_cache() -> PolicyCache:
+    """Return the shared policy cache, creating it on first use"""
+    global _policy_cache
+    if _policy_cache is None:
+        with _policy_cache_lock:
+            if _policy_cache is None:
+                _policy_cache = PolicyCache()
+    return _policy_cache
@@ -0,0 +1,291 @@
+# replay_buffer.py
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+# (states, actions, rewards, next_states, dones, steps)
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class ReplayBuffer:
+    """
+    Preallocated ring of transitions stored column-wise in NumPy arrays.
+
+    Once full, each new transition overwrites the oldest. Sampling draws
+    indices uniformly with replacement in one call and returns arrays ready
+    for torch.from_numpy. A transition costs about 2 * state_size * 4 + 14
+    bytes, against several hundred for a tuple of arrays in a deque.
+
+    steps is how many rewards a transition's reward sums: 1 for plain
+    transitions, up to n for those built by NStepWindow. next_state is the
+    state that many steps later.
+    """
+
+    FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones', 'steps')
+
+    def __init__(self, capacity: int, state_size: int, seed: Optional[int] = None):
+        if capacity < 1:
+            raise ValueError(f"Replay buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.state_size = state_size
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.steps = np.ones(capacity, dtype=np.uint8)
+        self.position = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, state, action: int, reward: float, next_state, done: bool, steps: int = 1) -> int:
+        """Add one transition; returns the slot written"""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.steps[i] = steps
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def add_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                  next_states: np.ndarray, dones: np.ndarray, steps: Optional[np.ndarray] = None) -> np.ndarray:
+        """Add transitions in order with one write per field; returns the slots written"""
+        count = len(actions)
+        if steps is None:
+            steps = np.ones(count, dtype=np.uint8)
+        if count > self.capacity:
+            # Only the newest capacity transitions would survive anyway
+            start = count - self.capacity
+            states, actions, rewards = states[start:], actions[start:], rewards[start:]
+            next_states, dones, steps = next_states[start:], dones[start:], steps[start:]
+            count = self.capacity
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.steps[slots] = steps
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return slots
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def gather(self, indices: np.ndarray) -> Batch:
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices].astype(np.float32), self.steps[indices])
+
+    def sample(self, batch_size: int) -> Batch:
+        """Uniform batch of (states, actions, rewards, next_states, dones, steps); dones as float32"""
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        return self.gather(self.sample_indices(batch_size))
+
+    def _ordered(self) -> np.ndarray:
+        """Slots from oldest to newest"""
+        return (self.position - self.size + np.arange(self.size)) % self.capacity
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Copies of the stored transitions, oldest first, as save writes them"""
+        order = self._ordered()
+        return {name: getattr(self, name)[order] for name in self.FIELDS}
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the stored transitions, oldest first, to an .npz file"""
+        np.savez(path, **self.snapshot())
+
+    def load(self, path: Union[str, Path]) -> None:
+        """Replace the contents with transitions saved by save, keeping the newest that fit"""
+        with np.load(path) as data:
+            if data['states'].shape[1:] != (self.state_size,):
+                raise ValueError(f"Saved states have shape {data['states'].shape[1:]}, expected ({self.state_size},)")
+            self.position = 0
+            self.size = 0
+            # Files saved before n-step returns have no steps
+            self.add_batch(*(data[name] if name in data else None for name in self.FIELDS))
+
+
+class SumTree:
+    """
+    Binary tree over fixed slots where every node holds the sum of its children.
+
+    Stored as one array with the root at 1 and the leaves from leaf_offset
+    on. Updating or finding a batch of leaves walks all of them up or down
+    the tree together, one level per step: O(batch * log capacity).
+    """
+
+    def __init__(self, capacity: int):
+        self.leaf_offset = 1 << max(capacity - 1, 0).bit_length()
+        self.tree = np.zeros(2 * self.leaf_offset)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def clear(self) -> None:
+        self.tree[:] = 0.0
+
+    def update(self, slots: np.ndarray, values: np.ndarray) -> None:
+        nodes = np.asarray(slots, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes.size and nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes[nodes > 1] // 2)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Slot whose cumulative range contains each value in [0, total)"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.leaf_offset.bit_length() - 1):
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = values >= left_sums
+            values -= np.where(go_right, left_sums, 0.0)
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer sampling transitions in proportion to priority ** alpha.
+
+    New transitions get the highest priority seen so far, so each is
+    sampled at least about once. Samples come with importance-sampling
+    weights normalised to a maximum of 1. beta anneals linearly from
+    beta_start to 1 over beta_steps sampled batches. Priorities are the
+    absolute TD errors of the last learning step, plus epsilon so that no
+    transition drops out entirely.
+    """
+
+    def __init__(self, capacity: int, state_size: int, alpha: float = 0.6, beta_start: float = 0.4,
+                 beta_steps: int = 100000, epsilon: float = 1e-6, seed: Optional[int] = None):
+        super().__init__(capacity, state_size, seed)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.batches_sampled = 0
+        self.tree = SumTree(capacity)
+
+    @property
+    def beta(self) -> float:
+        progress = min(self.batches_sampled / self.beta_steps, 1.0) if self.beta_steps > 0 else 1.0
+        return self.beta_start + (1.0 - self.beta_start) * progress
+
+    def add(self, state, action: int, reward: float, next_state, done: bool, steps: int = 1) -> int:
+        slot = super().add(state, action, reward, next_state, done, steps)
+        self.tree.update(np.array([slot]), np.array([self.max_priority ** self.alpha]))
+        return slot
+
+    def add_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                  next_states: np.ndarray, dones: np.ndarray, steps: Optional[np.ndarray] = None) -> np.ndarray:
+        slots = super().add_batch(states, actions, rewards, next_states, dones, steps)
+        self.tree.update(slots, np.full(len(slots), self.max_priority ** self.alpha))
+        return slots
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        # One draw from each of batch_size equal slices of the total priority
+        total = self.tree.total
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        return np.minimum(self.tree.find(np.minimum(values, np.nextafter(total, 0))), self.size - 1)
+
+    def sample_with_weights(self, batch_size: int) -> Tuple[Batch, np.ndarray, np.ndarray]:
+        """Prioritised batch, its slots and importance-sampling weights as float32"""
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        indices = self.sample_indices(batch_size)
+        probabilities = self.tree.tree[indices + self.tree.leaf_offset] / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.batches_sampled += 1
+        return self.gather(indices), indices, weights.astype(np.float32)
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def load(self, path: Union[str, Path]) -> None:
+        """Load saved transitions; they all start at the highest priority"""
+        self.tree.clear()
+        super().load(path)
+
+
+class NStepWindow:
+    """
+    Turns one-step transitions into n-step ones as they are inserted.
+
+    Transitions arrive num_streams at a time, one per battle stepped in
+    lockstep, and each stream keeps its last n. Once a stream holds n, its
+    oldest leaves with the discounted sum of the n rewards and the state n
+    steps later. When a battle ends, everything it still holds leaves with
+    the rewards up to the end. Both are one matrix product over all
+    streams, with no per-transition Python loop.
+    """
+
+    def __init__(self, n: int, gamma: float, num_streams: int, state_size: int):
+        if not 1 <= n <= np.iinfo(np.uint8).max:
+            raise ValueError(f"n-step length must be between 1 and 255, got {n}")
+        self.n = n
+        self.gamma = gamma
+        self.num_streams = num_streams
+        self.states = np.zeros((num_streams, n, state_size), dtype=np.float32)
+        self.actions = np.zeros((num_streams, n), dtype=np.int64)
+        self.rewards = np.zeros((num_streams, n), dtype=np.float32)
+        self.lengths = np.zeros(num_streams, dtype=np.int64)
+        # returns = rewards @ tail_discounts: column j sums gamma ** (k - j) * reward k over k >= j
+        offsets = np.arange(n)[:, None] - np.arange(n)[None, :]
+        self.tail_discounts = np.where(offsets >= 0, gamma ** np.maximum(offsets, 0), 0.0).astype(np.float32)
+
+    def push(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+             next_states: np.ndarray, dones: np.ndarray) -> Batch:
+        """Add one transition per stream; returns the n-step transitions ready to store"""
+        dones = np.asarray(dones, dtype=np.bool_)
+        if dones.shape != (self.num_streams,):
+            raise ValueError(f"Expected {self.num_streams} transitions, got {len(dones)}")
+        streams = np.arange(self.num_streams)
+        self.states[streams, self.lengths] = states
+        self.actions[streams, self.lengths] = actions
+        self.rewards[streams, self.lengths] = rewards
+        self.lengths += 1
+        ready = []
+
+        full = np.flatnonzero((self.lengths == self.n) & ~dones)
+        if full.size:
+            ready.append((self.states[full, 0], self.actions[full, 0],
+                          self.rewards[full] @ self.tail_discounts[:, 0], next_states[full],
+                          np.zeros(full.size, dtype=np.bool_), np.full(full.size, self.n, dtype=np.uint8)))
+            # Slide the windows along by one
+            self.states[full, :-1] = self.states[full, 1:]
+            self.actions[full, :-1] = self.actions[full, 1:]
+            self.rewards[full, :-1] = self.rewards[full, 1:]
+            self.lengths[full] -= 1
+
+        ended = np.flatnonzero(dones)
+        if ended.size:
+            lengths = self.lengths[ended]
+            held = np.arange(self.n)[None, :] < lengths[:, None]
+            returns = np.where(held, self.rewards[ended], 0.0) @ self.tail_discounts
+            rows, positions = np.nonzero(held)
+            ready.append((self.states[ended[rows], positions], self.actions[ended[rows], positions],
+                          returns[rows, positions].astype(np.float32), next_states[ended[rows]],
+                          np.ones(rows.size, dtype=np.bool_), (lengths[rows] - positions).astype(np.uint8)))
+            self.lengths[ended] = 0
+
+        if not ready:
+            return (self.states[:0, 0], self.actions[:0, 0], self.rewards[:0, 0], self.states[:0, 0],
+                    np.zeros(0, dtype=np.bool_), np.zeros(0, dtype=np.uint8))
+        return tuple(np.concatenate(field) for field in zip(*ready))
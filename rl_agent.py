@@ -3,19 +3,22 @@
 import numpy as np
 import random
 import os
+import logging
+import threading
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from collections import deque
-import json
+from pathlib import Path
+from character_registry import get_registry
+from policy import NumpyPolicy, file_identity, policy_path
+from replay_buffer import NStepWindow, PrioritizedReplayBuffer, ReplayBuffer
+from spawn_game import character_type_for_action
 
-# Load character types from character_info.json
+# Load character types from the shared character registry
 def load_character_types():
     try:
-        with open('character_info.json', 'r') as f:
-            character_info = json.load(f)
-            return list(character_info.keys())
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        return list(get_registry().types)
+    except (FileNotFoundError, ValueError) as e:
         raise Exception(f"Error loading character types: {e}")
 
 # =============================
@@ -47,7 +50,15 @@ EPSILON_DECAY = 0.995  # Decay rate per episode
 LR = 1e-4            # Learning rate for DQN
 BATCH_SIZE = 64
 MEMORY_SIZE = 10000
-TARGET_UPDATE_FREQ = 1000  # Steps
+TARGET_UPDATE_FREQ = 1000  # Learner steps between hard target network syncs
+TARGET_TAU = 0.0     # Polyak rate applied to the target network every learner step; above 0 replaces hard syncs
+DOUBLE_DQN = False   # Pick next actions with the policy network and score them with the target network
+
+# Prioritized replay
+PER_ALPHA = 0.6         # How strongly priorities skew sampling (0 = uniform)
+PER_BETA_START = 0.4    # Initial importance-sampling correction, annealed to 1
+PER_BETA_STEPS = 100000  # Learning steps over which beta reaches 1
+PER_EPSILON = 1e-6      # Added to |TD error| so every transition can still be sampled
 
 # PPO Hyperparameters
 PPO_LR = 3e-4
@@ -63,16 +74,78 @@ PPO_MAX_GRAD_NORM = 0.5
 # Device Configuration
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+def numpy_policy_from_state_dict(state_dict):
+    """NumpyPolicy with the weights of a policy network state dict, linear layers in order"""
+    weights = [tensor for name, tensor in state_dict.items() if name.endswith('weight')]
+    biases = [tensor for name, tensor in state_dict.items() if name.endswith('bias')]
+    return NumpyPolicy([(weight.detach().cpu().numpy().T, bias.detach().cpu().numpy())
+                        for weight, bias in zip(weights, biases)])
+
+def export_policy(checkpoint, out=None, encoding='fp32'):
+    """
+    Write the policy network of a training checkpoint as a weights-only
+    NumPy file for NumpyPolicy, stamped with the checkpoint's file_identity;
+    returns its path.
+    """
+    source = file_identity(checkpoint)
+    state = torch.load(checkpoint, map_location='cpu')
+    out = policy_path(checkpoint) if out is None else Path(out)
+    numpy_policy_from_state_dict(state['policy_net_state_dict']).save(out, encoding, source)
+    return out
+
+# Adam moment buffers, the only optimizer state that tolerates float16; step counts past 2048 would not
+HALF_OPTIMIZER_STATE = ('exp_avg', 'exp_avg_sq')
+
+
+def _detached_copy(value, half=False):
+    """Copy of a checkpoint structure with every tensor cloned to the CPU, floating point ones in float16 if half"""
+    if isinstance(value, torch.Tensor):
+        value = value.detach().to('cpu', copy=True)
+        return value.half() if half and value.is_floating_point() else value
+    if isinstance(value, dict):
+        return {key: _detached_copy(item, half) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_detached_copy(item, half) for item in value)
+    return value
+
+
+def _detached_optimizer_state(state_dict, half=False):
+    """_detached_copy of an optimizer state dict that halves only the HALF_OPTIMIZER_STATE buffers"""
+    return {
+        'state': {
+            param: {name: _detached_copy(value, half and name in HALF_OPTIMIZER_STATE) for name, value in state.items()}
+            for param, state in state_dict['state'].items()
+        },
+        'param_groups': _detached_copy(state_dict['param_groups'])
+    }
+
 # =============================
 # Base DQN Agent
 # =============================
 
 class BaseDQNAgent:
-    def __init__(self, state_size, action_size):
+    def __init__(self, state_size, action_size, prioritized=False, batch_size=BATCH_SIZE, n_step=1,
+                 double_dqn=DOUBLE_DQN, target_update_freq=TARGET_UPDATE_FREQ, target_tau=TARGET_TAU):
         self.state_size = state_size
         self.action_size = action_size
-
-        self.memory = deque(maxlen=MEMORY_SIZE)
+        self.batch_size = batch_size
+        self.double_dqn = double_dqn
+        self.target_update_freq = target_update_freq
+        self.target_tau = target_tau
+        if not 0.0 <= target_tau <= 1.0:
+            raise ValueError(f"Target tau must be between 0 and 1, got {target_tau}")
+        # Rewards summed into each stored transition; above 1 the memory is fed through an NStepWindow
+        self.n_step = n_step
+        self.n_step_window = None
+
+        self.prioritized = prioritized
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(MEMORY_SIZE, state_size, alpha=PER_ALPHA, beta_start=PER_BETA_START,
+                                                  beta_steps=PER_BETA_STEPS, epsilon=PER_EPSILON)
+        else:
+            self.memory = ReplayBuffer(MEMORY_SIZE, state_size)
+        # Guards the memory when a background learner samples it while transitions are added
+        self.memory_lock = threading.Lock()
         self.gamma = GAMMA
         self.epsilon = EPSILON_START
         self.epsilon_min = EPSILON_END
@@ -87,6 +160,14 @@ class BaseDQNAgent:
 
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=self.learning_rate)
         self.steps_done = 0
+        self.learn_steps = 0  # Optimizer steps taken by replay
+        self.target_syncs = 0  # Hard syncs of the target network
+
+        if target_tau > 0:
+            target_policy = f"soft updates with tau={target_tau}"
+        else:
+            target_policy = f"hard sync every {target_update_freq} learner steps"
+        logging.info(f"{type(self).__name__}: {'Double DQN' if double_dqn else 'DQN'} targets, {target_policy}")
 
     def build_model(self):
         model = nn.Sequential(
@@ -101,57 +182,153 @@ class BaseDQNAgent:
     def update_target_network(self):
         self.target_net.load_state_dict(self.policy_net.state_dict())
 
+    def soft_update_target_network(self, tau):
+        """Move every target parameter a fraction tau towards the policy network, in place"""
+        with torch.no_grad():
+            torch._foreach_lerp_(list(self.target_net.parameters()), list(self.policy_net.parameters()), tau)
+
+    def step_target_network(self):
+        """Apply the target-update policy after one learner step"""
+        if self.target_tau > 0:
+            self.soft_update_target_network(self.target_tau)
+        elif self.learn_steps % self.target_update_freq == 0:
+            self.update_target_network()
+            self.target_syncs += 1
+            logging.info(f"Target network synced at learner step {self.learn_steps} (sync {self.target_syncs})")
+
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        if self.n_step > 1:
+            self.remember_batch(np.asarray(state, dtype=np.float32)[None], np.array([action]),
+                                np.array([reward], dtype=np.float32), np.asarray(next_state, dtype=np.float32)[None],
+                                np.array([done]))
+            return
+        with self.memory_lock:
+            self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones, steps=None):
+        """
+        Store one transition per battle stepped in lockstep.
+
+        With n_step above 1, row i must always come from the same battle;
+        the transitions are held back until their n-step returns are known.
+        Pass steps for transitions that are already n-step.
+        """
+        if self.n_step > 1 and steps is None:
+            if self.n_step_window is None:
+                self.n_step_window = NStepWindow(self.n_step, self.gamma, len(actions), self.state_size)
+            states, actions, rewards, next_states, dones, steps = self.n_step_window.push(
+                states, actions, rewards, next_states, dones)
+        with self.memory_lock:
+            self.memory.add_batch(states, actions, rewards, next_states, dones, steps)
 
     def choose_action(self, state, deterministic=True):
         self.steps_done += 1
         if not deterministic and random.random() < self.epsilon:
             return random.randrange(self.action_size)
         else:
-            state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-            with torch.no_grad():
+            state_tensor = torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0).to(self.device)
+            with torch.inference_mode():
                 q_values = self.policy_net(state_tensor)
             return torch.argmax(q_values).item()
 
-    def replay(self):
-        if len(self.memory) < BATCH_SIZE:
-            return
-
-        batch = random.sample(self.memory, BATCH_SIZE)
-        state_batch = torch.FloatTensor(np.array([sample[0] for sample in batch])).to(self.device)
-        action_batch = torch.LongTensor([sample[1] for sample in batch]).unsqueeze(1).to(self.device)
-        reward_batch = torch.FloatTensor([sample[2] for sample in batch]).to(self.device)
-        next_state_batch = torch.FloatTensor(np.array([sample[3] for sample in batch])).to(self.device)
-        done_batch = torch.FloatTensor([sample[4] for sample in batch]).to(self.device)
+    def choose_actions(self, states, deterministic=True):
+        """choose_action for a batch of states with one forward pass; returns an int64 array"""
+        states = np.asarray(states, dtype=np.float32)
+        self.steps_done += len(states)
+        state_tensor = torch.from_numpy(states).to(self.device)
+        with torch.inference_mode():
+            actions = self.policy_net(state_tensor).argmax(1).cpu().numpy()
+        if not deterministic:
+            explore = np.random.random(len(states)) < self.epsilon
+            actions[explore] = np.random.randint(self.action_size, size=int(explore.sum()))
+        return actions
 
-        q_values = self.policy_net(state_batch).gather(1, action_batch)
+    def replay(self):
+        with self.memory_lock:
+            if len(self.memory) < self.batch_size:
+                return
+            if self.prioritized:
+                (states, actions, rewards, next_states, dones, steps), indices, weights = \
+                    self.memory.sample_with_weights(self.batch_size)
+            else:
+                states, actions, rewards, next_states, dones, steps = self.memory.sample(self.batch_size)
+        state_batch = torch.from_numpy(states).to(self.device)
+        action_batch = torch.from_numpy(actions).unsqueeze(1).to(self.device)
+        reward_batch = torch.from_numpy(rewards).to(self.device)
+        next_state_batch = torch.from_numpy(next_states).to(self.device)
+        done_batch = torch.from_numpy(dones).to(self.device)
+        # gamma ** steps bootstraps n-step transitions from the state n steps later
+        discount_batch = torch.from_numpy((self.gamma ** steps).astype(np.float32)).to(self.device)
+
+        q_values = self.policy_net(state_batch).gather(1, action_batch).squeeze(1)
 
         with torch.no_grad():
-            next_q_values = self.target_net(next_state_batch).max(1)[0]
-
-        expected_q_values = reward_batch + (1 - done_batch) * self.gamma * next_q_values
-
-        loss = nn.MSELoss()(q_values.squeeze(), expected_q_values)
+            if self.double_dqn:
+                next_actions = self.policy_net(next_state_batch).argmax(1, keepdim=True)
+                next_q_values = self.target_net(next_state_batch).gather(1, next_actions).squeeze(1)
+            else:
+                next_q_values = self.target_net(next_state_batch).max(1)[0]
+
+        expected_q_values = reward_batch + (1 - done_batch) * discount_batch * next_q_values
+
+        if self.prioritized:
+            td_errors = expected_q_values - q_values
+            loss = (torch.from_numpy(weights).to(self.device) * td_errors.pow(2)).mean()
+            with self.memory_lock:
+                self.memory.update_priorities(indices, td_errors.detach().abs().cpu().numpy())
+        else:
+            loss = nn.MSELoss()(q_values, expected_q_values)
 
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
+        self.learn_steps += 1
+        self.step_target_network()
 
         return loss.item()
 
+    def numpy_policy(self):
+        """The current policy network as a NumpyPolicy"""
+        return numpy_policy_from_state_dict(self.policy_net.state_dict())
+
     def decay_epsilon(self):
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
 
-    def save(self, filename):
-        torch.save({
-            'policy_net_state_dict': self.policy_net.state_dict(),
-            'target_net_state_dict': self.target_net.state_dict(),
-            'optimizer_state_dict': self.optimizer.state_dict(),
+    @staticmethod
+    def replay_path(filename):
+        """Where the replay buffer is kept next to a checkpoint"""
+        return Path(filename).with_suffix('.replay.npz')
+
+    def save(self, filename, include_memory=False, encoding='fp32'):
+        """
+        Write a full, resumable training checkpoint. encoding='fp16' stores
+        the networks and Adam's moment estimates at half precision, keeping
+        step counts exact; load restores them to float32.
+        """
+        checkpoint = self.checkpoint_state(encoding)
+        if include_memory:
+            with self.memory_lock:
+                self.memory.save(self.replay_path(filename))
+        torch.save(checkpoint, filename)
+
+    def checkpoint_state(self, encoding='fp32'):
+        """Everything save writes, copied to the CPU so it can be written while training goes on"""
+        if encoding not in ('fp32', 'fp16'):
+            raise ValueError(f"Training checkpoints are fp32 or fp16, got {encoding!r}")
+        half = encoding == 'fp16'
+        return {
+            'policy_net_state_dict': _detached_copy(self.policy_net.state_dict(), half),
+            'target_net_state_dict': _detached_copy(self.target_net.state_dict(), half),
+            'optimizer_state_dict': _detached_optimizer_state(self.optimizer.state_dict(), half),
             'epsilon': self.epsilon,
-            'steps_done': self.steps_done
-        }, filename)
+            'steps_done': self.steps_done,
+            'learn_steps': self.learn_steps
+        }
+
+    def save_policy(self, filename, encoding='fp32'):
+        """Write an inference-only snapshot of the policy network for NumpyPolicy"""
+        self.numpy_policy().save(filename, encoding)
 
     def load(self, filename):
         if os.path.exists(filename):
@@ -161,27 +338,24 @@ class BaseDQNAgent:
             self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
             self.epsilon = checkpoint['epsilon']
             self.steps_done = checkpoint['steps_done']
+            self.learn_steps = checkpoint.get('learn_steps', 0)
             self.update_target_network()
+            if self.replay_path(filename).exists():
+                self.memory.load(self.replay_path(filename))
 
 # =============================
 # AI Player Agent (DQN-based)
 # =============================
 
 class AIPlayerAgent(BaseDQNAgent):
-    def __init__(self, state_size, team='left'):
+    def __init__(self, state_size, team='left', **options):
+        """options are BaseDQNAgent's learning settings, such as prioritized or double_dqn"""
         self.team = team
-        super().__init__(state_size=state_size, action_size=PLAYER_ACTION_SPACE_SIZE)
+        super().__init__(state_size=state_size, action_size=PLAYER_ACTION_SPACE_SIZE, **options)
 
     def decide_character_type(self, action):
         """
         Maps the chosen action to a character type.
         """
-        if action == ACTION_SPAWN_FIRE_VIZARD:
-            return CHARACTER_TYPES[0]
-        elif action == ACTION_SPAWN_LIGHTNING_MAGE:
-            return CHARACTER_TYPES[1]
-        elif action == ACTION_SPAWN_WANDERER_MAGICIAN:
-            return CHARACTER_TYPES[2]
-        else:
-            return None  # Do nothing
+        return character_type_for_action(action)
 
@@ -0,0 +1,250 @@
+# rollout.py
+
+import logging
+import multiprocessing as mp
+import queue
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from replay_buffer import NStepWindow
+from rl_agent import AIPlayerAgent
+from spawn_env import SPAWN_STATE_SIZE, VecSpawnEnv
+
+# (states, actions, rewards, next_states, dones, steps)
+Transitions = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+SEED_STRIDE = 1_000_000  # Episode seeds of worker w start at seed + w * SEED_STRIDE
+
+
+class SharedTransitionRing:
+    """
+    Fixed-size ring of transitions in shared memory.
+
+    Rollout workers append whole batches under a lock and the learner copies
+    out everything written since its last drain. A learner that falls more
+    than capacity behind loses the oldest unread transitions; they are
+    counted in dropped.
+    """
+
+    def __init__(self, state_size: int, capacity: int = 65536, ctx=None):
+        ctx = ctx or mp.get_context('spawn')
+        self.state_size = state_size
+        self.capacity = capacity
+        self._buffers = {
+            'states': ctx.RawArray('f', capacity * state_size),
+            'actions': ctx.RawArray('q', capacity),
+            'rewards': ctx.RawArray('f', capacity),
+            'next_states': ctx.RawArray('f', capacity * state_size),
+            'dones': ctx.RawArray('b', capacity),
+            'steps': ctx.RawArray('B', capacity),
+        }
+        self._written = ctx.RawValue('q', 0)
+        self._lock = ctx.Lock()
+        self.read = 0
+        self.dropped = 0
+        self._attach()
+
+    def _attach(self) -> None:
+        # NumPy views over the shared buffers, rebuilt in every process
+        self.states = np.frombuffer(self._buffers['states'], dtype=np.float32).reshape(-1, self.state_size)
+        self.actions = np.frombuffer(self._buffers['actions'], dtype=np.int64)
+        self.rewards = np.frombuffer(self._buffers['rewards'], dtype=np.float32)
+        self.next_states = np.frombuffer(self._buffers['next_states'], dtype=np.float32).reshape(-1, self.state_size)
+        self.dones = np.frombuffer(self._buffers['dones'], dtype=np.int8)
+        self.steps = np.frombuffer(self._buffers['steps'], dtype=np.uint8)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in self._buffers:
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._attach()
+
+    @property
+    def written(self) -> int:
+        """Transitions written since the ring was created"""
+        return self._written.value
+
+    def write(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+              next_states: np.ndarray, dones: np.ndarray, steps: np.ndarray) -> None:
+        count = len(actions)
+        if count > self.capacity:
+            raise ValueError(f"Cannot write {count} transitions into a ring of {self.capacity}")
+        with self._lock:
+            start = self._written.value
+            slots = (start + np.arange(count)) % self.capacity
+            self.states[slots] = states
+            self.actions[slots] = actions
+            self.rewards[slots] = rewards
+            self.next_states[slots] = next_states
+            self.dones[slots] = dones
+            self.steps[slots] = steps
+            self._written.value = start + count
+
+    def drain(self) -> Transitions:
+        """Copies of every transition written since the last drain, oldest first"""
+        with self._lock:
+            written = self._written.value
+            start = max(self.read, written - self.capacity)
+            slots = np.arange(start, written) % self.capacity
+            transitions = (self.states[slots], self.actions[slots], self.rewards[slots],
+                           self.next_states[slots], self.dones[slots].astype(np.bool_), self.steps[slots])
+        self.dropped += start - self.read
+        self.read = written
+        return transitions
+
+
+class SharedWeights:
+    """Policy parameters and exploration rate published by the learner, versioned for workers to poll"""
+
+    def __init__(self, model: torch.nn.Module, epsilon: float, ctx=None):
+        ctx = ctx or mp.get_context('spawn')
+        size = sum(parameter.numel() for parameter in model.parameters())
+        self._flat = ctx.RawArray('f', size)
+        self._version = ctx.RawValue('q', 0)
+        self._epsilon = ctx.RawValue('d', epsilon)
+        self._lock = ctx.Lock()
+        self.publish(model, epsilon)
+
+    @property
+    def version(self) -> int:
+        return self._version.value
+
+    def publish(self, model: torch.nn.Module, epsilon: float) -> None:
+        vector = parameters_to_vector(model.parameters()).detach().cpu().numpy()
+        with self._lock:
+            np.frombuffer(self._flat, dtype=np.float32)[:] = vector
+            self._epsilon.value = epsilon
+            self._version.value += 1
+
+    def fetch(self, model: torch.nn.Module) -> Tuple[int, float]:
+        """Load the published parameters into model; returns (version, epsilon)"""
+        with self._lock:
+            vector = np.frombuffer(self._flat, dtype=np.float32).copy()
+            version, epsilon = self._version.value, self._epsilon.value
+        with torch.no_grad():
+            vector_to_parameters(torch.from_numpy(vector).to(next(model.parameters()).device), model.parameters())
+        return version, epsilon
+
+
+def rollout_worker(worker_id: int,
+                   ring: SharedTransitionRing,
+                   weights: SharedWeights,
+                   stop,
+                   episodes,
+                   num_envs: int,
+                   seed: Optional[int],
+                   n_step: int = 1,
+                   gamma: float = 0.99) -> None:
+    """
+    Play num_envs headless battles with the latest published policy until stop is set.
+
+    Transitions are turned into n-step ones here, where each battle's steps
+    still arrive in order.
+    """
+    torch.set_num_threads(1)  # Many workers share the machine
+    agent = AIPlayerAgent(state_size=SPAWN_STATE_SIZE)
+    env = VecSpawnEnv(num_envs, seed=None if seed is None else seed + worker_id * SEED_STRIDE)
+    window = NStepWindow(n_step, gamma, num_envs, SPAWN_STATE_SIZE)
+    version = 0
+    states = env.reset().copy()
+
+    while not stop.is_set():
+        if weights.version != version:
+            version, agent.epsilon = weights.fetch(agent.policy_net)
+
+        actions = agent.choose_actions(states, deterministic=False)
+        next_states, rewards, dones, infos = env.step(actions)
+        next_states = next_states.copy()
+
+        # Finished battles were reset; store their terminal state instead
+        final_states = next_states.copy()
+        for i in np.flatnonzero(dones):
+            final_states[i] = infos[i]['final_observation']
+            episodes.put(infos[i]['episode'])
+
+        ring.write(*window.push(states, actions, rewards, final_states, dones))
+        states = next_states
+
+
+class RolloutWorkers:
+    """
+    Worker processes playing headless battles for a learner in this process.
+
+    Each worker steps its own VecSpawnEnv with the policy last published by
+    the learner, streams transitions back through a SharedTransitionRing and
+    reports finished episodes on a queue. Transitions arrive already summed
+    over agent.n_step rewards. Workers are started with the
+    spawn method so they never inherit torch state from the learner.
+    """
+
+    def __init__(self,
+                 agent: AIPlayerAgent,
+                 num_workers: int,
+                 envs_per_worker: int = 8,
+                 seed: Optional[int] = None,
+                 capacity: int = 65536):
+        if num_workers < 1:
+            raise ValueError(f"Need at least one rollout worker, got {num_workers}")
+        ctx = mp.get_context('spawn')
+        self.ring = SharedTransitionRing(agent.state_size, capacity, ctx)
+        self.weights = SharedWeights(agent.policy_net, agent.epsilon, ctx)
+        self._stop = ctx.Event()
+        self._episodes = ctx.Queue()
+        self.processes = [
+            ctx.Process(target=rollout_worker, name=f"rollout-{worker_id}", daemon=True,
+                        args=(worker_id, self.ring, self.weights, self._stop, self._episodes,
+                              envs_per_worker, seed, agent.n_step, agent.gamma))
+            for worker_id in range(num_workers)
+        ]
+
+    def __enter__(self) -> 'RolloutWorkers':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        for process in self.processes:
+            process.start()
+
+    def publish(self, agent: AIPlayerAgent) -> None:
+        """Hand the learner's current policy and epsilon to the workers"""
+        self.weights.publish(agent.policy_net, agent.epsilon)
+
+    def drain(self) -> Transitions:
+        return self.ring.drain()
+
+    def finished_episodes(self) -> List[Dict[str, Any]]:
+        """Results of the episodes finished since the last call"""
+        results = []
+        while True:
+            try:
+                results.append(self._episodes.get_nowait())
+            except queue.Empty:
+                return results
+
+    def check(self) -> None:
+        """Raise if a worker died"""
+        for process in self.processes:
+            if process.exitcode not in (None, 0):
+                logging.error(f"Rollout worker {process.name} exited with code {process.exitcode}")
+                raise RuntimeError(f"Rollout worker {process.name} exited with code {process.exitcode}")
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        # Empty the queue so no worker blocks on flushing it while exiting
+        self.finished_episodes()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._episodes.close()
@@ -2,10 +2,12 @@
 import pygame
 import os
 from typing import Dict, List, Any
-from character import Character, load_character_info
-from castle import Castle
+from character_registry import get_registry
+from simulation import FixedStepClock, Simulation, SimConfig, SimCastle
+from simulation_renderer import SimulationRenderer
 from utils import load_character_sprites
-from rl_agent import AIPlayerAgent
+from policy import NumpyPolicy, get_policy_cache
+from spawn_game import build_spawn_state
 from .base_scene import Scene
 from .utils.logger import load_stage_logs, save_stage_logs  # Corrected import
 
@@ -20,6 +22,7 @@ class GameConfig:
     TIME_LIMIT = 180  # 3 minutes
     GAGE_INCREMENT = 4
     FPS = 60
+    SIM_STEP = 1 / FPS  # Simulated seconds per fixed step
     
     # Colors
     WHITE = (255, 255, 255)
@@ -35,6 +38,7 @@ class GameConfig:
         i: f"models/spawn_agent_episode_{200 * (i+1)}.pth" 
         for i in range(10)  # Stages 0 to 9
     }
+    PREFETCH_NEXT_STAGE = True  # Load the next stage's model in the background while this one plays
 
 class GameScene(Scene):
     def __init__(self, screen, stage_number):
@@ -46,6 +50,7 @@ class GameScene(Scene):
         self.pause_menu_active = False
         self.game_state = self.initialize_game_state()
         self.clock = pygame.time.Clock()
+        self.sim_clock = FixedStepClock(self.config.SIM_STEP)
         self.initialize_ai_agent()
         self.stage_cleared = False  # Flag to prevent multiple logs
 
@@ -96,19 +101,31 @@ class GameScene(Scene):
     def initialize_game_state(self):
         """Initialize the game state"""
         # Load character info
-        self.CHARACTER_INFO = load_character_info()
-        self.CHARACTER_TYPES = list(self.CHARACTER_INFO.keys())
+        registry = get_registry()
+        registry.refresh()
+        self.CHARACTER_STATS = registry.stats
+        self.CHARACTER_TYPES = list(registry.types)
+        
+        # Game rules run in the headless simulation; gages regenerate continuously
+        self.sim = Simulation(
+            config=SimConfig(
+                SCREEN_WIDTH=self.config.SCREEN_WIDTH,
+                MAX_CHARACTERS=self.config.MAX_CHARACTERS,
+                SPAWN_COST=self.config.SPAWN_COST,
+                MAX_GAGE=self.config.MAX_GAGE,
+                TIME_LIMIT=self.config.TIME_LIMIT,
+                GAGE_INCREMENT=self.config.GAGE_INCREMENT,
+                GAGE_INTERVAL=0
+            ),
+            left_castle=SimCastle(x=0, y=self.config.SCREEN_HEIGHT-100, team='left'),
+            right_castle=SimCastle(x=self.config.SCREEN_WIDTH-120, 
+                                   y=self.config.SCREEN_HEIGHT-100, team='right')
+        )
         
         game_state = {
-            'characters': [],
-            'left_castle': Castle(x=0, y=self.config.SCREEN_HEIGHT-100, team='left', render=True),
-            'right_castle': Castle(x=self.config.SCREEN_WIDTH-120, 
-                                 y=self.config.SCREEN_HEIGHT-100, team='right', render=True),
-            'left_gage': 0,
-            'right_gage': 0,
+            'left_castle': self.sim.left_castle,
+            'right_castle': self.sim.right_castle,
             'camera_offset': 0,
-            'elapsed_time': 0,
-            'time_limit': self.config.TIME_LIMIT,
             'loaded_sprites': {},
             'game_over': False,
             'winner': None
@@ -120,77 +137,33 @@ class GameScene(Scene):
                 'left': load_character_sprites(os.path.join('sprites', 'left', char_type)),
                 'right': load_character_sprites(os.path.join('sprites', 'right', char_type))
             }
+        self.renderer = SimulationRenderer(game_state['loaded_sprites'])
         
         return game_state
         
     def initialize_ai_agent(self):
-        """Initialize the AI agent for the appropriate stage"""
+        """Load the spawn policy for the appropriate stage, evaluated with NumPy"""
         state_size = 6 + 2 * len(self.CHARACTER_TYPES)  # Base features + character counts
-        self.ai_agent = AIPlayerAgent(state_size=state_size, team='right')
+        action_size = len(self.CHARACTER_TYPES) + 1  # One spawn per type, then do nothing
         
-        # Load the appropriate model for the stage
+        # Load the appropriate model for the stage; retries are served from the shared cache
+        cache = get_policy_cache()
         model_path = self.config.STAGE_MODELS.get(self.stage_number)
-        if model_path and os.path.exists(model_path):
-            self.ai_agent.load(model_path)
-        else:
+        self.ai_policy = cache.get(model_path) if model_path else None
+        if self.ai_policy is None:
             print(f"Warning: Could not load AI model for stage {self.stage_number + 1}")
+            self.ai_policy = NumpyPolicy.random(state_size, action_size)
+
+        next_model_path = self.config.STAGE_MODELS.get(self.stage_number + 1)
+        if self.config.PREFETCH_NEXT_STAGE and next_model_path:
+            cache.prefetch(next_model_path)
 
     def spawn_character(self, team: str, character_type: str):
         """Spawn a character with the given type for the specified team"""
-        if len([c for c in self.game_state['characters'] if c.team == team]) >= self.config.MAX_CHARACTERS // 2:
-            return False
-            
-        sprites = self.game_state['loaded_sprites'][character_type][team]
         x = 100 if team == 'left' else self.config.SCREEN_WIDTH - 140
         y = self.config.SCREEN_HEIGHT - 100  # Position within game area
         
-        character = Character(sprites=sprites, x=x, y=y, team=team, 
-                            character_type=character_type, time_scale=1)
-        self.game_state['characters'].append(character)
-        return True
-
-    def build_spawn_state(self):
-        """Build state representation for AI agent"""
-        left_castle = self.game_state['left_castle']
-        right_castle = self.game_state['right_castle']
-        characters = self.game_state['characters']
-        
-        # Castle status
-        left_castle_hp_ratio = left_castle.hp / left_castle.max_hp
-        right_castle_hp_ratio = right_castle.hp / right_castle.max_hp
-        
-        # Resource management
-        left_gage_ratio = self.game_state['left_gage'] / self.config.MAX_GAGE
-        right_gage_ratio = self.game_state['right_gage'] / self.config.MAX_GAGE
-        
-        # Team analysis
-        alive_characters = [c for c in characters if c.hp > 0]
-        left_team = [c for c in alive_characters if c.team == 'left']
-        right_team = [c for c in alive_characters if c.team == 'right']
-        
-        # Type distribution
-        left_counts = [0] * len(self.CHARACTER_TYPES)
-        right_counts = [0] * len(self.CHARACTER_TYPES)
-        
-        for char in left_team:
-            left_counts[self.CHARACTER_TYPES.index(char.character_type)] += 1
-        for char in right_team:
-            right_counts[self.CHARACTER_TYPES.index(char.character_type)] += 1
-        
-        # Normalize counts
-        max_count = self.config.MAX_CHARACTERS / 2
-        left_counts = [count / max_count for count in left_counts]
-        right_counts = [count / max_count for count in right_counts]
-        
-        # Calculate team health
-        total_left_hp = sum(c.hp / c.max_hp for c in left_team) / len(left_team) if left_team else 0
-        total_right_hp = sum(c.hp / c.max_hp for c in right_team) / len(right_team) if right_team else 0
-        
-        state = [left_castle_hp_ratio, right_castle_hp_ratio,
-                left_gage_ratio, right_gage_ratio,
-                total_left_hp, total_right_hp] + left_counts + right_counts
-        
-        return state
+        return self.sim.purchase(team, character_type, x, y) is not None
 
     def handle_events(self, events):
         for event in events:
@@ -205,79 +178,49 @@ class GameScene(Scene):
                         self.switch_to_scene(StageSelectScene(self.screen))
                 elif not self.pause_menu_active:
                     # Handle character spawning (1-3 keys)
-                    if event.unicode in "123" and self.game_state['left_gage'] >= self.config.SPAWN_COST:
+                    if event.unicode in "123":
                         char_idx = int(event.unicode) - 1
                         if char_idx < len(self.CHARACTER_TYPES):
-                            if self.spawn_character('left', self.CHARACTER_TYPES[char_idx]):
-                                self.game_state['left_gage'] -= self.config.SPAWN_COST
+                            self.spawn_character('left', self.CHARACTER_TYPES[char_idx])
 
     def update(self, dt):
         if not self.pause_menu_active and not self.game_state['game_over']:
-            current_time = pygame.time.get_ticks() / 1000
-            
-            # Update game time
-            self.game_state['elapsed_time'] += dt
-            
-            # Update gages
-            self.game_state['left_gage'] = min(self.game_state['left_gage'] + 
-                                             self.config.GAGE_INCREMENT * dt,
-                                             self.config.MAX_GAGE)
-            self.game_state['right_gage'] = min(self.game_state['right_gage'] + 
-                                              self.config.GAGE_INCREMENT * dt,
-                                              self.config.MAX_GAGE)
-            
-            # AI agent decision
-            if self.game_state['right_gage'] >= self.config.SPAWN_COST:
-                spawn_state = self.build_spawn_state()
-                ai_action = self.ai_agent.choose_action(spawn_state, deterministic=True)
-                if ai_action < len(self.CHARACTER_TYPES):
-                    if self.spawn_character('right', self.CHARACTER_TYPES[ai_action]):
-                        self.game_state['right_gage'] -= self.config.SPAWN_COST
-            
-            # Update characters
-            characters_to_remove = []
-            for character in self.game_state['characters']:
-                if character.is_dead:
-                    characters_to_remove.append(character)
-                    continue
-                    
-                enemies = [c for c in self.game_state['characters'] 
-                          if c.team != character.team and not c.is_dead]
-                enemy_castle = (self.game_state['right_castle'] if character.team == 'left'
-                              else self.game_state['left_castle'])
-                
-                character.update(enemies, enemy_castle, dt, current_time)
+            # Run as many fixed steps as the frame time covers
+            for _ in range(self.sim_clock.advance(dt)):
+                self.fixed_update(self.sim_clock.step)
+                if self.game_state['game_over']:
+                    break
+
+    def fixed_update(self, dt):
+        """Advance the battle by one fixed step"""
+        # Update game time and gages
+        self.sim.update_clock(dt)
             
-            # Remove dead characters
-            for char in characters_to_remove:
-                self.game_state['characters'].remove(char)
+        # AI agent decision
+        if self.sim.gauges['right'] >= self.config.SPAWN_COST:
+            spawn_state = build_spawn_state(self.sim)
+            ai_action = self.ai_policy.act(spawn_state)
+            if ai_action < len(self.CHARACTER_TYPES):
+                self.spawn_character('right', self.CHARACTER_TYPES[ai_action])
+        
+        # Update characters (dead ones are removed by the simulation)
+        self.sim.update_units(dt)
+        
+        # Check game over conditions
+        game_over, winner = self.sim.check_game_over()
+        if game_over:
+            self.game_state['game_over'] = True
+            self.game_state['winner'] = winner
             
-            # Check game over conditions
-            if (self.game_state['left_castle'].is_destroyed() or 
-                self.game_state['right_castle'].is_destroyed() or
-                self.game_state['elapsed_time'] >= self.game_state['time_limit']):
-                
-                self.game_state['game_over'] = True
-                if self.game_state['left_castle'].is_destroyed():
-                    self.game_state['winner'] = "Right Team Wins!"
-                elif self.game_state['right_castle'].is_destroyed():
-                    self.game_state['winner'] = "Left Team Wins!"
-                elif self.game_state['left_castle'].hp > self.game_state['right_castle'].hp:
-                    self.game_state['winner'] = "Left Team Wins!"
-                elif self.game_state['right_castle'].hp > self.game_state['left_castle'].hp:
-                    self.game_state['winner'] = "Right Team Wins!"
-                else:
-                    self.game_state['winner'] = "Draw!"
-                
-                # Log stage completion
-                self.log_stage_completion()
+            # Log stage completion
+            self.log_stage_completion()
 
     def log_stage_completion(self):
         """Log the stage completion with remaining time."""
         if not self.stage_cleared:
             logs = load_stage_logs()
             stage_key = str(self.stage_number + 1)  # Stages are 1-indexed
-            remaining_time = max(0, self.config.TIME_LIMIT - self.game_state['elapsed_time'])
+            remaining_time = max(0, self.config.TIME_LIMIT - self.sim.elapsed_time)
             logs[stage_key] = {
                 "cleared": True,
                 "remaining_time": round(remaining_time, 2)  # Round to 2 decimal places
@@ -293,12 +236,10 @@ class GameScene(Scene):
         self.screen.blit(self.background, (0, self.config.UI_HEIGHT))
         
         # 3. Draw characters
-        for character in self.game_state['characters']:
-            character.draw(self.screen, self.game_state['camera_offset'])
+        self.renderer.draw_units(self.screen, self.sim, self.game_state['camera_offset'], self.sim_clock.alpha)
         
         # 4. Draw castles
-        self.game_state['left_castle'].draw(self.screen, self.game_state['camera_offset'])
-        self.game_state['right_castle'].draw(self.screen, self.game_state['camera_offset'])
+        self.renderer.draw_castles(self.screen, self.sim, self.game_state['camera_offset'])
         
         # 5. Draw UI elements on top of the filled area
         self.draw_ui()
@@ -316,7 +257,7 @@ class GameScene(Scene):
         ui_start_y = 0  # UI is at the top
         
         # 1. Draw timer
-        remaining_time = max(0, self.game_state['time_limit'] - self.game_state['elapsed_time'])
+        remaining_time = max(0, self.config.TIME_LIMIT - self.sim.elapsed_time)
         minutes = int(remaining_time // 60)
         seconds = int(remaining_time % 60)
         timer_text = self.font.render(f"{minutes:02}:{seconds:02}", True, self.config.BLACK)
@@ -326,14 +267,14 @@ class GameScene(Scene):
         # Left Gage
         pygame.draw.rect(self.screen, self.config.BLACK, (50, ui_start_y + 20, self.config.MAX_GAGE, 20), 2)  # Border
         pygame.draw.rect(self.screen, self.config.BLUE, (52, ui_start_y + 22, 
-                                                         self.game_state['left_gage'] - 4, 16))  # Filled
+                                                         self.sim.gauges['left'] - 4, 16))  # Filled
         
         # Right Gage
         pygame.draw.rect(self.screen, self.config.BLACK, 
                          (self.config.SCREEN_WIDTH - 250, ui_start_y + 20, self.config.MAX_GAGE, 20), 2)  # Border
         pygame.draw.rect(self.screen, self.config.RED, 
                          (self.config.SCREEN_WIDTH - 248, ui_start_y + 22, 
-                          self.game_state['right_gage'] - 4, 16))  # Filled
+                          self.sim.gauges['right'] - 4, 16))  # Filled
         
         # 3. Draw character selection info with preloaded images
         y_offset = ui_start_y + 80
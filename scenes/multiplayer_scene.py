@@ -3,8 +3,9 @@ import pygame
 import os
 from typing import Dict, Any
 from .base_scene import Scene
-from character import Character, load_character_info
-from castle import Castle
+from character_registry import get_registry
+from simulation import FixedStepClock, Simulation, SimConfig, SimCastle
+from simulation_renderer import SimulationRenderer
 from utils import load_character_sprites
 
 class MultiplayerGameConfig:
@@ -18,6 +19,7 @@ class MultiplayerGameConfig:
     TIME_LIMIT = 180  # 3 minutes
     GAGE_INCREMENT = 4
     FPS = 60
+    SIM_STEP = 1 / FPS  # Simulated seconds per fixed step
     
     # Colors
     WHITE = (255, 255, 255)
@@ -39,6 +41,7 @@ class MultiplayerGameScene(Scene):
         # Initialize game state
         self.game_state = self.initialize_game_state()
         self.clock = pygame.time.Clock()
+        self.sim_clock = FixedStepClock(self.config.SIM_STEP)
         
         # Load Character UI Images
         self.load_character_ui_images()
@@ -97,19 +100,31 @@ class MultiplayerGameScene(Scene):
     def initialize_game_state(self) -> Dict[str, Any]:
         """Initialize the game state."""
         # Load character info
-        self.CHARACTER_INFO = load_character_info()
-        self.CHARACTER_TYPES = list(self.CHARACTER_INFO.keys())
+        registry = get_registry()
+        registry.refresh()
+        self.CHARACTER_STATS = registry.stats
+        self.CHARACTER_TYPES = list(registry.types)
+        
+        # Game rules run in the headless simulation; gages regenerate continuously
+        self.sim = Simulation(
+            config=SimConfig(
+                SCREEN_WIDTH=self.config.SCREEN_WIDTH,
+                MAX_CHARACTERS=self.config.MAX_CHARACTERS,
+                SPAWN_COST=self.config.SPAWN_COST,
+                MAX_GAGE=self.config.MAX_GAGE,
+                TIME_LIMIT=self.config.TIME_LIMIT,
+                GAGE_INCREMENT=self.config.GAGE_INCREMENT,
+                GAGE_INTERVAL=0
+            ),
+            left_castle=SimCastle(x=0, y=self.config.SCREEN_HEIGHT-100, team='left'),
+            right_castle=SimCastle(x=self.config.SCREEN_WIDTH-120, 
+                                   y=self.config.SCREEN_HEIGHT-100, team='right')
+        )
         
         game_state = {
-            'characters': [],
-            'left_castle': Castle(x=0, y=self.config.SCREEN_HEIGHT-100, team='left', render=True),
-            'right_castle': Castle(x=self.config.SCREEN_WIDTH-120, 
-                                 y=self.config.SCREEN_HEIGHT-100, team='right', render=True),
-            'left_gage': 0,
-            'right_gage': 0,
+            'left_castle': self.sim.left_castle,
+            'right_castle': self.sim.right_castle,
             'camera_offset': 0,
-            'elapsed_time': 0,
-            'time_limit': self.config.TIME_LIMIT,
             'loaded_sprites': {},
             'game_over': False,
             'winner': None
@@ -121,22 +136,16 @@ class MultiplayerGameScene(Scene):
                 'left': load_character_sprites(os.path.join('sprites', 'left', char_type)),
                 'right': load_character_sprites(os.path.join('sprites', 'right', char_type))
             }
+        self.renderer = SimulationRenderer(game_state['loaded_sprites'])
         
         return game_state
 
     def spawn_character(self, team: str, character_type: str) -> bool:
         """Spawn a character with the given type for the specified team."""
-        if len([c for c in self.game_state['characters'] if c.team == team]) >= self.config.MAX_CHARACTERS // 2:
-            return False
-            
-        sprites = self.game_state['loaded_sprites'][character_type][team]
         x = 100 if team == 'left' else self.config.SCREEN_WIDTH - 140
         y = self.config.SCREEN_HEIGHT - 100  # Position within game area
         
-        character = Character(sprites=sprites, x=x, y=y, team=team, 
-                            character_type=character_type, time_scale=1)
-        self.game_state['characters'].append(character)
-        return True
+        return self.sim.purchase(team, character_type, x, y) is not None
 
     def handle_events(self, events):
         """Handle user input events."""
@@ -154,67 +163,35 @@ class MultiplayerGameScene(Scene):
                     # Handle character spawning for both players
                     # Left player
                     for i, key in enumerate(self.controls['left']['spawn_keys']):
-                        if event.key == key and self.game_state['left_gage'] >= self.config.SPAWN_COST:
-                            if i < len(self.CHARACTER_TYPES):
-                                if self.spawn_character('left', self.CHARACTER_TYPES[i]):
-                                    self.game_state['left_gage'] -= self.config.SPAWN_COST
+                        if event.key == key and i < len(self.CHARACTER_TYPES):
+                            self.spawn_character('left', self.CHARACTER_TYPES[i])
                     # Right player
                     for i, key in enumerate(self.controls['right']['spawn_keys']):
-                        if event.key == key and self.game_state['right_gage'] >= self.config.SPAWN_COST:
-                            if i < len(self.CHARACTER_TYPES):
-                                if self.spawn_character('right', self.CHARACTER_TYPES[i]):
-                                    self.game_state['right_gage'] -= self.config.SPAWN_COST
+                        if event.key == key and i < len(self.CHARACTER_TYPES):
+                            self.spawn_character('right', self.CHARACTER_TYPES[i])
 
     def update(self, dt):
         """Update the game state."""
         if not self.pause_menu_active and not self.game_state['game_over']:
-            current_time = pygame.time.get_ticks() / 1000
-            
-            # Update game time
-            self.game_state['elapsed_time'] += dt
-            
-            # Update gages
-            self.game_state['left_gage'] = min(self.game_state['left_gage'] + 
-                                             self.config.GAGE_INCREMENT * dt,
-                                             self.config.MAX_GAGE)
-            self.game_state['right_gage'] = min(self.game_state['right_gage'] + 
-                                              self.config.GAGE_INCREMENT * dt,
-                                              self.config.MAX_GAGE)
-            
-            # Update characters
-            characters_to_remove = []
-            for character in self.game_state['characters']:
-                if character.is_dead:
-                    characters_to_remove.append(character)
-                    continue
-                    
-                enemies = [c for c in self.game_state['characters'] 
-                          if c.team != character.team and not c.is_dead]
-                enemy_castle = (self.game_state['right_castle'] if character.team == 'left'
-                              else self.game_state['left_castle'])
-                
-                character.update(enemies, enemy_castle, dt, current_time)
-            
-            # Remove dead characters
-            for char in characters_to_remove:
-                self.game_state['characters'].remove(char)
-            
-            # Check game over conditions
-            if (self.game_state['left_castle'].is_destroyed() or 
-                self.game_state['right_castle'].is_destroyed() or
-                self.game_state['elapsed_time'] >= self.game_state['time_limit']):
-                
-                self.game_state['game_over'] = True
-                if self.game_state['left_castle'].is_destroyed():
-                    self.game_state['winner'] = "Right Team Wins!"
-                elif self.game_state['right_castle'].is_destroyed():
-                    self.game_state['winner'] = "Left Team Wins!"
-                elif self.game_state['left_castle'].hp > self.game_state['right_castle'].hp:
-                    self.game_state['winner'] = "Left Team Wins!"
-                elif self.game_state['right_castle'].hp > self.game_state['left_castle'].hp:
-                    self.game_state['winner'] = "Right Team Wins!"
-                else:
-                    self.game_state['winner'] = "Draw!"
+            # Run as many fixed steps as the frame time covers
+            for _ in range(self.sim_clock.advance(dt)):
+                self.fixed_update(self.sim_clock.step)
+                if self.game_state['game_over']:
+                    break
+
+    def fixed_update(self, dt):
+        """Advance the battle by one fixed step"""
+        # Update game time and gages
+        self.sim.update_clock(dt)
+        
+        # Update characters (dead ones are removed by the simulation)
+        self.sim.update_units(dt)
+        
+        # Check game over conditions
+        game_over, winner = self.sim.check_game_over()
+        if game_over:
+            self.game_state['game_over'] = True
+            self.game_state['winner'] = winner
     
     def draw(self):
         """Render all game elements onto the screen."""
@@ -225,12 +202,10 @@ class MultiplayerGameScene(Scene):
         self.screen.blit(self.background, (0, self.config.UI_HEIGHT))
         
         # 3. Draw characters
-        for character in self.game_state['characters']:
-            character.draw(self.screen, self.game_state['camera_offset'])
+        self.renderer.draw_units(self.screen, self.sim, self.game_state['camera_offset'], self.sim_clock.alpha)
         
         # 4. Draw castles
-        self.game_state['left_castle'].draw(self.screen, self.game_state['camera_offset'])
-        self.game_state['right_castle'].draw(self.screen, self.game_state['camera_offset'])
+        self.renderer.draw_castles(self.screen, self.sim, self.game_state['camera_offset'])
         
         # 5. Draw UI elements on top of the filled area
         self.draw_ui()
@@ -249,7 +224,7 @@ class MultiplayerGameScene(Scene):
         ui_start_y = 0  # UI is at the top
         
         # 1. Draw timer
-        remaining_time = max(0, self.game_state['time_limit'] - self.game_state['elapsed_time'])
+        remaining_time = max(0, self.config.TIME_LIMIT - self.sim.elapsed_time)
         minutes = int(remaining_time // 60)
         seconds = int(remaining_time % 60)
         timer_text = self.font.render(f"{minutes:02}:{seconds:02}", True, self.config.BLACK)
@@ -259,14 +234,14 @@ class MultiplayerGameScene(Scene):
         # Left Gage
         pygame.draw.rect(self.screen, self.config.BLACK, (50, ui_start_y + 20, self.config.MAX_GAGE, 20), 2)  # Border
         pygame.draw.rect(self.screen, self.config.BLUE, (52, ui_start_y + 22, 
-                                                         self.game_state['left_gage'] - 4, 16))  # Filled
+                                                         self.sim.gauges['left'] - 4, 16))  # Filled
         
         # Right Gage
         pygame.draw.rect(self.screen, self.config.BLACK, 
                          (self.config.SCREEN_WIDTH - 250, ui_start_y + 20, self.config.MAX_GAGE, 20), 2)  # Border
         pygame.draw.rect(self.screen, self.config.RED, 
                          (self.config.SCREEN_WIDTH - 248, ui_start_y + 22, 
-                          self.game_state['right_gage'] - 4, 16))  # Filled
+                          self.sim.gauges['right'] - 4, 16))  # Filled
         
         # 3. Draw character selection info with preloaded images
         y_offset = ui_start_y + 80
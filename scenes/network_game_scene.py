@@ -5,7 +5,10 @@ import os
 import logging
 from typing import Dict, List, Any, Optional
 from .base_scene import Scene
-from character import Character, load_character_info
+from character import Character
+from character_registry import get_registry
+from simulation.lane import LaneIndex
+from simulation.rng import RandomStream
 from castle import Castle
 from network_manager import NetworkManager, NetworkMessage
 from serialization import GameStateSerializer
@@ -75,9 +78,14 @@ class NetworkGameScene(Scene):
         self.error_timer = 0
         
         # Load character info
-        self.CHARACTER_INFO = load_character_info()
-        self.CHARACTER_TYPES = list(self.CHARACTER_INFO.keys())
+        registry = get_registry()
+        registry.refresh()
+        self.CHARACTER_STATS = registry.stats
+        self.CHARACTER_TYPES = list(registry.types)
         
+        # Seeded stream shared by this match's characters
+        self.rng = RandomStream()
+
         # Initialize game state
         self.game_state = self.initialize_game_state()
 
@@ -152,21 +160,36 @@ class NetworkGameScene(Scene):
         logging.debug(f"Client gage updated: {self.game_state['right_gage']}")
                                             
         # Update characters
-        characters_to_remove = []
-        for character in self.game_state['characters']:
+        self.update_characters(dt)
+
+    def update_characters(self, dt):
+        """Update every character against a lane index of its live enemies"""
+        characters = self.game_state['characters']
+        max_width = max((c.get_box()[2] for c in characters), default=0)
+        lanes = {
+            team: LaneIndex(((c.x, c) for c in characters if c.team == team and not c.is_dead), max_width)
+            for team in ('left', 'right')
+        }
+
+        dead_indices = []
+        for i, character in enumerate(characters):
             if character.is_dead:
-                characters_to_remove.append(character)
+                dead_indices.append(i)
                 continue
                 
-            enemies = [c for c in self.game_state['characters'] 
-                      if c.team != character.team and not c.is_dead]
-            enemy_castle = self.game_state['right_castle'] if character.team == 'left' else self.game_state['left_castle']
+            enemy_team = 'right' if character.team == 'left' else 'left'
+            enemy_castle = self.game_state[f'{enemy_team}_castle']
             
-            character.update(enemies, enemy_castle, dt, self.game_state['elapsed_time'])
-        
-        # Remove dead characters
-        for char in characters_to_remove:
-            self.game_state['characters'].remove(char)
+            old_x = character.x
+            character.update(lanes[enemy_team], enemy_castle, dt, self.game_state['elapsed_time'])
+            # Keep the index current for characters updated later in this pass
+            lanes[character.team].move(old_x, character.x, character)
+        
+        # Remove dead characters by swapping the last one into their slot
+        for i in reversed(dead_indices):
+            char = characters[i]
+            characters[i] = characters[-1]
+            characters.pop()
             logging.info(f"Removed dead character: {char.character_type} from {char.team}")
 
     def update_host(self, dt):
@@ -188,22 +211,7 @@ class NetworkGameScene(Scene):
         logging.debug(f"Host gages updated: Left - {self.game_state['left_gage']}, Right - {self.game_state['right_gage']}")
         
         # Update characters
-        characters_to_remove = []
-        for character in self.game_state['characters']:
-            if character.is_dead:
-                characters_to_remove.append(character)
-                continue
-                
-            enemies = [c for c in self.game_state['characters'] 
-                      if c.team != character.team and not c.is_dead]
-            enemy_castle = self.game_state['right_castle'] if character.team == 'left' else self.game_state['left_castle']
-            
-            character.update(enemies, enemy_castle, dt, self.game_state['elapsed_time'])
-        
-        # Remove dead characters
-        for char in characters_to_remove:
-            self.game_state['characters'].remove(char)
-            logging.info(f"Removed dead character: {char.character_type} from {char.team}")
+        self.update_characters(dt)
         
         # Check win conditions
         if (self.game_state['left_castle'].is_destroyed() or 
@@ -463,7 +471,9 @@ class NetworkGameScene(Scene):
                 x=x, y=y,
                 team=team,
                 character_type=character_type,
-                time_scale=1
+                time_scale=1,
+                stats=self.CHARACTER_STATS[character_type],
+                rng=self.rng
             )
             
             self.game_state['characters'].append(character)
@@ -4,6 +4,7 @@ import pickle
 import zlib
 from typing import Dict, List, Any, Optional
 from character import Character
+from character_registry import get_character_stats
 from castle import Castle
 import msgpack
 
@@ -37,7 +38,8 @@ class GameStateSerializer:
             y=data['y'],
             team=data['team'],
             character_type=data['character_type'],
-            time_scale=data.get('time_scale', 1.0)
+            time_scale=data.get('time_scale', 1.0),
+            stats=get_character_stats(data['character_type'])
         )
         
         # Update state
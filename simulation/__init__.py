@@ -0,0 +1,28 @@
+from .engine import Simulation, SimConfig, SimCastle, TEAMS, TEAM_INDEX, CASTLE_SIZE
+from .battlefield import Battlefield
+from .clock import FixedStepClock
+from .events import EventQueue
+from .lane import LaneIndex
+from .rng import RandomStream
+from .animation import AnimationCatalog, AnimationTable, get_animation_catalog, get_animation_table
+from .sprite_meta import character_frame_sizes, load_sprite_frame_sizes
+
+__all__ = [
+    'Simulation',
+    'SimConfig',
+    'SimCastle',
+    'Battlefield',
+    'FixedStepClock',
+    'EventQueue',
+    'LaneIndex',
+    'RandomStream',
+    'AnimationCatalog',
+    'get_animation_catalog',
+    'AnimationTable',
+    'get_animation_table',
+    'TEAMS',
+    'TEAM_INDEX',
+    'CASTLE_SIZE',
+    'character_frame_sizes',
+    'load_sprite_frame_sizes'
+]
@@ -0,0 +1,143 @@
+# simulation/animation.py
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from .battlefield import ACTIONS, ATTACK_TYPES
+from .sprite_meta import SPRITE_ROOT, FrameSizes, character_frame_sizes
+
+TEAMS = ('left', 'right')
+
+# Same constants the pygame Character uses
+DEFAULT_HITBOX = (40, 40)
+ANIMATION_SPEED = 0.15
+
+# Sprite keys a unit can be showing; Attack_0 and friends fall back to Walk when missing
+SPRITE_SLOTS = ('Idle', 'Walk', 'Run', 'Dead') + ATTACK_TYPES
+SLOT_INDEX = {key: i for i, key in enumerate(SPRITE_SLOTS)}
+ATTACK_SLOT_OFFSET = SLOT_INDEX[ATTACK_TYPES[0]]
+
+# Sprite slot shown for each action id; Attack and Skill use ATTACK_SLOT_OFFSET + attack type
+ACTION_SLOTS = tuple(SLOT_INDEX.get(name, SLOT_INDEX['Walk']) for name in ACTIONS)
+
+NO_FRAMES = 0  # Animation id of units without sprites
+
+
+@dataclass(frozen=True)
+class AnimationTable:
+    """
+    Animation timing of one (character_type, team), indexed by sprite slot.
+
+    Built once from the sprite files; units only hold integer slot and
+    attack ids into it.
+    """
+    character_type: str
+    team: str
+    sprite_keys: Tuple[str, ...]         # Sprite key actually drawn, '' when there are no frames
+    frame_counts: Tuple[int, ...]
+    frame_durations: Tuple[float, ...]
+    widths: Tuple[Tuple[int, ...], ...]  # Hitbox size of every frame
+    heights: Tuple[Tuple[int, ...], ...]
+    damage_frames: Tuple[int, ...]       # Indexed by attack type id
+    initial_slot: int
+    has_frames: bool
+
+    def hitbox_size(self, slot: int, frame: int) -> Tuple[int, int]:
+        if not self.frame_counts[slot]:
+            return DEFAULT_HITBOX
+        return self.widths[slot][frame], self.heights[slot][frame]
+
+
+def build_animation_table(character_type: str, team: str, frames: FrameSizes) -> AnimationTable:
+    """Resolve fallbacks and timings for every slot from a {sprite_key: frame sizes} mapping"""
+    keys = []
+    for key in SPRITE_SLOTS:
+        if frames.get(key):
+            keys.append(key)
+        else:
+            keys.append('Walk' if frames.get('Walk') else '')
+
+    sizes = [frames.get(key, ()) if key else () for key in keys]
+    return AnimationTable(
+        character_type=character_type,
+        team=team,
+        sprite_keys=tuple(keys),
+        frame_counts=tuple(len(frame_sizes) for frame_sizes in sizes),
+        frame_durations=tuple(ANIMATION_SPEED for _ in keys),
+        widths=tuple(tuple(width for width, _ in frame_sizes) for frame_sizes in sizes),
+        heights=tuple(tuple(height for _, height in frame_sizes) for frame_sizes in sizes),
+        damage_frames=tuple(len(frames.get(key, ())) // 2 for key in ATTACK_TYPES),
+        initial_slot=SLOT_INDEX['Idle'] if 'Idle' in frames else SLOT_INDEX['Walk'],
+        has_frames=bool(frames),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_animation_table(character_type: str, team: str, root: str = SPRITE_ROOT) -> AnimationTable:
+    """Shared table for one character type and team; sprite headers are read once per process"""
+    return build_animation_table(character_type, team, character_frame_sizes(character_type, team, root))
+
+
+class AnimationCatalog:
+    """
+    The animation tables of several character types flattened into arrays,
+    with one integer id per distinct (character_type, team, sprite_key) so
+    that unit state can be stored in NumPy arrays.
+
+    A kind is one (character_type, team) pair, numbered type_id * len(TEAMS) + team_id.
+    """
+
+    def __init__(self, character_types: Tuple[str, ...], root: str = SPRITE_ROOT):
+        self.character_types = tuple(character_types)
+        self.tables: List[AnimationTable] = []
+        self.keys: List[Tuple[str, str, str]] = [('', '', '')]
+        counts = [0]
+        durations = [ANIMATION_SPEED]
+        sizes: List[Tuple[Tuple[int, int], ...]] = [(DEFAULT_HITBOX,)]
+        kind_anims = []
+
+        for character_type in self.character_types:
+            for team in TEAMS:
+                table = get_animation_table(character_type, team, root)
+                self.tables.append(table)
+                ids = {'': NO_FRAMES}
+                for slot, key in enumerate(table.sprite_keys):
+                    if key not in ids:
+                        ids[key] = len(self.keys)
+                        self.keys.append((character_type, team, key))
+                        counts.append(table.frame_counts[slot])
+                        durations.append(table.frame_durations[slot])
+                        sizes.append(tuple(zip(table.widths[slot], table.heights[slot])))
+                kind_anims.append([ids[key] for key in table.sprite_keys])
+
+        max_frames = max(counts)
+        self.frame_counts = np.array(counts, dtype=np.int32)
+        self.frame_durations = np.array(durations, dtype=np.float64)
+        self.widths = np.full((len(self.keys), max_frames), DEFAULT_HITBOX[0], dtype=np.int32)
+        self.heights = np.full((len(self.keys), max_frames), DEFAULT_HITBOX[1], dtype=np.int32)
+        for anim, frame_sizes in enumerate(sizes):
+            for frame, (width, height) in enumerate(frame_sizes):
+                self.widths[anim, frame] = width
+                self.heights[anim, frame] = height
+        self.max_width = int(self.widths.max())
+
+        self.kind_anims = np.array(kind_anims, dtype=np.int32)
+        self.damage_frames = np.array([table.damage_frames for table in self.tables], dtype=np.int32)
+        self.has_frames = np.array([table.has_frames for table in self.tables], dtype=np.bool_)
+        self.initial_slots = np.array([table.initial_slot for table in self.tables], dtype=np.int32)
+
+    @staticmethod
+    def kind(type_id: int, team_id: int) -> int:
+        return type_id * len(TEAMS) + team_id
+
+    def sprite_key(self, anim: int) -> str:
+        return self.keys[anim][2]
+
+
+@lru_cache(maxsize=None)
+def get_animation_catalog(character_types: Tuple[str, ...], root: str = SPRITE_ROOT) -> AnimationCatalog:
+    """Shared catalog for a set of character types"""
+    return AnimationCatalog(character_types, root)
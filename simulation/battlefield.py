@@ -0,0 +1,137 @@
+# simulation/battlefield.py
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+TEAM_LEFT = 0
+TEAM_RIGHT = 1
+
+# Action ids stored in Battlefield.action
+ACTIONS = ('Idle', 'Walk', 'Run', 'Attack', 'Skill', 'Dead')
+ACTION_IDLE, ACTION_WALK, ACTION_RUN, ACTION_ATTACK, ACTION_SKILL, ACTION_DEAD = range(len(ACTIONS))
+
+# Attack variants chosen by set_action; index stored in Battlefield.attack_type
+ATTACK_TYPES = ('Attack_0', 'Attack_1', 'skill1', 'skill2')
+NO_ATTACK = -1
+
+# Special values of Battlefield.target
+NO_TARGET = -1
+CASTLE_TARGET = -2
+STALE_TARGET = -3  # Target was a unit that has since been removed
+
+
+class Battlefield:
+    """
+    Structure-of-arrays storage for every unit in one battle.
+
+    Live units occupy rows [0, count) of each array; the arrays grow by
+    doubling. Removing a unit moves the last row into its place, so rows are
+    not stable: code that has to find a unit later keeps its uid and looks
+    the row up with row_of.
+    """
+
+    FIELDS = {
+        'x': np.float64,
+        'prev_x': np.float64,  # x before the last tick, for render interpolation
+        'y': np.float64,
+        'hp': np.float64,
+        'max_hp': np.float64,
+        'attack_range': np.float64,
+        'team': np.int8,
+        'type_id': np.int16,
+        'kind': np.int16,
+        'action': np.int8,
+        'attack_type': np.int8,
+        'anim': np.int32,
+        'sprite_index': np.int32,
+        'frame_timer': np.float64,
+        'last_attack_time': np.float64,
+        'target': np.int32,
+        'uid': np.int64,
+        'serial': np.int32,  # Bumped on every action change, to spot stale events
+        'sleeping': np.bool_,  # Waiting for a cooldown wakeup instead of deciding every tick
+        'in_progress': np.bool_,
+        'dead': np.bool_,
+    }
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.count = 0
+        self.next_uid = 0
+        self.rows: Dict[int, int] = {}  # uid -> row of every live unit
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def _grow(self) -> None:
+        new_capacity = self.capacity * 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = new_capacity
+
+    def add(self, **values) -> int:
+        """Append a unit and return its row index"""
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        for name in self.FIELDS:
+            getattr(self, name)[index] = values.get(name, 0)
+        self.uid[index] = self.next_uid
+        self.rows[self.next_uid] = index
+        self.next_uid += 1
+        self.count += 1
+        return index
+
+    def row_of(self, uid: int) -> Optional[int]:
+        """Current row of a unit, None once it was removed"""
+        return self.rows.get(uid)
+
+    def remove(self, rows: Iterable[int]) -> None:
+        """
+        Swap-delete rows: each hole is filled with the current last row, so
+        only moved rows are copied. Targets are remapped; targets that pointed
+        at removed units become STALE_TARGET.
+        """
+        holes = sorted(set(rows), reverse=True)
+        if not holes:
+            return
+
+        n = self.count
+        for hole in holes:
+            del self.rows[int(self.uid[hole])]
+
+        # Fill holes from the tail, highest hole first; moved maps position -> original row
+        moved: Dict[int, int] = {}
+        count = n
+        for hole in holes:
+            last = count - 1
+            if hole == last:
+                moved.pop(last, None)
+            else:
+                moved[hole] = moved.pop(last, last)
+            count -= 1
+        kept = count
+
+        remap = np.arange(n, dtype=np.int32)
+        remap[holes] = STALE_TARGET
+        if moved:
+            dest = np.fromiter(moved.keys(), dtype=np.intp, count=len(moved))
+            src = np.fromiter(moved.values(), dtype=np.intp, count=len(moved))
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[dest] = array[src]
+            for pos in dest.tolist():
+                self.rows[int(self.uid[pos])] = pos
+            remap[src] = dest
+
+        target = self.target[:kept]
+        unit_target = target >= 0
+        target[unit_target] = remap[target[unit_target]]
+        self.count = kept
+
+    def view(self, name: str) -> np.ndarray:
+        """Live rows of one field"""
+        return getattr(self, name)[:self.count]
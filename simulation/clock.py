@@ -0,0 +1,44 @@
+# simulation/clock.py
+
+
+class FixedStepClock:
+    """
+    Turns variable frame times into a whole number of fixed simulation steps.
+
+    The simulation only ever advances by `step` simulated seconds, so results
+    do not depend on frame rate or machine load. Frame time that is not yet a
+    whole step stays in the accumulator; `alpha` is that remainder as a
+    fraction of a step, for interpolating positions when drawing.
+
+    Headless runs do not need a clock at all: they call the simulation with
+    `step` back to back, as fast as the machine allows.
+    """
+
+    def __init__(self, step: float, max_steps: int = 8):
+        if step <= 0:
+            raise ValueError(f"Step size must be positive, got {step}")
+        self.step = step
+        self.max_steps = max_steps  # Cap per frame so a long stall does not snowball
+        self.accumulator = 0.0
+        self.steps = 0
+
+    @property
+    def time(self) -> float:
+        """Simulated time covered by the steps taken so far"""
+        return self.steps * self.step
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+    def advance(self, frame_time: float) -> int:
+        """Add real frame time and return how many steps to run now"""
+        self.accumulator += frame_time
+        due = int(self.accumulator // self.step)
+        if due > self.max_steps:
+            # Drop the backlog instead of trying to catch up
+            due = self.max_steps
+            self.accumulator = self.step * self.max_steps
+        self.accumulator -= due * self.step
+        self.steps += due
+        return due
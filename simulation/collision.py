@@ -0,0 +1,72 @@
+# simulation/collision.py
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+
+def make_box(x: float, y: float, width: float, height: float) -> Box:
+    """Integer box, truncated the same way pygame.Rect truncates floats"""
+    return (int(x), int(y), int(width), int(height))
+
+
+def boxes_overlap(a: Sequence[float], b: Sequence[float]) -> bool:
+    """Same test as pygame.Rect.colliderect; accepts tuples or Rects"""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def box_overlaps(box: Sequence[float], xs: np.ndarray, ys: np.ndarray,
+                 widths: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """boxes_overlap of one box against arrays of boxes"""
+    return ((box[0] < xs + widths) & (xs < box[0] + box[2]) &
+            (box[1] < ys + heights) & (ys < box[1] + box[3]))
+
+
+def sweep_overlaps(lo: np.ndarray, hi: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    For every span [lo, hi), whether it overlaps any interval [start, end).
+
+    Intervals are sorted by start once; a running maximum of their ends tells
+    whether any interval starting before hi reaches past lo. O((m + n) log n).
+    """
+    if starts.size == 0:
+        return np.zeros(lo.shape, dtype=np.bool_)
+    order = np.argsort(starts, kind='stable')
+    sorted_starts = starts[order]
+    reach = np.maximum.accumulate(ends[order])
+    count = np.searchsorted(sorted_starts, hi, side='left')
+    return (count > 0) & (reach[np.maximum(count - 1, 0)] > lo)
+
+
+def sweep_blocked(test_x: np.ndarray, test_y: np.ndarray, test_w: np.ndarray, test_h: np.ndarray,
+                  xs: np.ndarray, ys: np.ndarray, widths: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """
+    Batched broad phase: for every test box, whether it overlaps any obstacle box.
+
+    The lane is one-dimensional, so obstacles are grouped by their vertical
+    band (y, height) - normally a single ground line - and each group is
+    resolved with one interval sweep along x.
+    """
+    blocked = np.zeros(test_x.shape, dtype=np.bool_)
+    if xs.size == 0 or test_x.size == 0:
+        return blocked
+
+    top, bottom = ys.min(), (ys + heights).max()
+    if top == ys.max() and bottom == (ys + heights).min():
+        # Everything on one ground line: a single sweep
+        vertical = (test_y < bottom) & (top < test_y + test_h)
+        blocked[vertical] = sweep_overlaps(test_x[vertical], test_x[vertical] + test_w[vertical],
+                                           xs, xs + widths)
+        return blocked
+
+    bands, band_of = np.unique(np.stack([ys, heights]), axis=1, return_inverse=True)
+    band_of = band_of.reshape(-1)
+    for band, (band_y, band_h) in enumerate(bands.T):
+        rows = band_of == band
+        vertical = (test_y < band_y + band_h) & (band_y < test_y + test_h) & ~blocked
+        if vertical.any():
+            blocked[vertical] = sweep_overlaps(test_x[vertical], test_x[vertical] + test_w[vertical],
+                                               xs[rows], xs[rows] + widths[rows])
+    return blocked
@@ -0,0 +1,599 @@
+# simulation/engine.py
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from character_registry import get_registry
+from .animation import ACTION_SLOTS, ATTACK_SLOT_OFFSET, DEFAULT_HITBOX, SLOT_INDEX, TEAMS, get_animation_catalog
+from .battlefield import (ACTION_ATTACK, ACTION_IDLE, ACTION_RUN, ACTION_SKILL, ACTION_WALK,
+                          ATTACK_TYPES, CASTLE_TARGET, NO_ATTACK, NO_TARGET, TEAM_LEFT,
+                          Battlefield)
+from .collision import Box, box_overlaps, boxes_overlap, make_box, sweep_blocked
+from .events import EventQueue
+from .lane import LaneIndex
+from .rng import RandomStream, Seed
+from .sprite_meta import character_frame_sizes
+
+TEAM_INDEX = {team: i for i, team in enumerate(TEAMS)}
+
+# One recorded spawn or purchase call: (clock_steps, unit_steps, method, team, character_type, x, y)
+InputRecord = Tuple[int, int, str, str, str, float, float]
+
+# Same constants the pygame Character uses
+WALK_SPEED = 100
+RUN_SPEED = 200
+DAMAGE_COOLDOWN = 0.5
+
+ACTION_SLOT_IDS = np.array(ACTION_SLOTS, dtype=np.int32)
+FIRST_SKILL = ATTACK_TYPES.index('skill1')
+
+# Skills that hit every enemy inside the attack box
+AOE_SKILLS = {'Fire_vizard': frozenset({'skill2'})}
+
+CASTLE_SIZE = int(100 * 1.2)  # Castle base size times its default scale
+
+
+@dataclass
+class SimConfig:
+    SCREEN_WIDTH: int = 1440
+    MAX_CHARACTERS: int = 50
+    SPAWN_COST: int = 20
+    MAX_GAGE: float = 200
+    TIME_LIMIT: float = 180
+    GAGE_INCREMENT: float = 4
+    GAGE_INTERVAL: float = 1.0  # Seconds between gage ticks, 0 = continuous regeneration
+    ATTACK_COOLDOWN: float = DAMAGE_COOLDOWN  # Simulated seconds between attacks started by choice
+    # Training rules: a unit whose target is in range acts again during its attack cooldown
+    # instead of waiting it out, as train_agent's original update loop made it do
+    ATTACK_DURING_COOLDOWN: bool = False
+
+
+class SimCastle:
+    """Castle state without images"""
+
+    def __init__(self, x: float, y: float, team: str, hp: float = 1000,
+                 width: int = CASTLE_SIZE, height: int = CASTLE_SIZE):
+        self.x = x
+        self.y = y
+        self.team = team.lower()
+        self.hp = hp
+        self.max_hp = hp
+        self.width = width
+        self.height = height
+
+    def hitbox(self) -> Box:
+        return make_box(self.x, self.y, self.width, self.height)
+
+    def center(self) -> Tuple[float, float]:
+        x, y, width, height = self.hitbox()
+        return (x + width / 2, y + height / 2)
+
+    def take_damage(self, amount: float) -> None:
+        self.hp -= amount
+        if self.hp < 0:
+            self.hp = 0
+
+    def is_destroyed(self) -> bool:
+        return self.hp <= 0
+
+
+
+
+class Simulation:
+    """
+    Headless battle between two castles.
+
+    Implements the rules of Character.update, Castle.take_damage and the
+    gage/game-over handling of the training environment without pygame.
+    Unit state lives in a Battlefield and each tick runs as batched phases:
+    removals, animation, decisions for idle units, movement, then attacks.
+    Attack impacts, cooldown wakeups and removals of dead units are scheduled
+    on event queues keyed by step when they become known, so no phase polls
+    sprite indices or death flags. Steps are assumed to be of fixed size.
+
+    All randomness comes from the simulation's own seeded streams: rng for
+    unit decisions and opponent_rng for scripted spawns. Spawn and purchase
+    calls are logged, so replay() can rebuild a run from its seed and inputs.
+    """
+
+    def __init__(self, config: Optional[SimConfig] = None,
+                 left_castle: Optional[SimCastle] = None,
+                 right_castle: Optional[SimCastle] = None,
+                 seed: Seed = None):
+        self.config = config or SimConfig()
+        self.castles: Dict[str, SimCastle] = {
+            'left': left_castle or SimCastle(x=0, y=0, team='left'),
+            'right': right_castle or SimCastle(x=self.config.SCREEN_WIDTH - CASTLE_SIZE, y=0, team='right'),
+        }
+        self._initial_castles = {
+            team: (castle.x, castle.y, castle.team, castle.max_hp, castle.width, castle.height)
+            for team, castle in self.castles.items()
+        }
+
+        # Seeded per-simulation random streams
+        self._root_rng = RandomStream(seed)
+        self.rng, self.opponent_rng = self._root_rng.spawn(2)
+        self.clock_steps = 0
+        self.unit_steps = 0
+        self.input_log: List[InputRecord] = []
+
+        self.registry = get_registry()
+        self.character_types: Tuple[str, ...] = self.registry.types
+        self.type_index = {name: i for i, name in enumerate(self.character_types)}
+        self.animations = get_animation_catalog(self.character_types)
+        self.battlefield = Battlefield(capacity=max(self.config.MAX_CHARACTERS, 1))
+        # Rows of each team sorted by x, indexed by team id
+        self.lanes = tuple(LaneIndex(max_width=self.animations.max_width) for _ in TEAMS)
+        self.gauges: Dict[str, float] = {team: 0 for team in TEAMS}
+        self.elapsed_time = 0.0
+        self.gage_timer = 0.0
+        self.winner: Optional[str] = None
+
+        # Damage and splash flag of every (type, attack type) pair
+        self.attack_damage = np.zeros((len(self.character_types), len(ATTACK_TYPES)))
+        self.attack_is_aoe = np.zeros((len(self.character_types), len(ATTACK_TYPES)), dtype=np.bool_)
+        for type_id, name in enumerate(self.character_types):
+            stats = self.registry.get(name)
+            aoe_skills = AOE_SKILLS.get(name, frozenset())
+            for attack_id, attack_type in enumerate(ATTACK_TYPES):
+                self.attack_damage[type_id, attack_id] = stats.skills.get(attack_type, stats.attack_damage)
+                self.attack_is_aoe[type_id, attack_id] = attack_type in aoe_skills
+
+        # Running per-team totals, kept current on spawn, damage, death and removal
+        self.unit_counts = np.zeros(len(TEAMS), dtype=np.int64)  # Rows, including dead units not yet removed
+        self.alive_counts = np.zeros(len(TEAMS), dtype=np.int64)
+        self.type_counts = np.zeros((len(TEAMS), len(self.character_types)), dtype=np.int64)
+        self.hp_ratio_sums = np.zeros(len(TEAMS))
+
+        # Scheduled unit events
+        self.impacts = EventQueue()
+        self.wakeups = EventQueue()
+        self.removals = EventQueue()
+        self._step_size = 0.0
+        self._frame_steps = np.ones(len(self.animations.frame_durations), dtype=np.int64)
+
+    @property
+    def seed(self) -> np.random.SeedSequence:
+        """Seed of this run; a new Simulation given it draws the same random numbers"""
+        return self._root_rng.seed
+
+    @property
+    def left_castle(self) -> SimCastle:
+        return self.castles['left']
+
+    @property
+    def right_castle(self) -> SimCastle:
+        return self.castles['right']
+
+    def team_count(self, team: str) -> int:
+        return int(self.unit_counts[TEAM_INDEX[team]])
+
+    def mean_hp_ratios(self) -> np.ndarray:
+        """Mean hp / max_hp of each team's living units, 0 for a team without any; indexed by team id"""
+        return np.divide(self.hp_ratio_sums, self.alive_counts,
+                         out=np.zeros(len(TEAMS)), where=self.alive_counts > 0)
+
+    def unit_size(self, character_type: str, team: str) -> Tuple[int, int]:
+        """Size of a freshly spawned unit, used to place it on the ground"""
+        frames = character_frame_sizes(character_type, team)
+        for action in ('Idle', 'Walk'):
+            if frames.get(action):
+                return frames[action][0]
+        return DEFAULT_HITBOX
+
+    def spawn(self, team: str, character_type: str, x: float, y: float) -> Optional[int]:
+        """Add a unit if the team is below its character limit. Returns its row index."""
+        self._log_input('spawn', team, character_type, x, y)
+        return self._add_unit(team, character_type, x, y)
+
+    def purchase(self, team: str, character_type: str, x: float, y: float) -> Optional[int]:
+        """Spawn a unit paid for with the team's gage"""
+        self._log_input('purchase', team, character_type, x, y)
+        if self.gauges[team] < self.config.SPAWN_COST:
+            return None
+        index = self._add_unit(team, character_type, x, y)
+        if index is not None:
+            self.gauges[team] -= self.config.SPAWN_COST
+        return index
+
+    def _log_input(self, method: str, team: str, character_type: str, x: float, y: float) -> None:
+        self.input_log.append((self.clock_steps, self.unit_steps, method, team, character_type, x, y))
+
+    def _add_unit(self, team: str, character_type: str, x: float, y: float) -> Optional[int]:
+        if team not in TEAMS:
+            raise ValueError(f"Invalid team: {team}")
+        if self.team_count(team) >= self.config.MAX_CHARACTERS // 2:
+            return None
+
+        stats = self.registry.get(character_type)
+        type_id = self.type_index[character_type]
+        team_id = TEAM_INDEX[team]
+        kind = self.animations.kind(type_id, team_id)
+        slot = self.animations.initial_slots[kind]
+        self.unit_counts[team_id] += 1
+        if stats.hp > 0:
+            self.alive_counts[team_id] += 1
+            self.type_counts[team_id, type_id] += 1
+            self.hp_ratio_sums[team_id] += 1.0
+        return self.battlefield.add(
+            x=x, prev_x=x, y=y, hp=stats.hp, max_hp=stats.hp, attack_range=stats.attack_range,
+            team=team_id, type_id=type_id, kind=kind,
+            action=ACTION_IDLE if slot == SLOT_INDEX['Idle'] else ACTION_WALK,
+            attack_type=NO_ATTACK, anim=self.animations.kind_anims[kind, slot],
+            target=NO_TARGET,
+        )
+
+    def update_clock(self, delta_time: float) -> bool:
+        """Advance game time and gages. Returns True when a gage tick happened."""
+        config = self.config
+        self.clock_steps += 1
+        self.elapsed_time += delta_time
+
+        if config.GAGE_INTERVAL <= 0:
+            for team in TEAMS:
+                self.gauges[team] = min(self.gauges[team] + config.GAGE_INCREMENT * delta_time,
+                                        config.MAX_GAGE)
+            return True
+
+        self.gage_timer += delta_time
+        if self.gage_timer < config.GAGE_INTERVAL:
+            return False
+        self.gage_timer -= config.GAGE_INTERVAL
+        for team in TEAMS:
+            self.gauges[team] = min(self.gauges[team] + config.GAGE_INCREMENT, config.MAX_GAGE)
+        return True
+
+    # -----------------------------
+    # Per-tick phases
+    # -----------------------------
+
+    def update_units(self, delta_time: float) -> None:
+        """Advance every unit by one tick"""
+        self.unit_steps += 1
+        if delta_time != self._step_size:
+            self._set_step_size(delta_time)
+        bf = self.battlefield
+        removed = self.removals.pop_due(self.unit_steps)
+        if removed:
+            rows = np.array([bf.rows[uid] for uid, _ in removed], dtype=np.intp)
+            self.unit_counts -= np.bincount(bf.team[rows], minlength=len(TEAMS))
+            bf.remove(rows.tolist())
+        if bf.count == 0:
+            return
+
+        bf.view('prev_x')[:] = bf.view('x')
+        self._advance_animations(delta_time)
+        self._rebuild_lanes()
+        self._decide()
+        self._move(delta_time)
+        self._resolve_attacks()
+
+    def _set_step_size(self, delta_time: float) -> None:
+        """Count how many steps each animation frame lasts, adding time the way _advance_animations does"""
+        steps = []
+        for duration in self.animations.frame_durations.tolist():
+            timer, count = 0.0, 0
+            while True:
+                timer += delta_time
+                count += 1
+                if timer >= duration or delta_time <= 0:
+                    break
+            steps.append(count)
+        self._frame_steps = np.array(steps, dtype=np.int64)
+        self._step_size = delta_time
+
+    def _rebuild_lanes(self) -> None:
+        x = self.battlefield.view('x').tolist()
+        team = self.battlefield.view('team').tolist()
+        for team_id, lane in enumerate(self.lanes):
+            lane.rebuild((x[i], i) for i in range(len(x)) if team[i] == team_id)
+
+    def unit_boxes(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Integer hitboxes (x, y, width, height) of all units"""
+        bf = self.battlefield
+        anim = bf.view('anim')
+        frame = bf.view('sprite_index')
+        return (np.trunc(bf.view('x')), np.trunc(bf.view('y')),
+                self.animations.widths[anim, frame], self.animations.heights[anim, frame])
+
+    def _advance_animations(self, delta_time: float) -> None:
+        bf = self.battlefield
+        anim = bf.view('anim')
+        counts = self.animations.frame_counts[anim]
+        animated = counts > 0
+        in_progress = bf.view('in_progress')
+        in_progress &= animated
+
+        timer = bf.view('frame_timer')
+        np.add(timer, delta_time, out=timer, where=animated)
+        advance = animated & (timer >= self.animations.frame_durations[anim])
+        timer[advance] = 0.0
+
+        frame = bf.view('sprite_index')
+        next_frame = np.where(advance, (frame + 1) % np.maximum(counts, 1), frame)
+        finished = advance & (next_frame == 0)
+        in_progress[finished] = False
+
+        action = bf.view('action')
+        attack_done = finished & ((action == ACTION_ATTACK) | (action == ACTION_SKILL))
+        bf.view('attack_type')[attack_done] = NO_ATTACK
+        frame[:] = next_frame
+
+    def _set_actions(self, indices: np.ndarray, actions: np.ndarray, attack_types: np.ndarray) -> None:
+        """
+        Start a new action for several units at once, like Character.set_action.
+
+        attack_types holds the drawn Attack_n/skill_n id for Attack and Skill,
+        NO_ATTACK otherwise.
+        """
+        bf = self.battlefield
+        bf.action[indices] = actions
+        bf.frame_timer[indices] = 0.0
+        bf.in_progress[indices] = True
+
+        # Units without sprites keep their animation and attack state
+        framed = self.animations.has_frames[bf.kind[indices]]
+        indices, actions, attack_types = indices[framed], actions[framed], attack_types[framed]
+        slots = np.where(attack_types != NO_ATTACK, ATTACK_SLOT_OFFSET + attack_types, ACTION_SLOT_IDS[actions])
+        bf.attack_type[indices] = attack_types
+        bf.anim[indices] = self.animations.kind_anims[bf.kind[indices], slots]
+        bf.sprite_index[indices] = 0
+        bf.serial[indices] += 1
+
+        # The damage frame is reached after a known number of whole frames
+        attacking = attack_types != NO_ATTACK
+        if attacking.any():
+            indices, attack_types = indices[attacking], attack_types[attacking]
+            kinds = bf.kind[indices]
+            frames = self.animations.damage_frames[kinds, attack_types]
+            due = self.unit_steps + frames * self._frame_steps[bf.anim[indices]]
+            for step, uid, serial in zip(due.tolist(), bf.uid[indices].tolist(), bf.serial[indices].tolist()):
+                self.impacts.push(step, uid, serial)
+
+    def _set_idle(self, indices: np.ndarray) -> None:
+        self._set_actions(indices, np.full(len(indices), ACTION_IDLE), np.full(len(indices), NO_ATTACK))
+
+    def _decide(self) -> None:
+        """Pick a target and next action for every unit whose animation finished"""
+        bf = self.battlefield
+        for uid, _ in self.wakeups.pop_due(self.unit_steps):
+            row = bf.row_of(uid)
+            if row is not None:
+                bf.sleeping[row] = False
+
+        deciding = np.flatnonzero(~bf.view('in_progress') & ~bf.view('sleeping'))
+        if deciding.size == 0:
+            return
+
+        now = self.elapsed_time
+        xs, ys, widths, heights = self.unit_boxes()
+        center_x = (xs + widths / 2).tolist()
+        center_y = (ys + heights / 2).tolist()
+        x = bf.view('x').tolist()
+        team = bf.view('team').tolist()
+        attack_range = bf.view('attack_range').tolist()
+        last_attack_time = bf.view('last_attack_time').tolist()
+
+        # Two pre-drawn uniforms per deciding unit: action choice, then attack variant
+        draws = self.rng.uniforms(2 * deciding.size).tolist()
+
+        changing = []
+        actions = []
+        attack_types = []
+        for n, i in enumerate(deciding.tolist()):
+            left = team[i] == TEAM_LEFT
+            own_x, own_y = center_x[i], center_y[i]
+
+            def distance(j):
+                return ((center_x[j] - own_x) ** 2 + (center_y[j] - own_y) ** 2) ** 0.5
+
+            closest_target, closest_dist = self.lanes[1 - team[i]].nearest_ahead(x[i], left, distance)
+            if closest_target is None:
+                closest_target = NO_TARGET
+
+            # The enemy castle only wins when strictly closer
+            castle = self.castles['right' if left else 'left']
+            if not castle.is_destroyed() and ((castle.x > x[i]) if left else (castle.x < x[i])):
+                castle_x, castle_y = castle.center()
+                dist = ((castle_x - own_x) ** 2 + (castle_y - own_y) ** 2) ** 0.5
+                if dist < closest_dist:
+                    closest_dist = dist
+                    closest_target = CASTLE_TARGET
+
+            choice, variant = draws[2 * n], int(draws[2 * n + 1] * 2)
+            if closest_target != NO_TARGET:
+                bf.target[i] = closest_target
+                if closest_dist <= attack_range[i]:
+                    cooling_down = now - last_attack_time[i] < self.config.ATTACK_COOLDOWN
+                    if cooling_down and not self.config.ATTACK_DURING_COOLDOWN:
+                        # Sleep until the cooldown runs out instead of re-deciding every tick
+                        remaining = self.config.ATTACK_COOLDOWN - (now - last_attack_time[i])
+                        bf.sleeping[i] = True
+                        self.wakeups.push(self.unit_steps + max(1, math.ceil(remaining / self._step_size)),
+                                          int(bf.uid[i]))
+                        continue
+                    if cooling_down:
+                        # The training override attacked 60% of the time without restarting the
+                        # cooldown; its skill picks were not valid action names and fell back to Walk
+                        if choice < 0.6:
+                            action, attack_type = ACTION_ATTACK, variant
+                        else:
+                            action, attack_type = ACTION_WALK, NO_ATTACK
+                    else:
+                        bf.last_attack_time[i] = now
+                        if choice < 0.3:
+                            action, attack_type = ACTION_SKILL, FIRST_SKILL + variant
+                        else:
+                            action, attack_type = ACTION_ATTACK, variant
+                else:
+                    action = ACTION_WALK if choice < 0.8 else ACTION_RUN
+                    attack_type = NO_ATTACK
+            else:
+                action, attack_type = ACTION_WALK, NO_ATTACK
+            changing.append(i)
+            actions.append(action)
+            attack_types.append(attack_type)
+
+        if changing:
+            self._set_actions(np.array(changing), np.array(actions, dtype=np.int8),
+                              np.array(attack_types, dtype=np.int8))
+
+    def _move(self, delta_time: float) -> None:
+        """Move walking and running units at once; blocked ones stop and go idle"""
+        bf = self.battlefield
+        action = bf.view('action')
+        moving = np.flatnonzero((action == ACTION_WALK) | (action == ACTION_RUN))
+        if moving.size == 0:
+            return
+
+        xs, ys, widths, heights = self.unit_boxes()
+        team = bf.view('team')
+        mover_team = team[moving]
+        direction = np.where(mover_team == TEAM_LEFT, 1, -1)
+        speed = np.where(action[moving] == ACTION_RUN, RUN_SPEED, WALK_SPEED)
+        new_x = bf.x[moving] + direction * speed * delta_time
+        new_x = np.maximum(0, np.minimum(new_x, self.config.SCREEN_WIDTH - widths[moving]))
+
+        test_x = np.trunc(new_x)
+        test_y = ys[moving]
+        test_w = widths[moving]
+        test_h = heights[moving]
+
+        # One interval sweep per team against enemy units, then the enemy castle
+        blocked = np.zeros(moving.size, dtype=np.bool_)
+        for team_id, castle_team in enumerate(('right', 'left')):
+            ours = np.flatnonzero(mover_team == team_id)
+            if ours.size == 0:
+                continue
+            enemy = (team != team_id) & ~bf.view('dead')
+            blocked[ours] = sweep_blocked(test_x[ours], test_y[ours], test_w[ours], test_h[ours],
+                                          xs[enemy], ys[enemy], widths[enemy], heights[enemy])
+            castle = self.castles[castle_team]
+            if not castle.is_destroyed():
+                blocked[ours] |= box_overlaps(castle.hitbox(), test_x[ours], test_y[ours], test_w[ours], test_h[ours])
+
+        bf.x[moving[~blocked]] = new_x[~blocked]
+        if blocked.any():
+            self._set_idle(moving[blocked])
+
+    def _resolve_attacks(self) -> None:
+        """Apply damage for every attack whose impact is due this step"""
+        bf = self.battlefield
+        ready = []
+        for uid, serial in self.impacts.pop_due(self.unit_steps):
+            row = bf.row_of(uid)
+            # Skip attackers that died or changed action since the attack started
+            if row is not None and bf.serial[row] == serial and not bf.dead[row]:
+                ready.append(row)
+        if not ready:
+            return
+
+        self._rebuild_lanes()
+        boxes = self.unit_boxes()
+        for i in sorted(ready):
+            # Units killed earlier in this phase do not get to strike
+            if bf.dead[i]:
+                continue
+            self._apply_damage(i, boxes)
+
+    def _damage_units(self, indices: np.ndarray, amount: float, boxes) -> None:
+        bf = self.battlefield
+        old_hp = bf.hp[indices]
+        bf.hp[indices] = np.maximum(0, old_hp - amount)
+        teams = bf.team[indices]
+        self.hp_ratio_sums -= np.bincount(teams, weights=(old_hp - bf.hp[indices]) / bf.max_hp[indices],
+                                          minlength=len(TEAMS))
+        # Taking damage interrupts walking
+        walking = indices[bf.action[indices] == ACTION_WALK]
+        if walking.size:
+            self._set_idle(walking)
+            boxes[2][walking] = self.animations.widths[bf.anim[walking], 0]
+            boxes[3][walking] = self.animations.heights[bf.anim[walking], 0]
+        killed = indices[(bf.hp[indices] <= 0) & ~bf.dead[indices]]
+        if killed.size:
+            bf.dead[killed] = True
+            killed_teams = bf.team[killed]
+            self.alive_counts -= np.bincount(killed_teams, minlength=len(TEAMS))
+            np.subtract.at(self.type_counts, (killed_teams, bf.type_id[killed]), 1)
+            # Start a wiped-out team from an exact zero so rounding never builds up
+            self.hp_ratio_sums[self.alive_counts == 0] = 0.0
+            for uid in bf.uid[killed].tolist():
+                self.removals.push(self.unit_steps + 1, uid)
+
+    def _apply_damage(self, index: int, boxes) -> None:
+        bf = self.battlefield
+        target = bf.target[index]
+        if target == NO_TARGET:
+            return
+
+        type_id = bf.type_id[index]
+        attack_id = bf.attack_type[index]
+        damage = self.attack_damage[type_id, attack_id]
+        left = bf.team[index] == TEAM_LEFT
+        enemy_castle = self.castles['right' if left else 'left']
+
+        xs, ys, widths, heights = boxes
+        center_x = xs[index] + widths[index] / 2
+        center_y = ys[index] + heights[index] / 2
+        reach = bf.attack_range[index]
+        box = make_box(center_x if left else center_x - reach, center_y - reach, reach, reach * 2)
+
+        if self.attack_is_aoe[type_id, attack_id]:
+            nearby = np.array(self.lanes[1 - bf.team[index]].overlapping(box[0], box[0] + box[2]), dtype=np.intp)
+            hit = nearby[~bf.dead[nearby] & box_overlaps(box, xs[nearby], ys[nearby], widths[nearby], heights[nearby])]
+            if hit.size:
+                self._damage_units(hit, damage, boxes)
+            if boxes_overlap(box, enemy_castle.hitbox()):
+                enemy_castle.take_damage(damage)
+            return
+
+        if target == CASTLE_TARGET:
+            if boxes_overlap(box, enemy_castle.hitbox()):
+                enemy_castle.take_damage(damage)
+        elif target >= 0:
+            if boxes_overlap(box, (xs[target], ys[target], widths[target], heights[target])):
+                self._damage_units(np.array([target]), damage, boxes)
+
+    def check_game_over(self) -> Tuple[bool, Optional[str]]:
+        """Check if the game is over and determine the winner."""
+        left_castle, right_castle = self.castles['left'], self.castles['right']
+        if left_castle.is_destroyed():
+            self.winner = "Right Team Wins!"
+        elif right_castle.is_destroyed():
+            self.winner = "Left Team Wins!"
+        elif self.elapsed_time >= self.config.TIME_LIMIT:
+            if left_castle.hp > right_castle.hp:
+                self.winner = "Left Team Wins!"
+            elif right_castle.hp > left_castle.hp:
+                self.winner = "Right Team Wins!"
+            else:
+                self.winner = "Draw!"
+        return self.winner is not None, self.winner
+
+    def replay(self, delta_time: float, steps: Optional[int] = None) -> 'Simulation':
+        """
+        Rebuild this run from its seed and input log in a new Simulation.
+
+        Assumes every step was update_clock(delta_time) followed by
+        update_units(delta_time), with spawns and purchases in between.
+        """
+        castles = {team: SimCastle(*spec) for team, spec in self._initial_castles.items()}
+        sim = Simulation(self.config, castles['left'], castles['right'], seed=self.seed)
+        pending = deque(self.input_log)
+
+        def apply_inputs():
+            while pending and pending[0][:2] == (sim.clock_steps, sim.unit_steps):
+                _, _, method, team, character_type, x, y = pending.popleft()
+                getattr(sim, method)(team, character_type, x, y)
+
+        for _ in range(self.unit_steps if steps is None else steps):
+            apply_inputs()
+            sim.update_clock(delta_time)
+            apply_inputs()
+            sim.update_units(delta_time)
+        apply_inputs()
+        return sim
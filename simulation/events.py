@@ -0,0 +1,43 @@
+# simulation/events.py
+
+import heapq
+from typing import List, Tuple
+
+
+class EventQueue:
+    """
+    Min-heap of scheduled unit events keyed by simulation step.
+
+    With the fixed timestep a step number is simulated time, kept as an
+    integer so events fire on exactly the step they were scheduled for.
+    Entries carry a unit id and the unit's action serial at scheduling time;
+    the owner skips events whose unit is gone or has since changed action.
+    Events due on the same step come out in the order they were pushed.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, int, int]] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, step: int, uid: int, serial: int = 0) -> None:
+        heapq.heappush(self._heap, (step, self._sequence, uid, serial))
+        self._sequence += 1
+
+    def next_step(self) -> float:
+        """Step of the earliest event, inf when empty"""
+        return self._heap[0][0] if self._heap else float('inf')
+
+    def pop_due(self, step: int) -> List[Tuple[int, int]]:
+        """Remove and return (uid, serial) of every event due at or before step"""
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= step:
+            _, _, uid, serial = heapq.heappop(heap)
+            due.append((uid, serial))
+        return due
+
+    def clear(self) -> None:
+        self._heap.clear()
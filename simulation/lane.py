@@ -0,0 +1,112 @@
+# simulation/lane.py
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+class LaneIndex:
+    """
+    Items of one team kept sorted by x along the single battle lane.
+
+    Rebuild it once per tick with one sort, or keep it current with
+    insert/remove/move. Items with equal x keep their insertion order, so
+    scans find the earliest of several stacked units first, like a list scan.
+
+    max_width is the widest hitbox on the battlefield (either team). Range
+    queries are widened by it so every box reaching into the range is found,
+    and nearest_ahead uses it to bound center distances.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[float, Any]] = (), max_width: float = 0.0):
+        self.max_width = max_width
+        self.keys: List[float] = []
+        self.items: List[Any] = []
+        self.rebuild(entries)
+
+    def rebuild(self, entries: Iterable[Tuple[float, Any]]) -> None:
+        # sorted() is stable, so ties stay in the order they were given
+        pairs = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [key for key, _ in pairs]
+        self.items = [item for _, item in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def insert(self, x: float, item: Any) -> None:
+        i = bisect_right(self.keys, x)
+        self.keys.insert(i, x)
+        self.items.insert(i, item)
+
+    def remove(self, x: float, item: Any) -> None:
+        for i in range(bisect_left(self.keys, x), bisect_right(self.keys, x)):
+            if self.items[i] is item:
+                del self.keys[i]
+                del self.items[i]
+                return
+        raise ValueError(f"{item!r} is not indexed at x={x}")
+
+    def move(self, old_x: float, new_x: float, item: Any) -> None:
+        if old_x != new_x:
+            self.remove(old_x, item)
+            self.insert(new_x, item)
+
+    def ahead(self, x: float, forward: bool, inclusive: bool = False) -> Iterator[Tuple[float, Any]]:
+        """
+        Items ahead of x in order of increasing gap; forward means increasing x.
+        Items exactly at x are included only when inclusive is set.
+        """
+        keys, items = self.keys, self.items
+        if forward:
+            start = bisect_left(keys, x) if inclusive else bisect_right(keys, x)
+            for i in range(start, len(keys)):
+                yield keys[i], items[i]
+            return
+
+        # Walk backwards one group of equal keys at a time, each group in insertion order
+        end = bisect_right(keys, x) if inclusive else bisect_left(keys, x)
+        while end > 0:
+            start = bisect_left(keys, keys[end - 1], 0, end)
+            for i in range(start, end):
+                yield keys[i], items[i]
+            end = start
+
+    def nearest_ahead(self, x: float, forward: bool,
+                      distance: Optional[Callable[[Any], float]] = None) -> Tuple[Optional[Any], float]:
+        """
+        Closest item ahead of x. Returns (item, distance) or (None, inf).
+
+        Without a distance function the gap along the lane is used. With one,
+        the scan stops once the lane gap alone, less the hitbox slack, can no
+        longer beat the best distance found, so the answer matches a full scan
+        (the first in lane order wins ties) while only looking at nearby items. distance may
+        return inf to skip an item.
+        """
+        best_item = None
+        best_dist = float('inf')
+        slack = self.max_width / 2 + 1
+        for key, item in self.ahead(x, forward):
+            gap = abs(key - x)
+            if distance is None:
+                return item, gap
+            if gap - slack >= best_dist:
+                break
+            dist = distance(item)
+            if dist < best_dist:
+                best_item, best_dist = item, dist
+        return best_item, best_dist
+
+    def within(self, lo: float, hi: float) -> List[Any]:
+        """Items with lo <= x <= hi"""
+        return self.items[bisect_left(self.keys, lo):bisect_right(self.keys, hi)]
+
+    def in_range(self, x: float, reach: float) -> List[Any]:
+        """Items whose x is within reach of x"""
+        return self.within(x - reach, x + reach)
+
+    def any_between(self, x0: float, x1: float) -> bool:
+        """Whether any item has x0 <= x <= x1"""
+        return bisect_left(self.keys, x0) < bisect_right(self.keys, x1)
+
+    def overlapping(self, x0: float, x1: float) -> List[Any]:
+        """Candidates whose hitbox may overlap the span [x0, x1); callers test the exact boxes"""
+        return self.within(x0 - self.max_width - 1, x1 + 1)
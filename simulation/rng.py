@@ -0,0 +1,75 @@
+# simulation/rng.py
+
+from typing import List, Sequence, TypeVar, Union
+
+import numpy as np
+
+T = TypeVar('T')
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+class RandomStream:
+    """
+    Seeded source of uniform floats, drawn from NumPy in batches.
+
+    Every simulation owns one, so runs never share the global random module
+    and the same seed always gives the same draws. Draws are taken from the
+    batch in order, so the values do not depend on batch_size.
+    """
+
+    def __init__(self, seed: Seed = None, batch_size: int = 1024):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_sequence)
+        self.batch_size = batch_size
+        self._batch = np.empty(0)
+        self._position = 0
+
+    @property
+    def seed(self) -> np.random.SeedSequence:
+        """
+        Seed this stream was created from; pass it back in to repeat the stream.
+
+        A fresh copy of the seed sequence, spawn key included, so streams
+        spawned from another one repeat too, as do children spawned again
+        from the repeat.
+        """
+        sequence = self.seed_sequence
+        return np.random.SeedSequence(sequence.entropy, spawn_key=sequence.spawn_key, pool_size=sequence.pool_size)
+
+    def uniforms(self, count: int) -> np.ndarray:
+        """The next count floats in [0, 1)"""
+        available = len(self._batch) - self._position
+        if count <= available:
+            draws = self._batch[self._position:self._position + count]
+            self._position += count
+            return draws
+
+        head = self._batch[self._position:]
+        needed = count - available
+        self._batch = self.generator.random(max(self.batch_size, needed))
+        self._position = needed
+        return np.concatenate([head, self._batch[:needed]])
+
+    def random(self) -> float:
+        if self._position == len(self._batch):
+            self._batch = self.generator.random(self.batch_size)
+            self._position = 0
+        value = self._batch[self._position]
+        self._position += 1
+        return float(value)
+
+    def randint(self, a: int, b: int) -> int:
+        """Integer in [a, b], like random.randint"""
+        return a + int(self.random() * (b - a + 1))
+
+    def randrange(self, stop: int) -> int:
+        return int(self.random() * stop)
+
+    def choice(self, items: Sequence[T]) -> T:
+        return items[self.randrange(len(items))]
+
+    def spawn(self, count: int) -> List['RandomStream']:
+        """Independent child streams, e.g. one per worker or per battle"""
+        return [RandomStream(child, self.batch_size) for child in self.seed_sequence.spawn(count)]
+
@@ -0,0 +1,52 @@
+# simulation/sprite_meta.py
+
+import os
+import re
+import struct
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+SPRITE_ROOT = 'sprites'
+SPRITE_FILE_PATTERN = re.compile(r'(.+)_(left|right)_(\d+)\.png$')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+FrameSizes = Mapping[str, Tuple[Tuple[int, int], ...]]
+
+
+def read_png_size(path: str) -> Tuple[int, int]:
+    """Read width and height from a PNG header without decoding the image"""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR':
+        raise ValueError(f"Not a PNG file: {path}")
+    return struct.unpack('>II', header[16:24])
+
+
+@lru_cache(maxsize=None)
+def load_sprite_frame_sizes(folder_path: str) -> FrameSizes:
+    """
+    Same file discovery as utils.load_character_sprites, but only returns the
+    (width, height) of every frame so the simulation can run without pygame.
+    """
+    if not os.path.isdir(folder_path):
+        return MappingProxyType({})
+
+    frames = {}
+    for file_name in os.listdir(folder_path):
+        match = SPRITE_FILE_PATTERN.match(file_name)
+        if match:
+            action_name = match.group(1)
+            frame_number = int(match.group(3))
+            size = read_png_size(os.path.join(folder_path, file_name))
+            frames.setdefault(action_name, []).append((frame_number, size))
+
+    return MappingProxyType({
+        action_name: tuple(size for _, size in sorted(entries))
+        for action_name, entries in frames.items()
+    })
+
+
+def character_frame_sizes(character_type: str, team: str, root: str = SPRITE_ROOT) -> FrameSizes:
+    """Frame sizes for one character type as drawn for the given team"""
+    return load_sprite_frame_sizes(os.path.join(root, team, character_type))
@@ -0,0 +1,71 @@
+# simulation_renderer.py
+
+import pygame
+from typing import Dict, Any, List
+from castle import Castle
+from simulation import AnimationCatalog, Simulation, SimCastle
+
+GRAY = (128, 128, 128)
+
+class SimulationRenderer:
+    """
+    Thin pygame adapter that draws a headless Simulation with the loaded
+    character sprites and the regular Castle artwork.
+    """
+
+    def __init__(self, loaded_sprites: Dict[str, Dict[str, Any]]):
+        self.loaded_sprites = loaded_sprites
+        self.castle_views: Dict[str, Castle] = {}
+        self._frames_catalog = None
+        self._anim_frames: List[list] = []
+
+    def _frames_by_anim(self, catalog: AnimationCatalog) -> List[list]:
+        """Sprite list of every animation id, resolved once per catalog"""
+        if catalog is not self._frames_catalog:
+            self._anim_frames = [
+                self.loaded_sprites[character_type][team].get(sprite_key, []) if sprite_key else []
+                for character_type, team, sprite_key in catalog.keys
+            ]
+            self._frames_catalog = catalog
+        return self._anim_frames
+
+    def _castle_view(self, castle: SimCastle) -> Castle:
+        view = self.castle_views.get(castle.team)
+        if view is None:
+            view = Castle(x=castle.x, y=castle.y, team=castle.team, hp=castle.max_hp, render=True)
+            self.castle_views[castle.team] = view
+        view.x = castle.x
+        view.y = castle.y
+        view.hp = castle.hp
+        view.max_hp = castle.max_hp
+        view.update()
+        return view
+
+    def draw_castles(self, surface, sim: Simulation, camera_offset=0):
+        for castle in (sim.left_castle, sim.right_castle):
+            self._castle_view(castle).draw(surface, camera_offset)
+
+    def draw_units(self, surface, sim: Simulation, camera_offset=0, alpha=1.0):
+        """alpha blends each unit between its previous and current tick position"""
+        bf = sim.battlefield
+        anim_frames = self._frames_by_anim(sim.animations)
+        for i in range(bf.count):
+            frames = anim_frames[bf.anim[i]]
+            if not frames:
+                continue
+
+            sprite = frames[min(bf.sprite_index[i], len(frames) - 1)]
+            draw_x = bf.prev_x[i] + (bf.x[i] - bf.prev_x[i]) * alpha - camera_offset
+            draw_y = bf.y[i]
+            surface.blit(sprite, (draw_x, draw_y))
+
+            # Draw HP bar
+            if bf.hp[i] > 0:
+                bar_width = 50
+                bar_height = 5
+                hp_ratio = bf.hp[i] / bf.max_hp[i]
+                bar_x = draw_x + (sprite.get_width() - bar_width) / 2
+                bar_y = draw_y - bar_height - 5
+                pygame.draw.rect(surface, GRAY, (bar_x, bar_y, bar_width, bar_height))
+                hp_color = (255 * (1 - hp_ratio), 255 * hp_ratio, 0)
+                pygame.draw.rect(surface, hp_color, (bar_x, bar_y, bar_width * hp_ratio, bar_height))
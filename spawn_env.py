@@ -0,0 +1,165 @@
+# spawn_env.py
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from spawn_game import (CONFIG, NUM_CHARACTER_TYPES, SpawnActions, build_spawn_state, calculate_spawn_rewards,
+                        compute_episode_results, handle_spawn_decision, initialize_game_state, snapshot_state)
+
+SPAWN_STATE_SIZE = 6 + 2 * NUM_CHARACTER_TYPES
+
+# Picks the right team's spawn action from the current observation
+OpponentPolicy = Callable[[np.ndarray], int]
+# (game_state, previous_state, action) -> (reward, breakdown), like calculate_spawn_rewards
+RewardFn = Callable[[Dict[str, Any], Dict[str, Any], int], Tuple[float, Dict[str, float]]]
+
+
+class SpawnEnv:
+    """
+    One castle battle as a reset()/step(action) environment for the left spawn agent.
+
+    step follows the Gymnasium convention and returns (observation, reward,
+    terminated, truncated, info). A destroyed castle terminates the episode;
+    reaching the time limit truncates it, with the winner decided on castle
+    HP as in the game. The final info holds the episode results.
+
+    The observation is a preallocated array updated in place by reset and
+    step, not rebuilt each step; copy it to keep it. Pass observation to
+    have the env write into a row of a larger buffer.
+
+    opponent_policy chooses the right team's spawn action on every gage
+    tick; without one the right team is the scripted random opponent.
+    """
+
+    def __init__(self,
+                 opponent_policy: Optional[OpponentPolicy] = None,
+                 reward_fn: RewardFn = calculate_spawn_rewards,
+                 time_limit: float = CONFIG.TIME_LIMIT,
+                 step_size: float = CONFIG.SIM_STEP,
+                 render: bool = False,
+                 observation: Optional[np.ndarray] = None):
+        self.opponent_policy = opponent_policy
+        self.reward_fn = reward_fn
+        self.time_limit = time_limit
+        self.step_size = step_size
+        self.render = render
+        if observation is None:
+            observation = np.zeros(SPAWN_STATE_SIZE, dtype=np.float32)
+        elif observation.shape != (SPAWN_STATE_SIZE,) or observation.dtype != np.float32:
+            raise ValueError(f"Observation buffer must be float32 of shape ({SPAWN_STATE_SIZE},)")
+        self.observation = observation
+
+        self.game_state: Optional[Dict[str, Any]] = None
+        self.previous_state: Optional[Dict[str, Any]] = None
+        self.episode_reward = 0.0
+        self.episode_length = 0
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Start a new battle; the same seed and actions replay the same battle"""
+        self.game_state = initialize_game_state(self.render, seed, self.time_limit)
+        self.previous_state = snapshot_state(self.game_state)
+        self.episode_reward = 0.0
+        self.episode_length = 0
+        self._observe()
+        return self.observation, {'seed': self.game_state['sim'].seed}
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        """Apply the left spawn action and advance the battle by one fixed step"""
+        game_state = self.game_state
+        if game_state is None:
+            raise RuntimeError("Call reset() before step()")
+        sim = game_state['sim']
+
+        handle_spawn_decision('left', action, game_state, None)
+
+        # The opponent decides once per gage tick
+        if sim.update_clock(self.step_size):
+            if self.opponent_policy is None:
+                right_action = sim.opponent_rng.randrange(SpawnActions.SPACE_SIZE)
+                handle_spawn_decision('right', right_action, game_state, None, random_type=True)
+            else:
+                self._observe()
+                handle_spawn_decision('right', self.opponent_policy(self.observation), game_state, None)
+
+        # Update characters (dead ones are removed by the simulation)
+        sim.update_units(self.step_size)
+
+        game_over, winner = sim.check_game_over()
+        if game_over:
+            game_state['winner'] = winner
+
+        reward, breakdown = self.reward_fn(game_state, self.previous_state, action)
+        self.previous_state = snapshot_state(game_state)
+        self.episode_reward += reward
+        self.episode_length += 1
+        self._observe()
+
+        terminated = sim.left_castle.is_destroyed() or sim.right_castle.is_destroyed()
+        truncated = game_over and not terminated
+        info: Dict[str, Any] = {'reward_breakdown': breakdown}
+        if game_over:
+            results = compute_episode_results(game_state)
+            results['total_reward'] = self.episode_reward
+            results['avg_reward'] = self.episode_reward / self.episode_length
+            info['episode'] = results
+        return self.observation, reward, terminated, truncated, info
+
+    def _observe(self) -> None:
+        build_spawn_state(self.game_state['sim'], out=self.observation)
+
+
+class VecSpawnEnv:
+    """
+    N independent headless battles stepped in lockstep for the spawn agent.
+
+    step takes one left spawn action per battle and returns observations,
+    rewards and done flags stacked into arrays, so the agent can score every
+    battle with a single batched forward pass. Each battle is a SpawnEnv
+    writing its observation into one row of a shared buffer, which step
+    returns as is; copy it to keep it. Finished battles are reset at once:
+    their row already belongs to the next episode, and infos holds the
+    terminal observation and episode results.
+
+    Episode n started by the env uses seed + n, so a seeded env plays the
+    same battles for the same actions. Other keyword arguments go to every
+    SpawnEnv.
+    """
+
+    def __init__(self, num_envs: int, seed: Optional[int] = None, **env_kwargs):
+        if num_envs < 1:
+            raise ValueError(f"Need at least one environment, got {num_envs}")
+        self.num_envs = num_envs
+        self.seed = seed
+        self.episodes_started = 0
+        self.observations = np.zeros((num_envs, SPAWN_STATE_SIZE), dtype=np.float32)
+        self.envs = [SpawnEnv(observation=self.observations[i], **env_kwargs) for i in range(num_envs)]
+
+    def reset(self) -> np.ndarray:
+        """Start a new episode in every environment and return the observations"""
+        for env in self.envs:
+            self._reset_env(env)
+        return self.observations
+
+    def _reset_env(self, env: SpawnEnv) -> None:
+        self.episodes_started += 1
+        env.reset(None if self.seed is None else self.seed + self.episodes_started)
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Advance every battle by one step; returns (observations, rewards, dones, infos)"""
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"Expected {self.num_envs} actions, got shape {actions.shape}")
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=np.bool_)
+        infos: List[Dict[str, Any]] = [{} for _ in range(self.num_envs)]
+
+        for i, (env, action) in enumerate(zip(self.envs, actions.tolist())):
+            observation, rewards[i], terminated, truncated, info = env.step(action)
+            if terminated or truncated:
+                dones[i] = True
+                infos[i] = {'final_observation': observation.copy(), 'episode': info['episode']}
+                self._reset_env(env)
+
+        return self.observations, rewards, dones, infos
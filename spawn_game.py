@@ -0,0 +1,314 @@
+# spawn_game.py
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from character_registry import get_registry
+from simulation import Simulation, SimConfig, SimCastle, CASTLE_SIZE, TEAM_INDEX
+from simulation.engine import DAMAGE_COOLDOWN
+
+# Rules of the spawn game shared by train_agent and spawn_env. Nothing here
+# imports pygame or torch, so headless rollout workers stay light.
+
+# =============================
+# Game Constants and Configuration
+# =============================
+
+@dataclass
+class GameConfig:
+    WORLD_WIDTH: int = 1440
+    SCREEN_WIDTH: int = 1440
+    SCREEN_HEIGHT: int = 400
+    UI_HEIGHT: int = 100
+    WINDOW_HEIGHT: int = SCREEN_HEIGHT + UI_HEIGHT
+    MAX_CHARACTERS: int = 50
+    SPAWN_COST: int = 20
+    MAX_GAGE: int = 200
+    TIME_LIMIT: int = 180  # 3 minutes
+    GAGE_INCREMENT: int = 4
+    FPS: int = 60
+    TIME_SCALE: int = 10  # Simulated seconds per real second when rendering
+    SIM_STEP: float = TIME_SCALE / FPS  # Simulated seconds per fixed step
+
+    # Colors
+    WHITE: Tuple[int, ...] = (255, 255, 255)
+    BLACK: Tuple[int, ...] = (0, 0, 0)
+    GRAY: Tuple[int, ...] = (128, 128, 128)
+    BLUE: Tuple[int, ...] = (0, 0, 255)
+    RED: Tuple[int, ...] = (255, 0, 0)
+
+# Load configuration
+CONFIG = GameConfig()
+
+# Load character definitions once per process
+try:
+    CHARACTER_STATS = get_registry().stats
+    CHARACTER_TYPES = list(CHARACTER_STATS.keys())
+    NUM_CHARACTER_TYPES = len(CHARACTER_TYPES)
+except Exception as e:
+    logging.error(f"Failed to load character info: {e}")
+    raise
+
+# Spawn Actions
+class SpawnActions:
+    SPAWN_FIRE_VIZARD = 0
+    SPAWN_LIGHTNING_MAGE = 1
+    SPAWN_WANDERER_MAGICIAN = 2
+    DO_NOTHING = 3
+    SPACE_SIZE = 4
+
+def character_type_for_action(action: int) -> Optional[str]:
+    """Maps a spawn action to a character type, None for do nothing."""
+    if action in (SpawnActions.SPAWN_FIRE_VIZARD,
+                  SpawnActions.SPAWN_LIGHTNING_MAGE,
+                  SpawnActions.SPAWN_WANDERER_MAGICIAN):
+        return CHARACTER_TYPES[action]
+    return None
+
+# =============================
+# State Building Functions
+# =============================
+
+def build_spawn_state(sim: Simulation, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Builds a spawn state vector, written in place into out when given.
+
+    Team features are read from the simulation's running per-team counters,
+    so this costs the same however many units are on the field.
+    """
+    state = np.empty(6 + 2 * NUM_CHARACTER_TYPES, dtype=np.float32) if out is None else out
+    left, right = TEAM_INDEX['left'], TEAM_INDEX['right']
+    
+    # Castle status
+    state[0] = sim.left_castle.hp / sim.left_castle.max_hp
+    state[1] = sim.right_castle.hp / sim.right_castle.max_hp
+    
+    # Resource management
+    state[2] = sim.gauges['left'] / CONFIG.MAX_GAGE
+    state[3] = sim.gauges['right'] / CONFIG.MAX_GAGE
+    
+    # Team health of living units
+    state[4:6] = sim.mean_hp_ratios()[[left, right]]
+    
+    # Type distribution, normalized
+    max_count = CONFIG.MAX_CHARACTERS / 2
+    state[6:6 + NUM_CHARACTER_TYPES] = sim.type_counts[left] / max_count
+    state[6 + NUM_CHARACTER_TYPES:] = sim.type_counts[right] / max_count
+    
+    return state
+
+# =============================
+# Game State Management
+# =============================
+
+def initialize_game_state(render: bool,
+                          seed: Optional[int] = None,
+                          time_limit: float = CONFIG.TIME_LIMIT) -> Dict[str, Any]:
+    """Initialize the game state for a new episode; the same seed and spawns replay the same battle."""
+    castle_y = CONFIG.SCREEN_HEIGHT - CASTLE_SIZE
+    sim = Simulation(
+        config=SimConfig(
+            SCREEN_WIDTH=CONFIG.SCREEN_WIDTH,
+            MAX_CHARACTERS=CONFIG.MAX_CHARACTERS,
+            SPAWN_COST=CONFIG.SPAWN_COST,
+            MAX_GAGE=CONFIG.MAX_GAGE,
+            TIME_LIMIT=time_limit,
+            GAGE_INCREMENT=CONFIG.GAGE_INCREMENT,
+            GAGE_INTERVAL=1.0,
+            # The rules the stage models were trained under: the original loop timed attack
+            # cooldowns on the unscaled wall clock, so they lasted TIME_SCALE times longer
+            ATTACK_COOLDOWN=DAMAGE_COOLDOWN * CONFIG.TIME_SCALE,
+            ATTACK_DURING_COOLDOWN=True
+        ),
+        left_castle=SimCastle(x=0, y=castle_y, team='left'),
+        right_castle=SimCastle(x=CONFIG.WORLD_WIDTH - 100, y=castle_y, team='right'),
+        seed=seed
+    )
+
+    game_state = {
+        'sim': sim,
+        'left_castle': sim.left_castle,
+        'right_castle': sim.right_castle,
+        'spawn_cost': CONFIG.SPAWN_COST,
+        'left_spawn_counts': {t: 0 for t in CHARACTER_TYPES},
+        'right_spawn_counts': {t: 0 for t in CHARACTER_TYPES},
+        'camera_offset': 0,
+    }
+
+    # Sprites are only needed to draw; the simulation itself never touches pygame
+    if render:
+        from simulation_renderer import SimulationRenderer
+        from utils import load_character_sprites
+
+        loaded_sprites = {}
+        for char_type in CHARACTER_TYPES:
+            loaded_sprites[char_type] = {
+                'left': load_character_sprites(os.path.join('sprites', 'left', char_type)),
+                'right': load_character_sprites(os.path.join('sprites', 'right', char_type))
+            }
+        game_state['renderer'] = SimulationRenderer(loaded_sprites)
+
+    return game_state
+
+def spawn_character(team: str, 
+                   character_type: str, 
+                   sim: Simulation) -> Optional[str]:
+    """Spawns a character of a specific type for the given team, paid from its gage."""
+    if team not in ['left', 'right']:
+        logging.error(f"Invalid team '{team}' specified for spawning.")
+        return None
+
+    if character_type not in CHARACTER_TYPES:
+        logging.error(f"Invalid character type '{character_type}' specified for spawning.")
+        return None
+
+    # Calculate spawn position
+    sprite_width, sprite_height = sim.unit_size(character_type, team)
+    x = 100 if team == 'left' else CONFIG.WORLD_WIDTH - 100 - sprite_width
+    y = CONFIG.SCREEN_HEIGHT - sprite_height
+
+    if sim.purchase(team, character_type, x, y) is None:
+        return None
+    return character_type
+
+def handle_spawn_decision(team: str, 
+                        action: int, 
+                        game_state: Dict[str, Any],
+                        agent: Optional[Any],
+                        random_type: bool = False) -> None:
+    """Handle spawn decision for a team; random_type picks the character type at random, as the scripted opponent does."""
+    sim = game_state['sim']
+    
+    if action == SpawnActions.DO_NOTHING:
+        return
+        
+    if sim.gauges[team] < CONFIG.SPAWN_COST:
+        return
+        
+    # Check character limit
+    if sim.team_count(team) >= CONFIG.MAX_CHARACTERS // 2:
+        return
+    
+    # Determine character type
+    if random_type:
+        char_type = sim.opponent_rng.choice(CHARACTER_TYPES)
+    elif agent:
+        char_type = agent.decide_character_type(action)
+    else:
+        char_type = character_type_for_action(action)
+    
+    if char_type:
+        success = spawn_character(team, char_type, sim)
+        if success:
+            game_state[f'{team}_spawn_counts'][char_type] += 1
+
+def compute_episode_results(game_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the results of the episode."""
+    return {
+        'winner': game_state.get('winner', 'No Winner'),
+        'left_castle_hp': game_state['left_castle'].hp,
+        'right_castle_hp': game_state['right_castle'].hp,
+        'left_spawn_counts': game_state['left_spawn_counts'],
+        'right_spawn_counts': game_state['right_spawn_counts'],
+        'episode_duration': game_state['sim'].elapsed_time
+    }
+
+# =============================
+# Rewards
+# =============================
+
+def calculate_spawn_rewards(game_state, previous_state, action):
+    """
+    Calculate rewards for spawn agent actions based on multiple factors.
+    
+    Returns:
+        total_reward: float
+        reward_breakdown: dict
+    """
+    rewards = {
+        'castle_health_reward': 0.0,
+        'resource_management_reward': 0.0,
+        'unit_composition_reward': 0.0,
+        'tactical_positioning_reward': 0.0,
+        'combat_outcome_reward': 0.0
+    }
+    
+    # 1. Castle Health Reward (-5.0 to 5.0)
+    left_castle_hp_ratio = game_state['left_castle'].hp / game_state['left_castle'].max_hp
+    right_castle_hp_ratio = game_state['right_castle'].hp / game_state['right_castle'].max_hp
+    previous_left_hp_ratio = previous_state['left_castle_hp'] / game_state['left_castle'].max_hp
+    previous_right_hp_ratio = previous_state['right_castle_hp'] / game_state['right_castle'].max_hp
+    
+    castle_health_delta = (left_castle_hp_ratio - previous_left_hp_ratio) - \
+                         (right_castle_hp_ratio - previous_right_hp_ratio)
+    rewards['castle_health_reward'] = castle_health_delta * 1.0
+
+    # 2. Resource Management Reward (-1.0 to 1.0)
+    left_gage = game_state['sim'].gauges['left']
+    if action == SpawnActions.DO_NOTHING and left_gage < CONFIG.SPAWN_COST:
+        # Reward for saving resources when can't afford spawn
+        rewards['resource_management_reward'] = 0.1
+    elif action != SpawnActions.DO_NOTHING and left_gage >= CONFIG.SPAWN_COST:
+        # Small reward for efficient resource use
+        rewards['resource_management_reward'] = 0.01
+    else:
+        # Penalty for spawning when can't afford or not spawning when can
+        rewards['resource_management_reward'] = -0.1
+
+    # 3. Unit Composition Reward (-2.0 to 2.0)
+    sim = game_state['sim']
+    unit_counts = sim.type_counts[TEAM_INDEX['left']]
+    
+    # Reward for maintaining balanced composition
+    num_left_units = int(unit_counts.sum())
+    max_ratio = unit_counts.max() / num_left_units if num_left_units else 0
+    balance_score = -abs(float(max_ratio) - 1/len(CHARACTER_TYPES))
+    rewards['unit_composition_reward'] = balance_score * 1.0
+
+    # 4. Tactical Positioning Reward (-3.0 to 3.0)
+    if num_left_units:
+        # Reward for forward positioning and good spacing
+        bf = sim.battlefield
+        left_units = ~bf.view('dead') & (bf.view('team') == TEAM_INDEX['left'])
+        avg_position = float(bf.view('x')[left_units].mean()) / CONFIG.WORLD_WIDTH
+        position_score = avg_position * 2 - 1  # Transform to [-1, 1]
+        rewards['tactical_positioning_reward'] = position_score * 1.0
+
+    # 5. Combat Outcome Reward (-4.0 to 4.0)
+    current_enemies = sim.alive_counts[TEAM_INDEX['right']]
+    
+    enemies_defeated = previous_state['right_alive'] - current_enemies
+    allies_lost = previous_state['left_count'] - sim.unit_counts[TEAM_INDEX['left']]
+    
+    combat_score = enemies_defeated - allies_lost
+    rewards['combat_outcome_reward'] = combat_score * 2.0
+
+    # Calculate total reward
+    total_reward = sum(rewards.values())
+    
+    # Add win/loss rewards
+    if game_state.get('winner'):
+        if game_state['winner'] == "Left Team Wins!":
+            total_reward += 1000.0
+            rewards['victory_reward'] = 1000.0
+        elif game_state['winner'] == "Right Team Wins!":
+            total_reward -= 1000.0
+            rewards['victory_reward'] = -1000.0
+    
+    return total_reward, rewards 
+
+def snapshot_state(game_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Capture what calculate_spawn_rewards compares against on the next step."""
+    sim = game_state['sim']
+    return {
+        'left_castle_hp': sim.left_castle.hp,
+        'right_castle_hp': sim.right_castle.hp,
+        'right_alive': int(sim.alive_counts[TEAM_INDEX['right']]),
+        'left_count': int(sim.unit_counts[TEAM_INDEX['left']]),
+        'left_gage': sim.gauges['left'],
+        'right_gage': sim.gauges['right']
+    }
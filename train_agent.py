@@ -1,19 +1,24 @@
 # train_agent.py
 
-import random
 import os
 import numpy as np
 import pygame
-from character import Character, load_character_info
-from castle import Castle
-from utils import load_character_sprites
+from simulation import Battlefield, SimCastle, TEAM_INDEX
 import csv
-from rl_agent import AIPlayerAgent  
+from rl_agent import AIPlayerAgent
+from spawn_game import CONFIG, CHARACTER_TYPES, NUM_CHARACTER_TYPES
+from spawn_env import SpawnEnv, VecSpawnEnv
+from learner import Learner
+from inference import InferenceServer
+from policy import policy_path
+from checkpoint_writer import CheckpointWriter, read_manifest
 from pathlib import Path
 import logging
 from typing import Dict, List, Tuple, Any, Optional
-from dataclasses import dataclass
 import re, glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 # Configure logging
 logging.basicConfig(
@@ -25,87 +30,47 @@ logging.basicConfig(
 # Game Constants and Configuration
 # =============================
 
-@dataclass
-class GameConfig:
-    WORLD_WIDTH: int = 1440
-    SCREEN_WIDTH: int = 1440
-    SCREEN_HEIGHT: int = 400
-    UI_HEIGHT: int = 100
-    WINDOW_HEIGHT: int = SCREEN_HEIGHT + UI_HEIGHT
-    MAX_CHARACTERS: int = 50
-    SPAWN_COST: int = 20
-    MAX_GAGE: int = 200
-    TIME_LIMIT: int = 180  # 3 minutes
-    GAGE_INCREMENT: int = 4
-    FPS: int = 60
-
-    # Colors
-    WHITE: Tuple[int, ...] = (255, 255, 255)
-    BLACK: Tuple[int, ...] = (0, 0, 0)
-    GRAY: Tuple[int, ...] = (128, 128, 128)
-    BLUE: Tuple[int, ...] = (0, 0, 255)
-    RED: Tuple[int, ...] = (255, 0, 0)
-
-# Load configuration
-CONFIG = GameConfig()
-
-# Load character types from character_info.json
-try:
-    CHARACTER_INFO = load_character_info()
-    CHARACTER_TYPES = list(CHARACTER_INFO.keys())
-    NUM_CHARACTER_TYPES = len(CHARACTER_TYPES)
-except Exception as e:
-    logging.error(f"Failed to load character info: {e}")
-    raise
-
 CHARACTER_ACTIONS = ['Walk', 'Run', 'Attack', 'Skill', 'Idle']
 CHARACTER_ACTION_SPACE_SIZE = len(CHARACTER_ACTIONS)
 
-# Spawn Actions
-class SpawnActions:
-    SPAWN_FIRE_VIZARD = 0
-    SPAWN_LIGHTNING_MAGE = 1
-    SPAWN_WANDERER_MAGICIAN = 2
-    DO_NOTHING = 3
-    SPACE_SIZE = 4
-
 # =============================
 # State Building Functions
 # =============================
 
-def build_character_state(character: Character, 
-                         characters: List[Character], 
-                         enemy_castle: Castle) -> np.ndarray:
+def build_character_state(battlefield: Battlefield,
+                         index: int,
+                         enemy_castle: SimCastle) -> np.ndarray:
     """Builds a state vector for a single character."""
+    x = battlefield.view('x')
+    hp = battlefield.view('hp')
+    max_hp = battlefield.view('max_hp')
+    team = battlefield.view('team')
+    type_id = battlefield.view('type_id')
     
     # Basic character stats
-    own_hp_ratio = character.hp / character.max_hp if character.max_hp > 0 else 0.0
-    own_position_norm = character.x / CONFIG.WORLD_WIDTH
+    own_hp_ratio = hp[index] / max_hp[index] if max_hp[index] > 0 else 0.0
+    own_position_norm = x[index] / CONFIG.WORLD_WIDTH
     
     # Distance features
-    distance_to_castle = abs(character.x - enemy_castle.x) / CONFIG.WORLD_WIDTH
+    distance_to_castle = abs(x[index] - enemy_castle.x) / CONFIG.WORLD_WIDTH
     castle_hp_ratio = enemy_castle.hp / enemy_castle.max_hp
     
     # Enemy analysis
-    enemies = [c for c in characters if c.team != character.team and c.hp > 0]
+    alive = hp > 0
+    allies = alive & (team == team[index])
+    enemies = np.flatnonzero(alive & (team != team[index]))
     closest_enemy_dist = 1.0
     closest_enemy_hp_ratio = 0.0
     
-    if enemies:
-        distances = [(abs(character.x - e.x), e.hp / e.max_hp) for e in enemies]
-        closest_idx = min(range(len(distances)), key=lambda i: distances[i][0])
-        closest_enemy_dist = distances[closest_idx][0] / CONFIG.WORLD_WIDTH
-        closest_enemy_hp_ratio = distances[closest_idx][1]
+    if enemies.size:
+        distances = np.abs(x[enemies] - x[index])
+        closest = enemies[np.argmin(distances)]
+        closest_enemy_dist = abs(x[closest] - x[index]) / CONFIG.WORLD_WIDTH
+        closest_enemy_hp_ratio = hp[closest] / max_hp[closest]
     
     # Team composition
-    ally_counts = np.zeros(NUM_CHARACTER_TYPES, dtype=np.float32)
-    enemy_counts = np.zeros(NUM_CHARACTER_TYPES, dtype=np.float32)
-    
-    for char in characters:
-        if char.hp <= 0:
-            continue
-        counts = ally_counts if char.team == character.team else enemy_counts
-        counts[CHARACTER_TYPES.index(char.character_type)] += 1
+    ally_counts = np.bincount(type_id[allies], minlength=NUM_CHARACTER_TYPES).astype(np.float32)
+    enemy_counts = np.bincount(type_id[enemies], minlength=NUM_CHARACTER_TYPES).astype(np.float32)
     
     # Normalize counts
     max_count = CONFIG.MAX_CHARACTERS / 2
@@ -121,340 +86,37 @@ def build_character_state(character: Character,
     
     return state.astype(np.float32)
 
-def build_spawn_state(left_castle: Castle, 
-                     right_castle: Castle,
-                     characters: List[Character],
-                     left_gage: float,
-                     right_gage: float) -> np.ndarray:
-    """Builds a spawn state vector."""
-    
-    # Castle status
-    left_castle_hp_ratio = left_castle.hp / left_castle.max_hp
-    right_castle_hp_ratio = right_castle.hp / right_castle.max_hp
-    
-    # Resource management
-    left_gage_ratio = left_gage / CONFIG.MAX_GAGE
-    right_gage_ratio = right_gage / CONFIG.MAX_GAGE
-    
-    # Team analysis
-    alive_characters = [c for c in characters if c.hp > 0]
-    left_team = [c for c in alive_characters if c.team == 'left']
-    right_team = [c for c in alive_characters if c.team == 'right']
-    
-    # Type distribution
-    left_counts = np.zeros(NUM_CHARACTER_TYPES)
-    right_counts = np.zeros(NUM_CHARACTER_TYPES)
-    
-    for char in left_team:
-        left_counts[CHARACTER_TYPES.index(char.character_type)] += 1
-    for char in right_team:
-        right_counts[CHARACTER_TYPES.index(char.character_type)] += 1
-    
-    # Normalize counts
-    max_count = CONFIG.MAX_CHARACTERS / 2
-    left_counts = left_counts / max_count
-    right_counts = right_counts / max_count
-    
-    # Calculate team health
-    total_left_hp = sum(c.hp / c.max_hp for c in left_team) / len(left_team) if left_team else 0
-    total_right_hp = sum(c.hp / c.max_hp for c in right_team) / len(right_team) if right_team else 0
-    
-    state = np.concatenate([
-        [left_castle_hp_ratio, right_castle_hp_ratio,
-         left_gage_ratio, right_gage_ratio,
-         total_left_hp, total_right_hp],
-        left_counts,
-        right_counts
-    ])
-    
-    return state.astype(np.float32)
-
 # =============================
 # Game State Management
 # =============================
 
-def initialize_game_state(render: bool) -> Dict[str, Any]:
-    """Initialize the game state for a new episode."""
-    game_state = {
-        'characters': [],
-        'left_castle': Castle(x=0, y=0, team='left', render=render),
-        'right_castle': Castle(x=CONFIG.WORLD_WIDTH - 100, y=0, team='right', render=render),
-        'left_gage': 0,
-        'right_gage': 0,
-        'spawn_cost': CONFIG.SPAWN_COST,
-        'left_spawn_counts': {t: 0 for t in CHARACTER_TYPES},
-        'right_spawn_counts': {t: 0 for t in CHARACTER_TYPES},
-        'camera_offset': 0,
-        'spawn_addition_timer': 0.0,
-        'elapsed_time': 0.0,
-        'time_limit': CONFIG.TIME_LIMIT,
-    }
-
-    # Adjust castle positions
-    game_state['left_castle'].y = CONFIG.SCREEN_HEIGHT - game_state['left_castle'].height
-    game_state['right_castle'].y = CONFIG.SCREEN_HEIGHT - game_state['right_castle'].height
-
-    # Load sprites if rendering
-    if render:
-        game_state['loaded_sprites'] = {}
-        for char_type in CHARACTER_TYPES:
-            game_state['loaded_sprites'][char_type] = {
-                'left': load_character_sprites(os.path.join('sprites', 'left', char_type)),
-                'right': load_character_sprites(os.path.join('sprites', 'right', char_type))
-            }
-    else:
-        game_state['loaded_sprites'] = {
-            char_type: {'left': None, 'right': None} for char_type in CHARACTER_TYPES
-        }
-
-    return game_state
-
-def spawn_character(team: str, 
-                   character_type: str, 
-                   loaded_sprites: Dict[str, Dict[str, Any]], 
-                   characters: List[Character],
-                   time_scale: float) -> Optional[str]:
-    """Spawns a character of a specific type for the given team."""
-    if team not in ['left', 'right']:
-        logging.error(f"Invalid team '{team}' specified for spawning.")
-        return None
-
-    if character_type not in CHARACTER_TYPES:
-        logging.error(f"Invalid character type '{character_type}' specified for spawning.")
-        return None
-
-    # Calculate spawn position
-    if loaded_sprites[character_type][team]:
-        sprites = loaded_sprites[character_type][team]
-        first_action = next(iter(sprites))
-        sprite = sprites[first_action][0] if sprites[first_action] else None
-        sprite_width = sprite.get_width() if sprite else 40
-        sprite_height = sprite.get_height() if sprite else 40
-    else:
-        sprites = None
-        sprite_width = 40
-        sprite_height = 40
-
-    x = 100 if team == 'left' else CONFIG.WORLD_WIDTH - 100 - sprite_width
-    y = CONFIG.SCREEN_HEIGHT - sprite_height
-
-    try:
-        character = Character(
-            sprites=sprites,
-            x=x,
-            y=y,
-            team=team,
-            character_type=character_type,
-            time_scale=time_scale
-        )
-        characters.append(character)
-        return character_type
-    except Exception as e:
-        logging.error(f"Error spawning character: {e}")
-        return None
-
-def handle_spawn_decision(team: str, 
-                        action: int, 
-                        game_state: Dict[str, Any],
-                        agent: Optional[AIPlayerAgent]) -> None:
-    """Handle spawn decision for a team."""
-    gage_key = f"{team}_gage"
-    
-    if action == SpawnActions.DO_NOTHING:
-        return
-        
-    if game_state[gage_key] < CONFIG.SPAWN_COST:
-        return
-        
-    # Check character limit
-    team_count = sum(1 for c in game_state['characters'] if c.team == team)
-    if team_count >= CONFIG.MAX_CHARACTERS // 2:
-        return
-    
-    # Determine character type
-    if team == 'left' and agent:
-        char_type = agent.decide_character_type(action)
-    else:
-        char_type = random.choice(CHARACTER_TYPES)
-    
-    if char_type:
-        success = spawn_character(
-            team, 
-            char_type, 
-            game_state['loaded_sprites'],
-            game_state['characters'],
-            time_scale=1
-        )
-        if success:
-            game_state[gage_key] -= CONFIG.SPAWN_COST
-            game_state[f'{team}_spawn_counts'][char_type] += 1
-
-def update_game_state(game_state: Dict[str, Any], 
-                     delta_time: float,
-                     current_time: float,
-                     spawn_agent: AIPlayerAgent,
-                     render: bool) -> bool:
-    """Update the game state with improved combat behavior."""
-    game_state['elapsed_time'] += delta_time
-    
-    # Update spawn timer and gage
-    game_state['spawn_addition_timer'] += delta_time
-    if game_state['spawn_addition_timer'] >= 1.0:
-        game_state['spawn_addition_timer'] -= 1.0
-        
-        # Update gages
-        game_state['left_gage'] = min(game_state['left_gage'] + CONFIG.GAGE_INCREMENT, CONFIG.MAX_GAGE)
-        game_state['right_gage'] = min(game_state['right_gage'] + CONFIG.GAGE_INCREMENT, CONFIG.MAX_GAGE)
-
-        # Handle spawns...
-        spawn_state = build_spawn_state(
-            game_state['left_castle'], 
-            game_state['right_castle'],
-            game_state['characters'],
-            game_state['left_gage'],
-            game_state['right_gage']
-        )
-
-        left_action = spawn_agent.choose_action(spawn_state)
-        handle_spawn_decision('left', left_action, game_state, spawn_agent)
-        
-        right_action = random.randrange(SpawnActions.SPACE_SIZE)
-        handle_spawn_decision('right', right_action, game_state, None)
-
-    # Update characters
-    characters_to_remove = []
-    for character in game_state['characters']:
-        if character.is_dead:
-            characters_to_remove.append(character)
-            continue
-            
-        enemies = [c for c in game_state['characters'] 
-                  if c.team != character.team and not c.is_dead]
-        enemy_castle = (game_state['right_castle'] if character.team == 'left'
-                       else game_state['left_castle'])
-        
-        # Update character with current time for combat timing
-        character.update(enemies, enemy_castle, delta_time, current_time)
-        
-        # Only process actions if not currently executing one
-        if not character.action_in_progress:
-            # First, check for any enemies in attack range
-            enemies_in_range = []
-            for enemy in enemies:
-                if character.is_within_attack_range(enemy):
-                    if ((character.team == 'left' and enemy.x > character.x) or 
-                        (character.team == 'right' and enemy.x < character.x)):
-                        enemies_in_range.append(enemy)
-            
-            # Also check if castle is in range
-            castle_in_range = False
-            if not enemy_castle.is_destroyed() and character.is_within_attack_range(enemy_castle):
-                if ((character.team == 'left' and enemy_castle.x > character.x) or 
-                    (character.team == 'right' and enemy_castle.x < character.x)):
-                    castle_in_range = True
-
-            # If any enemies or castle in range, stop and attack
-            if enemies_in_range or castle_in_range:
-                # Stop movement
-                character.vel_x = 0
-                character.vel_y = 0
-                
-                # Set closest target
-                if enemies_in_range:
-                    character.target = min(enemies_in_range, 
-                                        key=lambda e: character.get_distance_to(e))
-                else:
-                    character.target = enemy_castle
-
-                # Choose attack action
-                rand_val = random.random()
-                if rand_val < 0.6:
-                    character.set_action('Attack')
-                elif rand_val < 0.8:
-                    character.set_action('skill1')
-                else:
-                    character.set_action('skill2')
-            else:
-                # No enemies in range - find closest target and move towards it
-                valid_targets = [e for e in enemies if not e.is_dead]
-                if not enemy_castle.is_destroyed():
-                    valid_targets.append(enemy_castle)
-                
-                closest_target = None
-                closest_dist = float('inf')
-                
-                for target in valid_targets:
-                    target_x = target.x if hasattr(target, 'x') else target.get_center_position()[0]
-                    
-                    if ((character.team == 'left' and target_x > character.x) or 
-                        (character.team == 'right' and target_x < character.x)):
-                        dist = character.get_distance_to(target)
-                        if dist < closest_dist:
-                            closest_dist = dist
-                            closest_target = target
-                
-                if closest_target:
-                    character.target = closest_target
-                    character.set_action('Run')
-                else:
-                    # No valid targets - move forward
-                    character.set_action('Run')
-
-    # Remove dead or finished characters
-    for char in characters_to_remove:
-        game_state['characters'].remove(char)
-
-    # Check game over conditions
-    game_over, winner = check_game_over(game_state)
-    if game_over:
-        game_state['winner'] = winner
-        return True
-
-    return False
-
 def check_game_over(game_state: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
     """Check if the game is over and determine the winner."""
-    if game_state['left_castle'].is_destroyed():
-        return True, "Right Team Wins!"
-    
-    if game_state['right_castle'].is_destroyed():
-        return True, "Left Team Wins!"
-    
-    if game_state['elapsed_time'] >= game_state['time_limit']:
-        left_hp = game_state['left_castle'].hp
-        right_hp = game_state['right_castle'].hp
-        
-        if left_hp > right_hp:
-            return True, "Left Team Wins!"
-        elif right_hp > left_hp:
-            return True, "Right Team Wins!"
-        else:
-            return True, "Draw!"
-            
-    return False, None
+    return game_state['sim'].check_game_over()
+
+def handle_time_and_events(clock: Optional[pygame.time.Clock], render: bool) -> None:
+    """
+    Handle pygame events and pace rendered episodes.
 
-def handle_time_and_events(clock: pygame.time.Clock, render: bool) -> float:
-    """Handle time updates and pygame events."""
+    Rendered episodes are paced to CONFIG.FPS frames of one CONFIG.SIM_STEP
+    each, i.e. TIME_SCALE times real time. Headless episodes never sleep and
+    run as fast as the machine allows. Both advance the simulation by the
+    same step, so a seed plays out the same battle either way.
+    """
     if render:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RIGHT:
-                    return {'type': 'camera_right'}
-                elif event.key == pygame.K_LEFT:
-                    return {'type': 'camera_left'}
-
-    raw_dt = clock.tick(CONFIG.FPS) / 1000.0
-    return raw_dt * (10 if render else 10)  # Time scaling factor
+        clock.tick(CONFIG.FPS)
 
 def draw_ui(game_state: Dict[str, Any], window: pygame.Surface) -> None:
     """Draw UI elements including timer, minimap, and scrollbar."""
     font = pygame.font.SysFont(None, 36)
+    sim = game_state['sim']
     
     # Draw timer
-    remaining_time = max(0, game_state['time_limit'] - game_state['elapsed_time'])
+    remaining_time = max(0, sim.config.TIME_LIMIT - sim.elapsed_time)
     minutes = int(remaining_time // 60)
     seconds = int(remaining_time % 60)
     timer_text = font.render(f"Time: {minutes:02}:{seconds:02}", True, CONFIG.BLACK)
@@ -469,9 +131,10 @@ def draw_ui(game_state: Dict[str, Any], window: pygame.Surface) -> None:
     pygame.draw.rect(window, CONFIG.BLACK, (minimap_x, minimap_y, minimap_width, minimap_height), 2)
     
     # Draw character positions on minimap
-    for char in game_state['characters']:
-        color = CONFIG.BLUE if char.team == 'left' else CONFIG.RED
-        mini_x = minimap_x + (char.x / CONFIG.WORLD_WIDTH) * minimap_width
+    bf = sim.battlefield
+    for x, team in zip(bf.view('x'), bf.view('team')):
+        color = CONFIG.BLUE if team == TEAM_INDEX['left'] else CONFIG.RED
+        mini_x = minimap_x + (x / CONFIG.WORLD_WIDTH) * minimap_width
         mini_y = minimap_y + minimap_height / 2
         pygame.draw.circle(window, color, (int(mini_x), int(mini_y)), 2)
 
@@ -504,30 +167,16 @@ def render_game(game_state: Dict[str, Any], window: pygame.Surface) -> None:
     camera_rect = pygame.Rect(game_state['camera_offset'], 0, CONFIG.SCREEN_WIDTH, CONFIG.SCREEN_HEIGHT)
     window.blit(background, (0, 0), area=camera_rect)
 
-    # Draw castles
-    game_state['left_castle'].draw(window, camera_offset=game_state['camera_offset'])
-    game_state['right_castle'].draw(window, camera_offset=game_state['camera_offset'])
-
-    # Draw characters
-    for character in game_state['characters']:
-        character.draw(window, camera_offset=game_state['camera_offset'])
+    # Draw castles and characters
+    renderer = game_state['renderer']
+    renderer.draw_castles(window, game_state['sim'], camera_offset=game_state['camera_offset'])
+    renderer.draw_units(window, game_state['sim'], camera_offset=game_state['camera_offset'])
 
     # Draw UI elements
     draw_ui(game_state, window)
     
     pygame.display.flip()
 
-def compute_episode_results(game_state: Dict[str, Any]) -> Dict[str, Any]:
-    """Compute the results of the episode."""
-    return {
-        'winner': game_state.get('winner', 'No Winner'),
-        'left_castle_hp': game_state['left_castle'].hp,
-        'right_castle_hp': game_state['right_castle'].hp,
-        'left_spawn_counts': game_state['left_spawn_counts'],
-        'right_spawn_counts': game_state['right_spawn_counts'],
-        'episode_duration': game_state.get('elapsed_time', 0)
-    }
-
 def log_episode_results(episode: int, results: Dict[str, Any], csv_file: str, write_header: bool) -> None:
     """Log the episode results to a CSV file."""
     if write_header:
@@ -545,193 +194,261 @@ def log_episode_results(episode: int, results: Dict[str, Any], csv_file: str, wr
               [results['right_spawn_counts'][t] for t in CHARACTER_TYPES]
         writer.writerow(row)
 
-def calculate_spawn_rewards(game_state, previous_state, action):
-    """
-    Calculate rewards for spawn agent actions based on multiple factors.
-    
-    Returns:
-        total_reward: float
-        reward_breakdown: dict
-    """
-    rewards = {
-        'castle_health_reward': 0.0,
-        'resource_management_reward': 0.0,
-        'unit_composition_reward': 0.0,
-        'tactical_positioning_reward': 0.0,
-        'combat_outcome_reward': 0.0
-    }
-    
-    # 1. Castle Health Reward (-5.0 to 5.0)
-    left_castle_hp_ratio = game_state['left_castle'].hp / game_state['left_castle'].max_hp
-    right_castle_hp_ratio = game_state['right_castle'].hp / game_state['right_castle'].max_hp
-    previous_left_hp_ratio = previous_state['left_castle'].hp / previous_state['left_castle'].max_hp
-    previous_right_hp_ratio = previous_state['right_castle'].hp / previous_state['right_castle'].max_hp
-    
-    castle_health_delta = (left_castle_hp_ratio - previous_left_hp_ratio) - \
-                         (right_castle_hp_ratio - previous_right_hp_ratio)
-    rewards['castle_health_reward'] = castle_health_delta * 1.0
-
-    # 2. Resource Management Reward (-1.0 to 1.0)
-    if action == SpawnActions.DO_NOTHING and game_state['left_gage'] < CONFIG.SPAWN_COST:
-        # Reward for saving resources when can't afford spawn
-        rewards['resource_management_reward'] = 0.1
-    elif action != SpawnActions.DO_NOTHING and game_state['left_gage'] >= CONFIG.SPAWN_COST:
-        # Small reward for efficient resource use
-        rewards['resource_management_reward'] = 0.01
-    else:
-        # Penalty for spawning when can't afford or not spawning when can
-        rewards['resource_management_reward'] = -0.1
-
-    # 3. Unit Composition Reward (-2.0 to 2.0)
-    left_units = [c for c in game_state['characters'] if c.team == 'left' and not c.is_dead]
-    unit_types = [c.character_type for c in left_units]
-    
-    # Reward for maintaining balanced composition
-    type_ratios = {t: unit_types.count(t) / len(unit_types) if unit_types else 0 
-                   for t in CHARACTER_TYPES}
-    balance_score = -abs(max(type_ratios.values()) - 1/len(CHARACTER_TYPES))
-    rewards['unit_composition_reward'] = balance_score * 1.0
-
-    # 4. Tactical Positioning Reward (-3.0 to 3.0)
-    left_units_positions = [c.x / CONFIG.WORLD_WIDTH for c in left_units]
-    if left_units_positions:
-        # Reward for forward positioning and good spacing
-        avg_position = sum(left_units_positions) / len(left_units_positions)
-        position_score = avg_position * 2 - 1  # Transform to [-1, 1]
-        rewards['tactical_positioning_reward'] = position_score * 1.0
-
-    # 5. Combat Outcome Reward (-4.0 to 4.0)
-    previous_enemies = [c for c in previous_state['characters'] 
-                       if c.team == 'right' and not c.is_dead]
-    current_enemies = [c for c in game_state['characters'] 
-                      if c.team == 'right' and not c.is_dead]
-    
-    enemies_defeated = len(previous_enemies) - len(current_enemies)
-    allies_lost = len([c for c in previous_state['characters'] if c.team == 'left']) - \
-                 len([c for c in game_state['characters'] if c.team == 'left'])
-    
-    combat_score = enemies_defeated - allies_lost
-    rewards['combat_outcome_reward'] = combat_score * 2.0
-
-    # Calculate total reward
-    total_reward = sum(rewards.values())
-    
-    # Add win/loss rewards
-    if game_state.get('winner'):
-        if game_state['winner'] == "Left Team Wins!":
-            total_reward += 1000.0
-            rewards['victory_reward'] = 1000.0
-        elif game_state['winner'] == "Right Team Wins!":
-            total_reward -= 1000.0
-            rewards['victory_reward'] = -1000.0
-    
-    return total_reward, rewards 
-
 def run_training_episode(episode: int,
                         config: Dict[str, Any],
-                        spawn_agent: AIPlayerAgent) -> Dict[str, Any]:
-    """Run a single training episode with reward calculation"""
-    pygame.init()
-    pygame.display.init()
-    
+                        spawn_agent: AIPlayerAgent,
+                        learner: Optional[Learner] = None) -> Dict[str, Any]:
+    """Run a single training episode with reward calculation, learning as scheduled by learner"""
+    if learner is None:
+        learner = Learner(spawn_agent)
     render = (episode % config['render_interval'] == 0)
     
+    # Headless episodes never initialise pygame or SDL
     if render:
+        pygame.init()
+        pygame.display.init()
         window = pygame.display.set_mode((CONFIG.SCREEN_WIDTH, CONFIG.WINDOW_HEIGHT))
         pygame.display.set_caption(f"Episode {episode}")
-    else:
-        window = pygame.display.set_mode((1, 1))
+        clock = pygame.time.Clock()
         
-    clock = pygame.time.Clock()
-    game_state = initialize_game_state(render)
-    previous_state = None
+    seed = None if config.get('seed') is None else config['seed'] + episode
+    env = SpawnEnv(render=render)
+    observation, _ = env.reset(seed)
     game_over = False
-    episode_rewards = []
     
     while not game_over:
-        # Store previous state for reward calculation
-        if previous_state is None:
-            previous_state = {
-                'left_castle': game_state['left_castle'],
-                'right_castle': game_state['right_castle'],
-                'characters': game_state['characters'].copy(),
-                'left_gage': game_state['left_gage'],
-                'right_gage': game_state['right_gage']
-            }
-        
-        # Get spawn state and action
-        spawn_state = build_spawn_state(
-            game_state['left_castle'], 
-            game_state['right_castle'],
-            game_state['characters'],
-            game_state['left_gage'],
-            game_state['right_gage']
-        )
+        # The env updates its observation in place; keep a copy of the state acted on
+        spawn_state = observation.copy()
         
         # Choose action
         action = spawn_agent.choose_action(spawn_state, deterministic=False)
         
-        # Execute action
-        handle_spawn_decision('left', action, game_state, spawn_agent)
-        
-        # Update game state
-        delta_time = handle_time_and_events(clock, render)
-        current_time = pygame.time.get_ticks() / 1000
-        game_over = update_game_state(game_state, delta_time, current_time,
-                                    spawn_agent, render)
-        
-        # Calculate rewards
-        total_reward, reward_breakdown = calculate_spawn_rewards(game_state, previous_state, action)
-        episode_rewards.append(total_reward)
-        
-        # Store state, action, reward for agent learning
-        next_spawn_state = build_spawn_state(
-            game_state['left_castle'],
-            game_state['right_castle'],
-            game_state['characters'],
-            game_state['left_gage'],
-            game_state['right_gage']
-        )
+        # Pace rendered episodes, then advance the battle by one fixed step
+        if render:
+            handle_time_and_events(clock, render)
+        observation, total_reward, terminated, truncated, info = env.step(action)
+        game_over = terminated or truncated
         
         # Store experience in agent's memory
-        spawn_agent.remember(spawn_state, action, total_reward, next_spawn_state, game_over)
-        
-        # Perform learning update
-        if len(spawn_agent.memory) >= 64:
-            loss = spawn_agent.replay()
-            if render and loss is not None:
-                print(f"Training loss: {loss:.4f}")
+        spawn_agent.remember(spawn_state, action, total_reward, observation, game_over)
         
-        # Update previous state
-        previous_state = {
-            'left_castle': game_state['left_castle'],
-            'right_castle': game_state['right_castle'],
-            'characters': game_state['characters'].copy(),
-            'left_gage': game_state['left_gage'],
-            'right_gage': game_state['right_gage']
-        }
+        # Perform the learning updates this step earned
+        loss = learner.observe(1)
+        if render and loss is not None:
+            print(f"Training loss: {loss:.4f}")
         
         if render:
-            render_game(game_state, window)
+            render_game(env.game_state, window)
     
     # Cleanup
-    pygame.display.quit()
-    pygame.quit()
+    if render:
+        pygame.display.quit()
+        pygame.quit()
+
+    # Episode results, with rewards added by the env
+    return info['episode']
+
+def run_vectorized_training(config: Dict[str, Any],
+                            spawn_agent: AIPlayerAgent,
+                            learner: Learner,
+                            writer: CheckpointWriter,
+                            csv_file: str,
+                            write_header: bool) -> None:
+    """
+    Train on config['num_envs'] headless battles stepped in lockstep.
 
-    # Add rewards to results
-    results = compute_episode_results(game_state)
-    results['total_reward'] = sum(episode_rewards)
-    results['avg_reward'] = sum(episode_rewards) / len(episode_rewards) if episode_rewards else 0
-    
-    return results
+    Every step scores all battles with one batched forward pass; each of
+    the num_envs transitions counts towards learner's update schedule.
+    Episodes are numbered in the order they finish.
+    """
+    env = VecSpawnEnv(config['num_envs'], seed=config.get('seed'))
+    states = env.reset().copy()
+    episode = config['start_episode'] - 1
+    reward_history = []
+
+    while episode < config['episodes']:
+        actions = spawn_agent.choose_actions(states, deterministic=False)
+        next_states, rewards, dones, infos = env.step(actions)
+        # The env updates its observations in place; keep a copy to act on next
+        next_states = next_states.copy()
+
+        # Finished battles were reset; learn from their terminal state
+        final_states = next_states.copy()
+        for i in np.flatnonzero(dones):
+            final_states[i] = infos[i]['final_observation']
+        spawn_agent.remember_batch(states, actions, rewards, final_states, dones)
+        learner.observe(len(actions))
+
+        for i in np.flatnonzero(dones):
+            episode += 1
+            with learner.paused():
+                record_episode(episode, infos[i]['episode'], config, spawn_agent, writer, csv_file, write_header,
+                               reward_history)
+            write_header = False
+            if episode >= config['episodes']:
+                break
+
+        states = next_states
+
+def run_parallel_training(config: Dict[str, Any],
+                          spawn_agent: AIPlayerAgent,
+                          learner: Learner,
+                          writer: CheckpointWriter,
+                          csv_file: str,
+                          write_header: bool) -> None:
+    """
+    Train while config['num_workers'] processes play battles.
+
+    Each worker steps config['num_envs'] headless battles with the last
+    published policy and streams transitions back over shared memory. The
+    learner adds them to its memory, runs the learning updates they earn
+    under learner's schedule and republishes its weights every
+    config['sync_interval'] updates. Episodes are numbered in the order
+    they finish.
+    """
+    from rollout import RolloutWorkers  # rollout builds on this module
+
+    episode = config['start_episode'] - 1
+    reward_history = []
+    synced = 0  # learner.updates at the last publish
+
+    with RolloutWorkers(spawn_agent, config['num_workers'], config['num_envs'], seed=config.get('seed')) as workers:
+        while episode < config['episodes']:
+            transitions = workers.drain()
+            spawn_agent.remember_batch(*transitions)
+            updates = learner.updates
+            learner.observe(len(transitions[1]))
+
+            if learner.updates - synced >= config['sync_interval']:
+                with learner.paused():
+                    workers.publish(spawn_agent)
+                synced = learner.updates
+            elif learner.updates == updates:
+                # Wait for the workers to earn the next update
+                workers.check()
+                time.sleep(0.01)
+
+            for results in workers.finished_episodes():
+                episode += 1
+                with learner.paused():
+                    record_episode(episode, results, config, spawn_agent, writer, csv_file, write_header, reward_history)
+                write_header = False
+                if episode >= config['episodes']:
+                    break
+
+        if workers.ring.dropped:
+            logging.info(f"Learner fell behind and skipped {workers.ring.dropped} transitions")
+
+def record_episode(episode: int,
+                   results: Dict[str, Any],
+                   config: Dict[str, Any],
+                   spawn_agent: AIPlayerAgent,
+                   writer: CheckpointWriter,
+                   csv_file: str,
+                   write_header: bool,
+                   reward_history: List[float]) -> None:
+    """
+    Log a finished episode and hand the spawn agent to writer to save.
+
+    Every config['snapshot_interval'] episodes queues an inference-only
+    policy snapshot, kept as history and usable as a stage model. Every
+    config['checkpoint_interval'] episodes queues a full resumable
+    checkpoint, with the memory if config['save_replay']; writer keeps
+    only the newest few. Every config['eval_interval'] episodes, if set,
+    runs and logs an evaluation.
+    """
+    reward_history.append(results['total_reward'])
+
+    # Log enhanced results
+    log_episode_results(episode, results, csv_file, write_header)
+
+    # Log rewards
+    logging.info(f"Episode {episode} - "
+                f"Total Reward: {results['total_reward']:.2f}, "
+                f"Average Reward: {results['avg_reward']:.2f}, "
+                f"Winner: {results['winner']}")
+
+    model_path = config['model_dir'] / f"spawn_agent_episode_{episode}.pth"
+
+    # Full resumable checkpoint
+    if episode % config.get('checkpoint_interval', 100) == 0:
+        writer.save_checkpoint(spawn_agent, model_path, episode, include_memory=config.get('save_replay', False),
+                               encoding=config.get('checkpoint_encoding', 'fp32'))
+
+    # Policy-only snapshot
+    if episode % config.get('snapshot_interval', 10) == 0:
+        writer.save_snapshot(spawn_agent, policy_path(model_path), episode,
+                             encoding=config.get('snapshot_encoding', 'fp16'))
+
+        # Calculate and log average reward over last 100 episodes
+        last_100_avg = sum(reward_history[-100:]) / min(100, len(reward_history))
+        logging.info(f"Last 100 episodes average reward: {last_100_avg:.2f}")
+
+    # Greedy evaluation battles
+    if config.get('eval_interval') and episode % config['eval_interval'] == 0:
+        evaluation = run_evaluation(spawn_agent, config.get('eval_episodes', 64), config.get('eval_battles', 16),
+                                    config.get('eval_opponent'), config.get('eval_seed', 0))
+        logging.info(f"Evaluation at episode {episode} - "
+                     f"Win rate: {evaluation['win_rate']:.2f}, "
+                     f"Average reward: {evaluation['avg_reward']:.2f}, "
+                     f"Mean inference batch: {evaluation['mean_batch_size']:.1f}")
+
+def run_evaluation(spawn_agent: AIPlayerAgent,
+                   episodes: int,
+                   battles: int = 16,
+                   opponent: Optional[str] = None,
+                   seed: Optional[int] = 0) -> Dict[str, float]:
+    """
+    Play episodes headless battles with spawn_agent acting greedily, battles at a time.
+
+    Each battle runs on its own thread. Both sides get their actions from an
+    InferenceServer, so the concurrent battles share batched forward passes.
+    The right team plays the policy of the opponent checkpoint, or the
+    scripted random opponent when there is none. Episode n uses seed + n, so
+    evaluations with the same seed face the same battles.
+    """
+    if opponent is not None:
+        if not os.path.exists(opponent):
+            logging.error(f"Evaluation opponent {opponent} not found")
+            raise FileNotFoundError(opponent)
+        opponent_agent = AIPlayerAgent(state_size=spawn_agent.state_size, team='right')
+        opponent_agent.load(opponent)
+
+    with InferenceServer(spawn_agent.policy_net) as agent_server, \
+            (InferenceServer(opponent_agent.policy_net) if opponent is not None else nullcontext()) as opponent_server:
+        def play(n: int) -> Dict[str, Any]:
+            env = SpawnEnv(opponent_policy=opponent_server)
+            observation, _ = env.reset(None if seed is None else seed + n)
+            while True:
+                observation, _, terminated, truncated, info = env.step(agent_server.act(observation))
+                if terminated or truncated:
+                    return info['episode']
+
+        with ThreadPoolExecutor(max_workers=battles, thread_name_prefix="evaluation") as pool:
+            results = list(pool.map(play, range(episodes)))
+        mean_batch_size = agent_server.mean_batch_size
 
-def find_latest_checkpoint() -> Optional[str]:
-    """Find the latest checkpoint file in the models directory"""
-    models_dir = Path("models")
+    return {
+        'win_rate': sum(result['winner'] == "Left Team Wins!" for result in results) / episodes,
+        'avg_reward': float(sum(result['total_reward'] for result in results)) / episodes,
+        'avg_duration': sum(result['episode_duration'] for result in results) / episodes,
+        'mean_batch_size': mean_batch_size
+    }
+
+def find_latest_checkpoint(models_dir: Path = Path("models")) -> Optional[str]:
+    """Find the latest checkpoint file in the models directory, from its manifest when it has one"""
     if not models_dir.exists():
         return None
-        
-    # Look for files matching pattern "spawn_agent_episode_*.pth"
+
+    manifest = read_manifest(models_dir)
+    if manifest is not None:
+        # Entries are only added once their file is completely written
+        for entry in sorted(manifest['checkpoints'], key=lambda entry: entry['episode'], reverse=True):
+            checkpoint = models_dir / entry['file']
+            if checkpoint.exists():
+                return str(checkpoint)
+
+    # No manifest, or none of its checkpoints exist yet: fall back to spawn_agent_episode_*.pth files
     checkpoints = glob.glob(str(models_dir / "spawn_agent_episode_*.pth"))
     if not checkpoints:
         return None
@@ -757,13 +474,37 @@ def setup_training(start_from_checkpoint: bool = True) -> Dict[str, Any]:
         'render_interval': 1,
         'model_dir': Path("models"),
         'start_episode': 1,
-        'checkpoint_path': None
+        'checkpoint_path': None,
+        'seed': None,  # Base seed; episode n uses seed + n, None picks a fresh seed per episode
+        'num_envs': 1,  # Battles stepped in lockstep; above 1 trains headless on a VecSpawnEnv
+        'num_workers': 0,  # Rollout processes, each stepping num_envs battles; 0 plays in this process
+        'sync_interval': 100,  # Learning updates between weight syncs to rollout workers
+        'save_replay': False,  # Also save the replay buffer next to each checkpoint, to resume with it
+        'prioritized_replay': False,  # Sample transitions by TD error from a sum-tree instead of uniformly
+        'batch_size': 64,  # Transitions per learning update
+        'n_step': 1,  # Rewards summed into each TD target before bootstrapping
+        'double_dqn': False,  # Double DQN targets: policy network picks the next action, target network scores it
+        'target_update_freq': 1000,  # Learner steps between hard target network syncs
+        'target_tau': 0.0,  # Polyak rate per learner step; above 0 soft-updates the target instead
+        'train_every': 1,  # Transitions collected between rounds of learning updates
+        'gradient_steps': 1,  # Learning updates per round
+        'background_learner': False,  # Run learning updates on a thread while battles keep stepping
+        'checkpoint_interval': 100,  # Episodes between full resumable checkpoints
+        'keep_checkpoints': 3,  # Full checkpoints listed in the manifest kept on disk; older ones are deleted
+        'checkpoint_encoding': 'fp32',  # 'fp32' or 'fp16' for full checkpoints
+        'snapshot_interval': 10,  # Episodes between inference-only policy snapshots
+        'snapshot_encoding': 'fp16',  # 'fp32', 'fp16' or 'int8' weights in policy snapshots
+        'eval_interval': 0,  # Episodes between greedy evaluations; 0 never evaluates
+        'eval_episodes': 64,  # Battles per evaluation
+        'eval_battles': 16,  # Evaluation battles played at once, their actions batched by InferenceServers
+        'eval_opponent': None,  # Checkpoint the right team plays in evaluations; None is the scripted random opponent
+        'eval_seed': 0  # Evaluation battle n uses eval_seed + n, so evaluations are comparable
     }
     
     config['model_dir'].mkdir(exist_ok=True)
     
     if start_from_checkpoint:
-        checkpoint_path = find_latest_checkpoint()
+        checkpoint_path = find_latest_checkpoint(config['model_dir'])
         if checkpoint_path:
             # Extract episode number from checkpoint name
             match = re.search(r'episode_(\d+)\.pth$', checkpoint_path)
@@ -787,7 +528,13 @@ def main() -> None:
     spawn_state_size = 6 + 2 * NUM_CHARACTER_TYPES  # Base features + character counts
     
     # Initialize spawn agent
-    spawn_agent = AIPlayerAgent(state_size=spawn_state_size, team='left')
+    spawn_agent = AIPlayerAgent(state_size=spawn_state_size, team='left',
+                                prioritized=config['prioritized_replay'],
+                                batch_size=config['batch_size'],
+                                n_step=config['n_step'],
+                                double_dqn=config['double_dqn'],
+                                target_update_freq=config['target_update_freq'],
+                                target_tau=config['target_tau'])
     
     # Load checkpoint if available
     if config['checkpoint_path']:
@@ -799,35 +546,29 @@ def main() -> None:
             logging.info("Starting fresh training")
             config['start_episode'] = 1
     
-    # Training metrics
-    reward_history = []
-    
-    # Training loop
-    for episode in range(config['start_episode'], config['episodes'] + 1):
-        logging.info(f"Starting episode {episode}")
-        
-        # Run episode with reward calculation
-        results = run_training_episode(episode, config, spawn_agent)
-        reward_history.append(results['total_reward'])
-        
-        # Log enhanced results
-        log_episode_results(episode, results, csv_file, write_header)
-        write_header = False
-        
-        # Log rewards
-        logging.info(f"Episode {episode} - "
-                    f"Total Reward: {results['total_reward']:.2f}, "
-                    f"Average Reward: {results['avg_reward']:.2f}, "
-                    f"Winner: {results['winner']}")
-        
-        # Save spawn agent model periodically
-        if episode % 10 == 0:
-            model_path = config['model_dir'] / f"spawn_agent_episode_{episode}.pth"
-            spawn_agent.save(model_path)
-            
-            # Calculate and log average reward over last 100 episodes
-            last_100_avg = sum(reward_history[-100:]) / min(100, len(reward_history))
-            logging.info(f"Last 100 episodes average reward: {last_100_avg:.2f}")
+    # Checkpoints are written in the background; leaving the block waits for the last ones
+    with Learner(spawn_agent, config['train_every'], config['gradient_steps'],
+                 background=config['background_learner']) as learner, \
+            CheckpointWriter(config['model_dir'], keep=config['keep_checkpoints']) as writer:
+        if config['num_workers'] > 0:
+            run_parallel_training(config, spawn_agent, learner, writer, csv_file, write_header)
+            return
+        if config['num_envs'] > 1:
+            run_vectorized_training(config, spawn_agent, learner, writer, csv_file, write_header)
+            return
+
+        # Training metrics
+        reward_history = []
+
+        # Training loop
+        for episode in range(config['start_episode'], config['episodes'] + 1):
+            logging.info(f"Starting episode {episode}")
+
+            # Run episode with reward calculation
+            results = run_training_episode(episode, config, spawn_agent, learner)
+            with learner.paused():
+                record_episode(episode, results, config, spawn_agent, writer, csv_file, write_header, reward_history)
+            write_header = False
             
 if __name__ == "__main__":
     main()
\ No newline at end of file